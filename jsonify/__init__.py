@@ -0,0 +1,133 @@
+"""JSONify core library: parse, validate, format and analyze JSON without a UI.
+
+The Streamlit app in ``streamlit_app.py`` is a thin front end over this package;
+nothing here imports Streamlit.
+"""
+from .analysis import AnalysisAccumulator, analyze_json, get_schema_info, merge_analysis
+from .backend import available_backends, get_backend_name, set_backend
+from .builder import PairStore
+from .cache import (
+    NestingError,
+    ParseCache,
+    ParsedDocument,
+    document_hash,
+    get_parse_cache,
+    parse_json_cached,
+)
+from .core import (
+    VALUE_TYPES,
+    format_file_size,
+    format_json,
+    minify_json,
+    safe_json_parse,
+    to_builder_entry,
+    validate_json_string,
+)
+from .delivery import OutputCache, encode_output, get_output_cache
+from .diff import diff_json
+from .encoding import decode_bytes, detect_encoding, iter_decoded
+from .fetch import FetchError, UrlFetcher, get_fetcher
+from .multifetch import expand_url_template, fetch_all, fetch_and_merge
+from .ndjson import process_ndjson
+from .patch import DocumentEditor, IncrementalSerializer, JsonPatchError, apply_patch
+from .profiling import Profiler, append_profile_log
+from .query import QueryError, QueryIndex, compile_query, query_json, query_page
+from .schema import SchemaAccumulator, infer_schema, schema_paths
+from .search import SearchIndex, search_page
+from .spool import SpooledUpload
+from .streaming import (
+    StreamDecodeError,
+    iter_events,
+    iter_text_chunks,
+    reformat_text,
+    stream_analyze,
+    stream_format,
+    stream_reformat,
+    stream_validate,
+)
+from .validation import (
+    CompiledSchema,
+    SchemaError,
+    ValidatorCache,
+    compile_schema,
+    get_validator,
+    validate_with_schema,
+)
+from .viewer import LineIndex, child_entries, format_path, parse_path, path_line, resolve_path
+
+__version__ = "2.0"
+
+__all__ = [
+    "AnalysisAccumulator",
+    "CompiledSchema",
+    "DocumentEditor",
+    "FetchError",
+    "IncrementalSerializer",
+    "JsonPatchError",
+    "LineIndex",
+    "NestingError",
+    "OutputCache",
+    "PairStore",
+    "ParseCache",
+    "ParsedDocument",
+    "Profiler",
+    "QueryError",
+    "QueryIndex",
+    "SchemaAccumulator",
+    "SchemaError",
+    "SearchIndex",
+    "SpooledUpload",
+    "StreamDecodeError",
+    "UrlFetcher",
+    "VALUE_TYPES",
+    "ValidatorCache",
+    "analyze_json",
+    "append_profile_log",
+    "apply_patch",
+    "available_backends",
+    "child_entries",
+    "compile_query",
+    "compile_schema",
+    "decode_bytes",
+    "detect_encoding",
+    "diff_json",
+    "document_hash",
+    "encode_output",
+    "expand_url_template",
+    "fetch_all",
+    "fetch_and_merge",
+    "format_file_size",
+    "format_json",
+    "format_path",
+    "get_backend_name",
+    "get_fetcher",
+    "get_output_cache",
+    "get_parse_cache",
+    "get_schema_info",
+    "get_validator",
+    "infer_schema",
+    "iter_decoded",
+    "iter_events",
+    "iter_text_chunks",
+    "merge_analysis",
+    "minify_json",
+    "parse_json_cached",
+    "parse_path",
+    "path_line",
+    "process_ndjson",
+    "query_json",
+    "query_page",
+    "reformat_text",
+    "resolve_path",
+    "safe_json_parse",
+    "schema_paths",
+    "search_page",
+    "set_backend",
+    "stream_analyze",
+    "stream_format",
+    "stream_reformat",
+    "stream_validate",
+    "to_builder_entry",
+    "validate_json_string",
+    "validate_with_schema",
+]
@@ -0,0 +1,178 @@
+"""Structural statistics and schema summaries for parsed JSON values"""
+from typing import Any, Dict, List
+
+def _length_bucket_label(bucket: int) -> str:
+    """Label of a power-of-two length bucket: 0, 1, 2-3, 4-7, ..."""
+    if bucket <= 1:
+        return str(bucket)
+    return f"{1 << (bucket - 1)}-{(1 << bucket) - 1}"
+
+def _length_distribution(buckets: List[int], count: int, total: int, longest: int) -> Dict[str, Any]:
+    """Summarize power-of-two bucket counts into a length distribution"""
+    return {
+        'count': count,
+        'total': total,
+        'mean': total / count if count else 0,
+        'max': longest,
+        'histogram': {_length_bucket_label(i): n for i, n in enumerate(buckets) if n},
+    }
+
+def _merge_distribution(target: Dict[str, Any], other: Dict[str, Any]):
+    target['count'] += other['count']
+    target['total'] += other['total']
+    target['mean'] = target['total'] / target['count'] if target['count'] else 0
+    target['max'] = max(target['max'], other['max'])
+    for label, n in other['histogram'].items():
+        target['histogram'][label] = target['histogram'].get(label, 0) + n
+    # Keep buckets in ascending length order
+    target['histogram'] = dict(sorted(target['histogram'].items(), key=lambda item: int(item[0].split('-')[0])))
+
+class AnalysisAccumulator:
+    """Running analyze_json statistics that any number of sub-trees can be added to"""
+
+    def __init__(self):
+        self.type_counts: Dict[type, int] = {}
+        self.total_keys = 0
+        self.objects = 0
+        self.arrays = 0
+        self.max_depth = 0
+        self.string_buckets = [0] * 64
+        self.string_count = 0
+        self.string_total = 0
+        self.string_max = 0
+        self.array_buckets = [0] * 64
+        self.array_total = 0
+        self.array_max = 0
+
+    def add_string(self, value: str):
+        length = len(value)
+        self.string_buckets[length.bit_length()] += 1
+        self.string_count += 1
+        self.string_total += length
+        if length > self.string_max:
+            self.string_max = length
+
+    def add_array_length(self, size: int):
+        self.arrays += 1
+        self.array_buckets[size.bit_length()] += 1
+        self.array_total += size
+        if size > self.array_max:
+            self.array_max = size
+
+    def count_type(self, value_type: type):
+        self.type_counts[value_type] = self.type_counts.get(value_type, 0) + 1
+
+    def add(self, obj: Any, depth: int = 0):
+        """Walk obj once with an explicit stack and add its statistics.
+
+        The root itself is not counted in the type histogram; its container
+        depth is taken to be depth.
+        """
+        type_counts = self.type_counts
+        total_keys = self.total_keys
+        objects = self.objects
+        max_depth = max(self.max_depth, depth)
+        string_buckets = self.string_buckets
+        string_count = self.string_count
+        string_total = self.string_total
+        string_max = self.string_max
+        add_array_length = self.add_array_length
+
+        nodes = [obj]
+        depths = [depth]
+        while nodes:
+            node = nodes.pop()
+            node_depth = depths.pop()
+            if node_depth > max_depth:
+                max_depth = node_depth
+
+            if isinstance(node, dict):
+                objects += 1
+                total_keys += len(node)
+                children = node.values()
+                # Object values count towards the type histogram even when they are containers
+                count_containers = True
+            elif isinstance(node, list):
+                add_array_length(len(node))
+                children = node
+                count_containers = False
+            else:
+                continue
+
+            for value in children:
+                value_type = type(value)
+                if value_type is str:
+                    length = len(value)
+                    string_buckets[length.bit_length()] += 1
+                    string_count += 1
+                    string_total += length
+                    if length > string_max:
+                        string_max = length
+                elif value_type is dict or value_type is list or isinstance(value, (dict, list)):
+                    nodes.append(value)
+                    depths.append(node_depth + 1)
+                    if not count_containers:
+                        continue
+                type_counts[value_type] = type_counts.get(value_type, 0) + 1
+
+        self.total_keys = total_keys
+        self.objects = objects
+        self.max_depth = max_depth
+        self.string_count = string_count
+        self.string_total = string_total
+        self.string_max = string_max
+
+    def result(self) -> Dict[str, Any]:
+        """Return the statistics in the analyze_json result format"""
+        return {
+            'total_keys': self.total_keys,
+            'max_depth': self.max_depth,
+            'types': {t.__name__: n for t, n in self.type_counts.items()},
+            'arrays': self.arrays,
+            'objects': self.objects,
+            'string_lengths': _length_distribution(
+                self.string_buckets, self.string_count, self.string_total, self.string_max),
+            'array_lengths': _length_distribution(
+                self.array_buckets, self.arrays, self.array_total, self.array_max),
+        }
+
+def analyze_json(obj: Any, depth: int = 0) -> Dict[str, Any]:
+    """Count keys, containers and value types and measure the nesting depth.
+
+    Walks the tree once with an explicit stack, so arbitrarily deep documents
+    do not hit the recursion limit. Besides the totals it reports the
+    distribution of string lengths and array lengths.
+    """
+    accumulator = AnalysisAccumulator()
+    accumulator.add(obj, depth)
+    return accumulator.result()
+
+def get_schema_info(obj: Any, path: str = "") -> List[str]:
+    """Describe every property path of an object with its type, one line per path"""
+    info = []
+    if isinstance(obj, dict):
+        for k, v in obj.items():
+            current_path = f"{path}.{k}" if path else k
+            type_name = type(v).__name__
+            if isinstance(v, dict):
+                info.append(f"🔹 {current_path}: object ({len(v)} properties)")
+                info.extend(get_schema_info(v, current_path))
+            elif isinstance(v, list):
+                info.append(f"🔹 {current_path}: array ({len(v)} items)")
+                if v and isinstance(v[0], (dict, list)):
+                    info.extend(get_schema_info(v[0], f"{current_path}[0]"))
+            else:
+                info.append(f"🔹 {current_path}: {type_name}")
+    return info
+
+def merge_analysis(target: Dict[str, Any], other: Dict[str, Any]) -> Dict[str, Any]:
+    """Fold the analyze_json result of another document or sub-tree into target"""
+    target['total_keys'] += other['total_keys']
+    target['max_depth'] = max(target['max_depth'], other['max_depth'])
+    target['arrays'] += other['arrays']
+    target['objects'] += other['objects']
+    for t, count in other['types'].items():
+        target['types'][t] = target['types'].get(t, 0) + count
+    _merge_distribution(target['string_lengths'], other['string_lengths'])
+    _merge_distribution(target['array_lengths'], other['array_lengths'])
+    return target
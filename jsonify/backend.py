@@ -0,0 +1,182 @@
+"""Serializer backends: the fastest available JSON encoder/decoder behind one API.
+
+``loads`` and ``dumps`` mirror ``json.loads`` and ``json.dumps`` (including the
+``indent``, ``sort_keys``, ``ensure_ascii`` and ``separators`` options) but try
+ujson and simdjson first when they are installed, or orjson when it is pinned.
+A backend that cannot honour a particular combination of options, or fails
+on a particular value, is skipped and the next one is used, ending with the
+standard library.
+
+Differences worth knowing about:
+
+* Decoding always reports errors as ``json.JSONDecodeError`` with the standard
+  library's message, because failures are re-parsed with ``json.loads``.
+* simdjson is the preferred decoder. orjson silently turns integers beyond 64
+  bits into floats, so it only decodes when pinned, behind a digit-run check
+  that costs about as much as it saves.
+* Encoders must write what ``json.dumps`` writes. ujson is only used with
+  ``ensure_ascii=False``, and its output is discarded when it may hold a
+  one-digit negative exponent (``1e-7`` rather than ``1e-07``); it is too
+  lenient to be used for validation.
+* orjson writes NaN and infinities as ``null``, spells float exponents
+  differently (``1e16`` rather than ``1e+16``) and writes small floats without
+  one (``0.00001`` rather than ``1e-05``). Outputs that may hold any of these
+  are discarded, which includes every output with a ``null``, so orjson only
+  encodes when it is pinned.
+
+Set the ``JSONIFY_BACKEND`` environment variable to ``json``, ``orjson``,
+``ujson`` or ``simdjson`` to pin a preferred backend.
+"""
+import json
+import mmap
+import os
+import re
+from typing import Any, Callable, List, Optional, Tuple, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+try:
+    import simdjson
+except ImportError:
+    simdjson = None
+
+Separators = Tuple[str, str]
+Encoder = Callable[[Any, Optional[int], bool, bool, Separators], Optional[str]]
+Decoder = Callable[[Union[str, bytes, memoryview, mmap.mmap]], Any]
+
+# orjson turns integers beyond 64 bits into floats; any run of 19+ digits sends
+# the document to the standard library instead
+_LONG_DIGITS = re.compile(r'[0-9]{19}')
+_LONG_DIGITS_BYTES = re.compile(rb'[0-9]{19}')
+# Floats json.dumps spells differently: orjson drops the plus sign and leading zeros
+# of exponents, writes floats below 1e-4 without one and NaN and infinities as null;
+# ujson drops the leading zero of one-digit negative exponents. Text inside strings
+# can match too, which only costs a fallback to the next encoder
+_ORJSON_MISMATCH = re.compile(r'[0-9]e|0\.0000|null')
+_UJSON_EXPONENT = re.compile(r'[0-9]e-[0-9](?![0-9])')
+
+def _orjson_loads(text: Union[str, bytes, memoryview, mmap.mmap]) -> Any:
+    long_digits = _LONG_DIGITS if isinstance(text, str) else _LONG_DIGITS_BYTES
+    if long_digits.search(text):
+        raise ValueError("possible integer beyond 64 bits")
+    if isinstance(text, (str, bytes, bytearray, memoryview)):
+        return orjson.loads(text)
+    with memoryview(text) as view:
+        return orjson.loads(view)
+
+def _simdjson_loads(text: Union[str, bytes, memoryview, mmap.mmap]) -> Any:
+    # simdjson skips a leading byte order mark that json.loads rejects
+    if text[:1] == '\ufeff' or text[:3] == b'\xef\xbb\xbf':
+        raise ValueError("byte order mark")
+    return simdjson.loads(text)
+
+def _orjson_dumps(obj: Any, indent: Optional[int], sort_keys: bool,
+                  ensure_ascii: bool, separators: Separators) -> Optional[str]:
+    if ensure_ascii:
+        return None
+    if indent is None and separators == (',', ':'):
+        option = 0
+    elif indent == 2 and separators == (',', ': '):
+        option = orjson.OPT_INDENT_2
+    else:
+        return None
+    if sort_keys:
+        option |= orjson.OPT_SORT_KEYS
+    try:
+        text = orjson.dumps(obj, option=option).decode('utf-8')
+    except TypeError:
+        # Integers beyond 64 bits, lone surrogates, unsupported types
+        return None
+    return None if _ORJSON_MISMATCH.search(text) else text
+
+def _ujson_dumps(obj: Any, indent: Optional[int], sort_keys: bool,
+                 ensure_ascii: bool, separators: Separators) -> Optional[str]:
+    # ujson treats indent=0 as "no newlines", unlike json.dumps
+    if ensure_ascii or indent == 0:
+        return None
+    try:
+        text = ujson.dumps(obj, ensure_ascii=False, indent=indent or 0, sort_keys=sort_keys,
+                           escape_forward_slashes=False, separators=separators)
+    except (TypeError, ValueError, OverflowError):
+        return None
+    return None if _UJSON_EXPONENT.search(text) else text
+
+def _json_dumps(obj: Any, indent: Optional[int], sort_keys: bool,
+                ensure_ascii: bool, separators: Separators) -> str:
+    return json.dumps(obj, indent=indent, sort_keys=sort_keys,
+                      ensure_ascii=ensure_ascii, separators=separators)
+
+_ENCODERS = {'orjson': _orjson_dumps, 'ujson': _ujson_dumps}
+# simdjson rejects integers beyond 64 bits itself, so it needs no guard
+_DECODERS = {
+    'orjson': _orjson_loads if orjson is not None else None,
+    'simdjson': _simdjson_loads if simdjson is not None else None,
+}
+_PREFERENCE = ['orjson', 'ujson', 'simdjson']
+_DEFAULT_DECODERS = ['simdjson']
+# orjson changes non-finite floats, so it only encodes when pinned
+_DEFAULT_ENCODERS = ['ujson']
+_AVAILABLE = {'orjson': orjson, 'ujson': ujson, 'simdjson': simdjson}
+
+_encoders: List[Encoder] = []
+_decoder: Optional[Decoder] = None
+_backend_name = 'json'
+
+def available_backends() -> List[str]:
+    """Names of the backends that can be used in this environment"""
+    return ['json'] + [name for name in _PREFERENCE if _AVAILABLE[name] is not None]
+
+def set_backend(name: Optional[str] = None):
+    """Prefer the named backend, or the default ones that are installed when name is None"""
+    global _encoders, _decoder, _backend_name
+    if name is not None and name not in available_backends():
+        raise ValueError(f"JSON backend '{name}' is not available; choose from {available_backends()}")
+    encoder_order = [name] if name is not None else _DEFAULT_ENCODERS
+    encoders = [n for n in encoder_order if n in _ENCODERS and _AVAILABLE[n] is not None]
+    _encoders = [_ENCODERS[n] for n in encoders] + [_json_dumps]
+    decoder_order = [name] if name is not None else _DEFAULT_DECODERS
+    decoders = [n for n in decoder_order if _DECODERS.get(n) is not None]
+    _decoder = _DECODERS[decoders[0]] if decoders else None
+    if name is not None:
+        _backend_name = name
+    else:
+        _backend_name = '+'.join(encoders + decoders) or 'json'
+
+def get_backend_name() -> str:
+    """Name of the preferred backend currently in use"""
+    return _backend_name
+
+def loads(text: Union[str, bytes, memoryview, mmap.mmap]) -> Any:
+    """Parse JSON text or UTF-8/16/32 bytes like json.loads, using the fast decoder when it is safe to"""
+    if _decoder is not None:
+        try:
+            return _decoder(text)
+        except (ValueError, TypeError, RuntimeError):
+            # Rejected by the fast decoder (simdjson raises RuntimeError for integers
+            # beyond 64 bits); the standard library decides and reports
+            pass
+    if not isinstance(text, (str, bytes, bytearray)):
+        # Memory maps and views are copied only when the fast decoder declines them
+        text = bytes(text)
+    return json.loads(text)
+
+def dumps(obj: Any, indent: Optional[int] = None, sort_keys: bool = False,
+          ensure_ascii: bool = True, separators: Optional[Separators] = None) -> str:
+    """Serialize obj like json.dumps, using the first backend that supports the options"""
+    if separators is None:
+        separators = (',', ': ') if indent is not None else (', ', ': ')
+    for encode in _encoders:
+        text = encode(obj, indent, sort_keys, ensure_ascii, separators)
+        if text is not None:
+            return text
+    return _json_dumps(obj, indent, sort_keys, ensure_ascii, separators)
+
+set_backend(os.environ.get('JSONIFY_BACKEND') or None)
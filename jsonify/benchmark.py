@@ -0,0 +1,287 @@
+"""Benchmarks of every JSONify mode against reproducible synthetic corpora.
+
+Usage::
+
+    python -m jsonify.benchmark --sizes 100KB,1MB,10MB --output bench.json
+    python -m jsonify.benchmark --output after.json --baseline bench.json
+
+Each corpus shape (wide objects, deep nesting, arrays of records, unicode-heavy
+strings, large numbers) is generated from a fixed seed at every requested size,
+so two runs on different commits measure exactly the same documents. Results
+are written as JSON with throughput, peak memory and latency percentiles per
+corpus, size and operation.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from . import __version__
+from .analysis import analyze_json
+from .backend import dumps, get_backend_name, loads, set_backend
+from .core import format_file_size, format_json, minify_json
+from .ndjson import process_ndjson
+from .schema import SchemaAccumulator, infer_schema
+from .streaming import iter_events, stream_analyze
+
+SEED = 20240601
+DEFAULT_SIZES = "100KB,1MB"
+PERCENTILES = [50, 90, 99]
+
+_UNITS = {"B": 1, "KB": 1024, "MB": 1024 ** 2, "GB": 1024 ** 3}
+_WORDS = ["alpha", "beta", "gamma", "delta", "omega", "lorem", "ipsum", "dolor", "sit", "amet"]
+_UNICODE_WORDS = ["日本語", "テキスト", "中文字符", "한국어", "Ελληνικά", "русский", "العربية",
+                  "עברית", "हिन्दी", "ñandú", "café", "Zürich", "🌍", "🚀", "👩‍💻", "✨"]
+
+def parse_size(text: str) -> int:
+    """Parse a size such as 512KB or 10MB into bytes"""
+    text = text.strip().upper()
+    for unit in sorted(_UNITS, key=len, reverse=True):
+        if text.endswith(unit):
+            return int(float(text[:-len(unit)]) * _UNITS[unit])
+    return int(text)
+
+def _words(rng: random.Random, vocabulary: List[str], count: int) -> str:
+    return " ".join(rng.choice(vocabulary) for _ in range(count))
+
+def _record(rng: random.Random, i: int) -> Any:
+    return {
+        "id": i,
+        "name": _words(rng, _WORDS, 2).title(),
+        "email": f"user{i}@example.com",
+        "active": rng.random() < 0.5,
+        "score": round(rng.uniform(0, 100), 3),
+        "tags": [rng.choice(_WORDS) for _ in range(rng.randint(0, 5))],
+        "address": {"city": rng.choice(_WORDS).title(), "zip": f"{rng.randint(0, 99999):05d}"},
+        "manager": None,
+    }
+
+def _wide_member(rng: random.Random, i: int) -> Tuple[str, Any]:
+    choice = i % 4
+    if choice == 0:
+        value = rng.randint(-10 ** 6, 10 ** 6)
+    elif choice == 1:
+        value = _words(rng, _WORDS, 3)
+    elif choice == 2:
+        value = rng.random() < 0.5
+    else:
+        value = None
+    return f"field_{i:07d}", value
+
+def _deep_chain(rng: random.Random, i: int, depth: int = 64) -> Any:
+    node: Any = {"leaf": i, "label": rng.choice(_WORDS)}
+    for level in range(depth):
+        node = {"level": depth - level, "child": node} if level % 2 else [level, node]
+    return node
+
+def _unicode_item(rng: random.Random, i: int) -> Any:
+    return {
+        _words(rng, _UNICODE_WORDS, 1): _words(rng, _UNICODE_WORDS, rng.randint(3, 12)),
+        "quote": 'He said "' + _words(rng, _UNICODE_WORDS, 2) + '"\n\ttab\\slash',
+        "emoji": "".join(rng.choice("😀🎉🔥💡🧪🌈") for _ in range(rng.randint(1, 8))),
+    }
+
+def _numbers_item(rng: random.Random, i: int) -> Any:
+    return [
+        rng.randint(-2 ** 63, 2 ** 63 - 1),
+        rng.randint(2 ** 64, 2 ** 80),
+        rng.uniform(-1e300, 1e300),
+        rng.random() * 10 ** rng.randint(-20, 20),
+        i,
+    ]
+
+# name -> (builds one item from (rng, index), whether items are object members)
+CORPORA: Dict[str, Tuple[Callable[[random.Random, int], Any], bool]] = {
+    "wide_object": (_wide_member, True),
+    "deep_nesting": (_deep_chain, False),
+    "records": (_record, False),
+    "unicode": (_unicode_item, False),
+    "numbers": (_numbers_item, False),
+}
+
+def generate_corpus(name: str, size: int, seed: int = SEED) -> Any:
+    """Build the named corpus with a serialized size of roughly size bytes"""
+    make_item, is_member = CORPORA[name]
+    rng = random.Random(f"{seed}:{name}:{size}")
+    document: Any = {} if is_member else []
+    total = 2
+    i = 0
+    while total < size:
+        item = make_item(rng, i)
+        if is_member:
+            key, value = item
+            document[key] = value
+            total += len(dumps(key, ensure_ascii=False)) + len(dumps(value, ensure_ascii=False)) + 4
+        else:
+            document.append(item)
+            total += len(dumps(item, ensure_ascii=False)) + 2
+        i += 1
+    return document
+
+def _ndjson_call(text: str, document: Any) -> Callable[[], Any]:
+    # Top-level array items become records; any other document is one record
+    items = document if isinstance(document, list) else [document]
+    lines = [minify_json(item) for item in items]
+    return lambda: process_ndjson(lines, "minify", jobs=1)
+
+def _stream_schema(text: str) -> Dict[str, Any]:
+    # What the formatter's streaming mode runs for its schema panel
+    accumulator = SchemaAccumulator()
+    accumulator.add_events(iter_events([text], subtrees=True))
+    return accumulator.schema()
+
+# name -> builds the benchmarked call from (document text, parsed document)
+OPERATIONS: Dict[str, Callable[[str, Any], Callable[[], Any]]] = {
+    "convert": lambda text, obj: lambda: dumps(text, ensure_ascii=False),
+    "parse": lambda text, obj: lambda: loads(text),
+    "format": lambda text, obj: lambda: format_json(obj, indent=2),
+    "format_sorted": lambda text, obj: lambda: format_json(obj, indent=2, sort_keys=True),
+    "minify": lambda text, obj: lambda: minify_json(obj),
+    "analyze": lambda text, obj: lambda: analyze_json(obj),
+    "schema": lambda text, obj: lambda: infer_schema(obj),
+    "stream_analyze": lambda text, obj: lambda: stream_analyze(iter_events([text], subtrees=True)),
+    "stream_schema": lambda text, obj: lambda: _stream_schema(text),
+    "ndjson": _ndjson_call,
+}
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of samples"""
+    ordered = sorted(samples)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+def measure(call: Callable[[], Any], repeat: int, memory: bool) -> Dict[str, Any]:
+    """Time repeat calls, then measure peak traced memory over one more call"""
+    call()  # warm-up
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        call()
+        timings.append(time.perf_counter() - started)
+    result = {
+        "repeat": repeat,
+        "min_ms": min(timings) * 1000,
+        "mean_ms": sum(timings) / len(timings) * 1000,
+        "max_ms": max(timings) * 1000,
+    }
+    for pct in PERCENTILES:
+        result[f"p{pct}_ms"] = percentile(timings, pct) * 1000
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            call()
+            result["peak_memory_bytes"] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return result
+
+def _git_commit() -> Optional[str]:
+    try:
+        completed = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                   text=True, timeout=5, cwd=os.path.dirname(os.path.abspath(__file__)))
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return completed.stdout.strip() or None
+
+def run_benchmarks(sizes: List[int], corpora: Optional[List[str]] = None,
+                   operations: Optional[List[str]] = None, repeat: int = 5,
+                   memory: bool = True, seed: int = SEED,
+                   progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """Run every operation against every corpus at every size and collect the results"""
+    results = []
+    for name in corpora or list(CORPORA):
+        for size in sizes:
+            document = generate_corpus(name, size, seed)
+            text = dumps(document, ensure_ascii=False)
+            input_bytes = len(text.encode("utf-8"))
+            for operation in operations or list(OPERATIONS):
+                entry = {"corpus": name, "size": size, "operation": operation, "input_bytes": input_bytes}
+                entry.update(measure(OPERATIONS[operation](text, document), repeat, memory))
+                entry["throughput_mb_s"] = input_bytes / (1024 * 1024) / max(entry["p50_ms"] / 1000, 1e-9)
+                results.append(entry)
+                if progress is not None:
+                    progress(entry)
+    return {
+        "schema_version": 1,
+        "metadata": {
+            "jsonify_version": __version__,
+            "commit": _git_commit(),
+            "backend": get_backend_name(),
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "seed": seed,
+            "repeat": repeat,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        },
+        "results": results,
+    }
+
+def format_result(entry: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None) -> str:
+    """One line of the human-readable report"""
+    line = (f"{entry['corpus']:<13} {format_file_size(entry['input_bytes']):>9} {entry['operation']:<15}"
+            f"{entry['p50_ms']:>10.2f} ms  p90 {entry['p90_ms']:>9.2f} ms"
+            f"{entry['throughput_mb_s']:>9.1f} MB/s")
+    if "peak_memory_bytes" in entry:
+        line += f"  peak {format_file_size(entry['peak_memory_bytes']):>9}"
+    if baseline is not None:
+        line += f"  {entry['p50_ms'] / max(baseline['p50_ms'], 1e-9):>5.2f}x"
+    return line
+
+def _result_key(entry: Dict[str, Any]) -> Tuple[str, int, str]:
+    return entry["corpus"], entry["size"], entry["operation"]
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m jsonify.benchmark",
+        description="Benchmark parsing, formatting, minifying, analysis and schema extraction."
+    )
+    parser.add_argument("--sizes", default=DEFAULT_SIZES,
+                        help=f"Comma-separated corpus sizes (default: {DEFAULT_SIZES})")
+    parser.add_argument("--corpus", action="append", choices=list(CORPORA),
+                        help="Corpus to run; repeat for several (default: all)")
+    parser.add_argument("--operation", action="append", choices=list(OPERATIONS),
+                        help="Operation to run; repeat for several (default: all)")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per measurement (default: 5)")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the traced peak-memory run")
+    parser.add_argument("--backend", help="Pin the serializer backend (default: fastest available)")
+    parser.add_argument("--seed", type=int, default=SEED, help="Corpus generator seed")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Earlier results file to compare median latencies against")
+    return parser
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.backend:
+        set_backend(args.backend)
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = {_result_key(entry): entry for entry in json.load(f)["results"]}
+
+    report = run_benchmarks(
+        [parse_size(size) for size in args.sizes.split(",")],
+        corpora=args.corpus, operations=args.operation, repeat=args.repeat,
+        memory=not args.no_memory, seed=args.seed,
+        progress=lambda entry: print(format_result(entry, baseline.get(_result_key(entry))), flush=True)
+    )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"📄 Results written to {args.output}", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,274 @@
+"""Column-oriented storage of the JSON Object Builder's key/type/value rows.
+
+Keys, types and values live in parallel lists instead of one dict per row, so
+tens of thousands of rows stay cheap to hold, search and page through. Table
+editors hand back batched diffs (edited, added and deleted rows of the page
+they showed), which ``PairStore.apply_table_edits`` applies in one go. Parsed
+values are kept between reruns, so the cost of a rerun follows what changed.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from .backend import dumps, loads
+from .core import to_builder_entry
+
+def value_to_text(value_type: str, value: Any) -> str:
+    """Text shown for a builder value in the table editor"""
+    if value_type == "null" or value is None:
+        return ""
+    elif value_type == "boolean" and isinstance(value, bool):
+        return "true" if value else "false"
+    elif value_type == "number" and isinstance(value, (int, float)):
+        return repr(value)
+    elif isinstance(value, (list, dict)):
+        return dumps(value, ensure_ascii=False)
+    return str(value)
+
+def text_to_value(value_type: str, text: str) -> Any:
+    """Editable builder value for text typed into the table editor; invalid text is kept as is"""
+    text = text or ""
+    if value_type == "number":
+        try:
+            number = loads(text)
+        except ValueError:
+            return text
+        return number if isinstance(number, (int, float)) and not isinstance(number, bool) else text
+    elif value_type == "boolean":
+        lowered = text.strip().lower()
+        return {"true": True, "false": False}.get(lowered, text)
+    elif value_type == "null":
+        return None
+    return text
+
+def parse_value(value_type: str, value: Any) -> Tuple[Any, Optional[str]]:
+    """Turn an editable builder value into its JSON value, or return an error message"""
+    if value_type == "string":
+        return ("" if value is None else str(value)), None
+    elif value_type == "number":
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return value, None
+        return value, "Value must be a number"
+    elif value_type == "boolean":
+        if isinstance(value, bool):
+            return value, None
+        return value, "Value must be true or false"
+    elif value_type == "null":
+        return None, None
+
+    container, label = (list, "array") if value_type == "array" else (dict, "object")
+    if isinstance(value, container):
+        return value, None
+    text = "" if value is None else str(value)
+    if not text.strip():
+        return container(), None
+    try:
+        parsed = loads(text)
+    except ValueError as e:
+        return text, f"Invalid JSON {label}: {str(e)}"
+    if not isinstance(parsed, container):
+        return text, f"Value must be a JSON {label}"
+    return parsed, None
+
+_UNPARSED = object()
+
+class PairStore:
+    """Builder rows held as parallel columns of ids, keys, types and values.
+
+    Values are kept in their editable form (the text typed for arrays and
+    objects, the parsed container after an import) next to their parsed JSON
+    value, an error message and a lazily serialized text. Only rows that were
+    edited are parsed again, and build() patches a shallow copy of the previous
+    output object when no key or row was added, removed or renamed.
+    """
+
+    def __init__(self):
+        self.ids: List[int] = []
+        self.keys: List[str] = []
+        self.types: List[str] = []
+        self.values: List[Any] = []
+        self.parsed: List[Any] = []
+        self.errors: List[Optional[str]] = []
+        self.texts: List[Optional[str]] = []
+        self.next_id = 0
+        self.version = 0
+        # State of the last build(), reused while only values change
+        self._built: Optional[Tuple[Dict[str, Any], List[Tuple[int, str]]]] = None
+        self._restructured = True
+        self._changed: Set[int] = set()
+        self._positions: Dict[int, int] = {}
+        self._winners: Dict[str, int] = {}
+        self._error_ids: Dict[int, str] = {}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _columns(self) -> List[List[Any]]:
+        return [self.ids, self.keys, self.types, self.values, self.parsed, self.errors, self.texts]
+
+    def append(self, key: str = "", value_type: str = "string", value: Any = "",
+               parsed: Any = _UNPARSED) -> int:
+        """Add a row and return its id; parsed may be given when value is known to be valid"""
+        row_id = self.next_id
+        self.next_id += 1
+        for column, item in zip(self._columns(), [row_id, key, value_type, value, parsed, None, None]):
+            column.append(item)
+        self.version += 1
+        self._restructured = True
+        return row_id
+
+    def load_object(self, obj: Dict[str, Any]):
+        """Replace every row with the members of obj, keeping the parsed values"""
+        self.clear()
+        for key, value in obj.items():
+            value_type, editable = to_builder_entry(value)
+            if value_type in ("array", "object"):
+                # Serialized lazily, only if the row is ever shown or searched
+                editable = value
+            self.append(key, value_type, editable, parsed=value)
+
+    def clear(self):
+        # Ids keep counting up so widgets keyed by id never see stale state
+        for column in self._columns():
+            column.clear()
+        self.version += 1
+        self._restructured = True
+
+    def position(self, row_id: int) -> int:
+        return self.ids.index(row_id)
+
+    def text(self, position: int) -> str:
+        """Editable text of a row's value, serialized once and cached"""
+        if self.texts[position] is None:
+            self.texts[position] = value_to_text(self.types[position], self.values[position])
+        return self.texts[position]
+
+    def set(self, position: int, key: str, value_type: str, value: Any):
+        """Update a row; the value is only marked for re-validation if it changed"""
+        if key != self.keys[position]:
+            self.keys[position] = key
+            self.version += 1
+            self._restructured = True
+        if value_type == self.types[position] and self._same_value(position, value):
+            return
+        self.types[position] = value_type
+        self.values[position] = value
+        self.parsed[position] = _UNPARSED
+        self.texts[position] = None
+        self.version += 1
+        self._changed.add(self.ids[position])
+
+    def _same_value(self, position: int, value: Any) -> bool:
+        current = self.values[position]
+        if isinstance(value, str) and isinstance(current, (list, dict)):
+            return value == self.text(position)
+        return type(value) is type(current) and value == current
+
+    def validate(self, position: int) -> Tuple[Any, Optional[str]]:
+        """Parsed value and error of a row, parsing it only if it changed since last time"""
+        if self.parsed[position] is _UNPARSED:
+            parsed, error = parse_value(self.types[position], self.values[position])
+            self.parsed[position] = parsed
+            self.errors[position] = error
+        return self.parsed[position], self.errors[position]
+
+    def remove(self, positions: Iterable[int]):
+        """Delete the rows at the given positions in one pass"""
+        doomed = set(positions)
+        if not doomed:
+            return
+        keep = [i for i in range(len(self.ids)) if i not in doomed]
+        for column in self._columns():
+            column[:] = [column[i] for i in keep]
+        self.version += 1
+        self._restructured = True
+
+    def search(self, query: str) -> List[int]:
+        """Positions of rows whose key or value text contains query, ignoring case"""
+        query = query.strip().lower()
+        if not query:
+            return list(range(len(self.ids)))
+        return [
+            i for i, key in enumerate(self.keys)
+            if query in key.lower() or query in self.text(i).lower()
+        ]
+
+    def table_rows(self, positions: List[int]) -> Dict[str, List[str]]:
+        """Columns of the rows at positions in the table editor's format"""
+        return {
+            "key": [self.keys[i] for i in positions],
+            "type": [self.types[i] for i in positions],
+            "value": [self.text(i) for i in positions],
+        }
+
+    def apply_table_edits(self, positions: List[int], edits: Dict[str, Any]):
+        """Apply a table editor diff made against the rows at positions.
+
+        edits has the st.data_editor layout: 'edited_rows' maps a page row to
+        the changed columns, 'added_rows' lists new rows and 'deleted_rows'
+        lists page rows to remove.
+        """
+        for page_row, changes in edits.get("edited_rows", {}).items():
+            position = positions[int(page_row)]
+            value_type = changes.get("type") or self.types[position]
+            text = changes["value"] if "value" in changes else self.text(position)
+            key = (changes["key"] or "") if "key" in changes else self.keys[position]
+            self.set(position, key, value_type, text_to_value(value_type, text))
+
+        for added in edits.get("added_rows", []):
+            value_type = added.get("type") or "string"
+            self.append(added.get("key") or "", value_type, text_to_value(value_type, added.get("value")))
+
+        self.remove(positions[int(page_row)] for page_row in edits.get("deleted_rows", []))
+
+    def build(self) -> Tuple[Dict[str, Any], List[Tuple[int, str]]]:
+        """Assemble the output object from rows with a key and a valid value.
+
+        Returns the object and the (position, message) errors of invalid rows.
+        Objects returned earlier are never modified by later builds; the values
+        in them are shared with the rows and must be treated as read-only.
+        """
+        if self._built is None or self._restructured:
+            return self._assemble()
+        if not self._changed:
+            return self._built
+
+        # A new top-level object, so outputs kept from earlier builds stay as they were
+        obj = dict(self._built[0])
+        for row_id in self._changed:
+            position = self._positions[row_id]
+            was_valid = row_id not in self._error_ids
+            parsed, error = self.validate(position)
+            if (error is None) != was_valid:
+                # A row entering or leaving the output can change key order and duplicates
+                return self._assemble()
+            if error:
+                self._error_ids[row_id] = error
+                continue
+            key = self.keys[position].strip()
+            if key and self._winners.get(key) == row_id:
+                obj[key] = parsed
+        self._changed.clear()
+        errors = sorted((self._positions[row_id], message) for row_id, message in self._error_ids.items())
+        self._built = (obj, errors)
+        return self._built
+
+    def _assemble(self) -> Tuple[Dict[str, Any], List[Tuple[int, str]]]:
+        obj: Dict[str, Any] = {}
+        errors: List[Tuple[int, str]] = []
+        self._positions = {row_id: i for i, row_id in enumerate(self.ids)}
+        self._winners = {}
+        self._error_ids = {}
+        for i, row_id in enumerate(self.ids):
+            parsed, error = self.validate(i)
+            if error:
+                errors.append((i, error))
+                self._error_ids[row_id] = error
+                continue
+            key = self.keys[i].strip()
+            if key:
+                obj[key] = parsed
+                # The last row with a key wins, as in a dict literal
+                self._winners[key] = row_id
+        self._built = (obj, errors)
+        self._restructured = False
+        self._changed.clear()
+        return self._built
@@ -0,0 +1,135 @@
+"""Content-hash keyed cache of parsed JSON documents"""
+import hashlib
+import json
+import mmap
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Union
+
+from .backend import loads
+
+# Rough ratio between the memory of a parsed tree and the size of its source text
+TREE_SIZE_FACTOR = 4
+
+class NestingError(json.JSONDecodeError):
+    """A document nested more deeply than the parser can follow, reported like any other parse error"""
+
+    def __init__(self):
+        ValueError.__init__(self, "Document is nested too deeply to parse")
+        self.msg = self.args[0]
+        self.doc = ""
+        self.pos = 0
+        self.lineno = 1
+        self.colno = 1
+
+    def __reduce__(self):
+        return self.__class__, ()
+
+class ParsedDocument:
+    """A parsed JSON document: the value or the parse error, plus derived values.
+
+    The parsed value is shared between every caller that parses the same text,
+    and derived values are computed from it, so it must be treated as read-only.
+    """
+
+    def __init__(self, digest: str, size: int, value: Any = None,
+                 error: Optional[json.JSONDecodeError] = None):
+        self.digest = digest
+        self.size = size
+        self.value = value
+        self.error = error
+        self.derived: Dict[Hashable, Any] = {}
+        self.derived_size = 0
+
+    @property
+    def is_valid(self) -> bool:
+        return self.error is None
+
+    @property
+    def weight(self) -> int:
+        """Approximate memory held by this entry, in bytes"""
+        return self.size * TREE_SIZE_FACTOR + self.derived_size
+
+    def get_value(self) -> Any:
+        """Return the shared, read-only parsed value, re-raising the parse error if there was one"""
+        if self.error is not None:
+            raise self.error.with_traceback(None)
+        return self.value
+
+    def derive(self, key: Hashable, compute: Callable[[Any], Any]) -> Any:
+        """Compute a value from the parsed document once and memoize it under key"""
+        if key not in self.derived:
+            result = compute(self.get_value())
+            self.derived[key] = result
+            if isinstance(result, str):
+                self.derived_size += len(result)
+            else:
+                self.derived_size += getattr(result, 'nbytes', 0)
+        return self.derived[key]
+
+def document_hash(text: Union[str, bytes, memoryview, mmap.mmap]) -> str:
+    """Return the content hash used to key parsed documents.
+
+    Bytes are hashed as they are, so UTF-8 bytes and their decoded text share a key.
+    """
+    data = text.encode('utf-8', 'surrogatepass') if isinstance(text, str) else text
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+class ParseCache:
+    """Bounded LRU cache of parsed documents keyed by a hash of the source text"""
+
+    def __init__(self, max_entries: int = 32, max_bytes: int = 512 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, ParsedDocument]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def parse(self, text: Union[str, bytes, memoryview, mmap.mmap]) -> ParsedDocument:
+        """Parse text or a bytes-like buffer, reusing the cached document if it was seen before.
+
+        The document's value is shared with every other caller and must not be modified.
+        """
+        digest = document_hash(text)
+        with self._lock:
+            doc = self._entries.get(digest)
+            if doc is not None:
+                self._entries.move_to_end(digest)
+                return doc
+
+        try:
+            doc = ParsedDocument(digest, len(text), value=loads(text))
+        except json.JSONDecodeError as e:
+            doc = ParsedDocument(digest, len(text), error=e)
+        except RecursionError:
+            doc = ParsedDocument(digest, len(text), error=NestingError())
+
+        if doc.weight <= self.max_bytes:
+            with self._lock:
+                self._entries[digest] = doc
+                self._entries.move_to_end(digest)
+                self._evict()
+        return doc
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _evict(self):
+        """Drop least recently used entries until both limits are respected"""
+        total = sum(doc.weight for doc in self._entries.values())
+        while self._entries and (len(self._entries) > self.max_entries or total > self.max_bytes):
+            _, dropped = self._entries.popitem(last=False)
+            total -= dropped.weight
+
+_default_cache = ParseCache()
+
+def get_parse_cache() -> ParseCache:
+    """Return the process-wide parse cache"""
+    return _default_cache
+
+def parse_json_cached(json_str: Union[str, bytes, memoryview, mmap.mmap]) -> ParsedDocument:
+    """Parse JSON text through the process-wide parse cache; the parsed value is shared and read-only"""
+    return _default_cache.parse(json_str)
@@ -0,0 +1,284 @@
+"""Command-line batch processing: format, minify or validate many JSON files at once.
+
+Usage::
+
+    python -m jsonify format  data/ --indent 2 --sort-keys --in-place
+    python -m jsonify minify  'exports/**/*.json' --output-dir build/min
+    python -m jsonify validate data/ --jobs 64 --state .jsonify-state.json
+    python -m jsonify validate payloads/ --schema tool-call.schema.json
+
+Files are processed across a process pool. With ``--state`` a manifest of file
+mtimes, sizes and content hashes is kept so unchanged files are skipped on the
+next run without being read. With ``--schema`` every document is also checked
+against a JSON Schema, compiled once per worker process.
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .backend import loads
+from .core import format_file_size, format_json, minify_json
+from .validation import SchemaError, compile_schema, get_validator
+
+COMMANDS = ["format", "minify", "validate"]
+
+# Schema violations listed per failed file
+MAX_REPORTED_VIOLATIONS = 5
+
+# (source, destination or None, previous content hash or None)
+Task = Tuple[str, Optional[str], Optional[str]]
+
+def content_hash(data: bytes) -> str:
+    """Hash used by the state manifest to recognise unchanged file contents"""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+def glob_base(pattern: str) -> str:
+    """Leading directory of a glob pattern that holds no wildcards"""
+    base = os.path.dirname(pattern)
+    while base and glob.has_magic(base):
+        base = os.path.dirname(base)
+    return base or os.curdir
+
+def iter_input_files(paths: List[str], pattern: str = "*.json") -> Iterator[Tuple[str, str]]:
+    """Expand files, directories and glob patterns into (path, relative output path) pairs.
+
+    Output paths keep the layout below a directory or below the part of a
+    glob pattern before its first wildcard, so 'ex/**/*.json' writes
+    ex/a/x.json to a/x.json.
+    """
+    seen = set()
+    for path in paths:
+        if os.path.isdir(path):
+            matches = [(p, os.path.relpath(p, path))
+                       for p in glob.glob(os.path.join(path, "**", pattern), recursive=True)]
+        elif os.path.isfile(path):
+            matches = [(path, os.path.basename(path))]
+        else:
+            base = glob_base(path)
+            matches = [(p, os.path.relpath(p, base)) for p in glob.glob(path, recursive=True)]
+        for match, rel in sorted(matches):
+            key = os.path.abspath(match)
+            if key not in seen and os.path.isfile(match):
+                seen.add(key)
+                yield match, rel
+
+def render(command: str, obj: Any, options: Dict[str, Any]) -> str:
+    """Produce the output text for a parsed document"""
+    if command == "minify":
+        return minify_json(obj, ensure_ascii=options["ensure_ascii"])
+    return format_json(obj, indent=options["indent"], sort_keys=options["sort_keys"],
+                       ensure_ascii=options["ensure_ascii"])
+
+def write_atomic(path: str, text: str):
+    """Write text to path through a temporary file so readers never see a partial file"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8", newline="\n") as f:
+        f.write(text)
+        f.write("\n")
+    os.replace(tmp_path, path)
+
+def process_file(command: str, options: Dict[str, Any], task: Task) -> Dict[str, Any]:
+    """Process one file; runs inside a worker process and never raises"""
+    src, dst, previous_hash = task
+    result = {"path": src, "status": "ok", "bytes": 0, "error": None, "hash": None, "stat": None}
+    try:
+        with open(src, "rb") as f:
+            data = f.read()
+        result["bytes"] = len(data)
+        digest = content_hash(data)
+        if previous_hash == digest and (dst is None or os.path.exists(dst)):
+            result["status"] = "skipped"
+            result["hash"] = digest
+            result["stat"] = _stat_key(src)
+            return result
+
+        obj = loads(data)
+        if options.get("schema") is not None:
+            violations = get_validator(options["schema"]).validate(obj)
+            if violations:
+                shown = "; ".join(f"{v['path']}: {v['message']}" for v in violations[:MAX_REPORTED_VIOLATIONS])
+                more = len(violations) - MAX_REPORTED_VIOLATIONS
+                raise ValueError(f"{len(violations)} schema violation(s): {shown}"
+                                 + (f"; … {more} more" if more > 0 else ""))
+        if command != "validate":
+            text = render(command, obj, options)
+            write_atomic(dst, text)
+            if dst == src:
+                digest = content_hash((text + "\n").encode("utf-8"))
+        result["hash"] = digest
+        result["stat"] = _stat_key(src)
+    except (OSError, UnicodeDecodeError, ValueError) as e:
+        result["status"] = "failed"
+        result["error"] = str(e)
+    except RecursionError:
+        result["status"] = "failed"
+        result["error"] = "Document is nested too deeply to process"
+    except MemoryError:
+        result["status"] = "failed"
+        result["error"] = "Not enough memory to process the document"
+    return result
+
+def _process_chunk(args: Tuple[str, Dict[str, Any], List[Task]]) -> List[Dict[str, Any]]:
+    command, options, tasks = args
+    return [process_file(command, options, task) for task in tasks]
+
+def _stat_key(path: str) -> List[int]:
+    st = os.stat(path)
+    return [st.st_mtime_ns, st.st_size]
+
+def load_state(path: Optional[str]) -> Dict[str, Any]:
+    """Load the skip manifest, starting fresh if it is missing or unreadable"""
+    if not path or not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_state(path: Optional[str], state: Dict[str, Any]):
+    if path:
+        write_atomic(path, json.dumps(state, separators=(',', ':')))
+
+def run_batch(command: str, paths: List[str], options: Dict[str, Any],
+              output_dir: Optional[str] = None, in_place: bool = False,
+              jobs: Optional[int] = None, pattern: str = "*.json",
+              state_path: Optional[str] = None) -> Dict[str, Any]:
+    """Process every matching file and return a summary of the run.
+
+    Raises ValueError, before any file is written, when two inputs would be
+    written to the same output path.
+    """
+    started = time.perf_counter()
+    state = load_state(state_path)
+    options_key = json.dumps([command, options, output_dir, in_place], sort_keys=True)
+
+    tasks: List[Task] = []
+    skipped = 0
+    # Source of every output path, to refuse runs where one output would overwrite another
+    sources: Dict[str, str] = {}
+    for src, rel in iter_input_files(paths, pattern):
+        if command == "validate":
+            dst = None
+        elif in_place:
+            dst = src
+        else:
+            dst = os.path.join(output_dir, rel)
+            other = sources.setdefault(os.path.abspath(dst), src)
+            if other != src:
+                raise ValueError(f"{other} and {src} would both be written to {dst}")
+
+        entry = state.get(os.path.abspath(src))
+        previous_hash = None
+        if entry and entry["options"] == options_key:
+            if entry["stat"] == _stat_key(src) and (dst is None or os.path.exists(dst)):
+                skipped += 1
+                continue
+            previous_hash = entry["hash"]
+        tasks.append((src, dst, previous_hash))
+
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 or len(tasks) <= 1:
+        results = _process_chunk((command, options, tasks))
+    else:
+        # Several chunks per worker keeps every core busy while amortising IPC overhead
+        chunk_size = max(1, min(256, len(tasks) // (jobs * 4)))
+        chunks = [(command, options, tasks[i:i + chunk_size])
+                  for i in range(0, len(tasks), chunk_size)]
+        results = []
+        with ProcessPoolExecutor(max_workers=min(jobs, len(chunks))) as pool:
+            for chunk_results in pool.map(_process_chunk, chunks):
+                results.extend(chunk_results)
+
+    failures = []
+    processed = 0
+    total_bytes = 0
+    for result in results:
+        total_bytes += result["bytes"]
+        if result["status"] == "failed":
+            failures.append((result["path"], result["error"]))
+            state.pop(os.path.abspath(result["path"]), None)
+            continue
+        if result["status"] == "skipped":
+            skipped += 1
+        else:
+            processed += 1
+        state[os.path.abspath(result["path"])] = {
+            "stat": result["stat"], "hash": result["hash"], "options": options_key
+        }
+    save_state(state_path, state)
+
+    elapsed = time.perf_counter() - started
+    return {
+        "processed": processed,
+        "skipped": skipped,
+        "failed": len(failures),
+        "failures": failures,
+        "bytes": total_bytes,
+        "elapsed": elapsed,
+    }
+
+def format_summary(summary: Dict[str, Any]) -> str:
+    """Render the throughput and failure summary printed at the end of a run"""
+    elapsed = max(summary["elapsed"], 1e-9)
+    handled = summary["processed"] + summary["failed"]
+    lines = [f"❌ {path}: {error}" for path, error in summary["failures"]]
+    lines.append(
+        f"{summary['processed']} processed, {summary['skipped']} skipped, "
+        f"{summary['failed']} failed in {summary['elapsed']:.2f}s "
+        f"({handled / elapsed:.0f} files/s, {format_file_size(int(summary['bytes'] / elapsed))}/s)"
+    )
+    return "\n".join(lines)
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="jsonify",
+        description="Format, minify or validate JSON files in parallel."
+    )
+    parser.add_argument("command", choices=COMMANDS)
+    parser.add_argument("paths", nargs="+", help="Files, directories or glob patterns")
+    parser.add_argument("--pattern", default="*.json",
+                        help="File name pattern used when walking directories (default: *.json)")
+    parser.add_argument("--indent", type=int, default=2, help="Indentation for format (default: 2)")
+    parser.add_argument("--sort-keys", action="store_true", help="Sort object keys")
+    parser.add_argument("--ascii", action="store_true", help="Escape non-ASCII characters")
+    destination = parser.add_mutually_exclusive_group()
+    destination.add_argument("--in-place", action="store_true", help="Overwrite the input files")
+    destination.add_argument("--output-dir", help="Write outputs under this directory")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="Worker processes (default: number of CPUs)")
+    parser.add_argument("--state", help="Manifest file used to skip unchanged files between runs")
+    parser.add_argument("--schema", help="JSON Schema file every document must satisfy")
+    return parser
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command != "validate" and not (args.in_place or args.output_dir):
+        parser.error(f"{args.command} needs --in-place or --output-dir")
+
+    options = {"indent": args.indent, "sort_keys": args.sort_keys, "ensure_ascii": args.ascii}
+    if args.schema:
+        try:
+            with open(args.schema, "r", encoding="utf-8") as f:
+                options["schema"] = compile_schema(f.read()).schema
+        except (OSError, SchemaError) as e:
+            parser.error(f"cannot use schema {args.schema}: {e}")
+    try:
+        summary = run_batch(
+            args.command, args.paths, options,
+            output_dir=args.output_dir, in_place=args.in_place,
+            jobs=args.jobs, pattern=args.pattern, state_path=args.state
+        )
+    except ValueError as e:
+        parser.error(str(e))
+    print(format_summary(summary))
+    return 1 if summary["failed"] else 0
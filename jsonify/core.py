@@ -0,0 +1,58 @@
+"""Parsing, validation and formatting helpers shared by every JSONify front end"""
+import copy
+from typing import Any, Optional, Tuple
+
+from .backend import dumps
+from .cache import parse_json_cached
+
+# Value types offered by the JSON Object Builder
+VALUE_TYPES = ["string", "number", "boolean", "null", "array", "object"]
+
+def validate_json_string(json_str: str) -> Tuple[bool, str]:
+    """Validate JSON string and return status with message"""
+    doc = parse_json_cached(json_str)
+    if doc.is_valid:
+        return True, "Valid JSON"
+    return False, f"Invalid JSON: {str(doc.error)}"
+
+def safe_json_parse(value_str: str, default_value: Any = None):
+    """Safely parse JSON string with fallback; the result is the caller's own copy"""
+    if not value_str.strip():
+        return default_value
+    doc = parse_json_cached(value_str)
+    return copy.deepcopy(doc.value) if doc.is_valid else value_str
+
+def format_file_size(size_bytes: int) -> str:
+    """Format file size in human readable format"""
+    if size_bytes < 1024:
+        return f"{size_bytes} B"
+    elif size_bytes < 1024 * 1024:
+        return f"{size_bytes / 1024:.1f} KB"
+    else:
+        return f"{size_bytes / (1024 * 1024):.1f} MB"
+
+def format_json(obj: Any, indent: Optional[int] = 2, sort_keys: bool = False,
+                ensure_ascii: bool = False, compact: bool = False) -> str:
+    """Pretty-print a parsed value with the JSON Formatter options"""
+    if compact:
+        return dumps(obj, indent=indent, sort_keys=sort_keys,
+                     ensure_ascii=ensure_ascii, separators=(',', ': '))
+    return dumps(obj, indent=indent, sort_keys=sort_keys, ensure_ascii=ensure_ascii)
+
+def minify_json(obj: Any, ensure_ascii: bool = False) -> str:
+    """Serialize a parsed value without any insignificant whitespace"""
+    return dumps(obj, separators=(',', ':'), ensure_ascii=ensure_ascii)
+
+def to_builder_entry(value: Any) -> Tuple[str, Any]:
+    """Infer the builder type of a JSON value and return it with its editable form"""
+    if isinstance(value, bool):
+        return "boolean", value
+    elif isinstance(value, (int, float)):
+        return "number", value
+    elif isinstance(value, list):
+        return "array", dumps(value)
+    elif isinstance(value, dict):
+        return "object", dumps(value)
+    elif value is None:
+        return "null", ""
+    return "string", value
@@ -0,0 +1,77 @@
+"""Encoded output buffers for downloads, cached per output text.
+
+Outputs too large for the clipboard are offered as downloads instead of being
+embedded in the page. Encoding a multi-megabyte string to UTF-8 (and gzip, when
+asked for) on every rerun would cost as much as the copy it replaces, so each
+output is encoded once and the bytes are kept in a bounded LRU cache.
+
+Entries are keyed by the identity of the text and hold a reference to it, so
+a key cannot be reused by another string while its entry is alive. Outputs
+memoized on a ``ParsedDocument`` are the same object across reruns and hit
+the cache without being hashed.
+"""
+import gzip
+import threading
+from collections import OrderedDict
+from typing import Tuple
+
+# Fast levels compress JSON nearly as well as the default at a fraction of the time
+GZIP_LEVEL = 5
+
+def encode_text(text: str, compress: bool = False) -> bytes:
+    """UTF-8 bytes of text, gzip-compressed (with a fixed timestamp) when compress is set"""
+    data = text.encode('utf-8', 'surrogatepass')
+    if compress:
+        data = gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+    return data
+
+class OutputCache:
+    """Bounded LRU cache of encoded outputs keyed by the text object and compression"""
+
+    def __init__(self, max_entries: int = 16, max_bytes: int = 256 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple[int, bool], Tuple[str, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def encode(self, text: str, compress: bool = False) -> bytes:
+        """Encoded bytes of text, reusing the buffer from an earlier call with the same string"""
+        key = (id(text), compress)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] is text:
+                self._entries.move_to_end(key)
+                return entry[1]
+
+        data = encode_text(text, compress)
+        if len(text) + len(data) <= self.max_bytes:
+            with self._lock:
+                self._entries[key] = (text, data)
+                self._entries.move_to_end(key)
+                self._evict()
+        return data
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _evict(self):
+        """Drop least recently used entries until both limits are respected"""
+        # The cached text is counted too, since the entry keeps it alive
+        total = sum(len(text) + len(data) for text, data in self._entries.values())
+        while self._entries and (len(self._entries) > self.max_entries or total > self.max_bytes):
+            _, (text, data) = self._entries.popitem(last=False)
+            total -= len(text) + len(data)
+
+_default_cache = OutputCache()
+
+def get_output_cache() -> OutputCache:
+    """Return the process-wide output cache"""
+    return _default_cache
+
+def encode_output(text: str, compress: bool = False) -> bytes:
+    """Encode an output for download through the process-wide output cache"""
+    return _default_cache.encode(text, compress)
@@ -0,0 +1,257 @@
+"""Structural diff of two JSON documents as a JSON Patch.
+
+The walk goes top-down and stops at subtrees that are the same on both
+sides, so its cost follows the size of the changes rather than the size of
+the documents. Sameness is settled without a Python-level walk: shared
+references (as between versions of a ``DocumentEditor`` document) in O(1),
+otherwise by C-speed ``==``, confirmed by one serialization of all the equal
+children of a container together, since ``==`` takes 1 for true.
+
+Arrays are aligned before they are diffed. With ``array_key``, arrays of
+objects that all carry that key with distinct scalar values are matched by
+it, so reordered elements become ``move`` operations. Other arrays are
+matched by fingerprints of their elements through ``difflib``; elements
+left unmatched between two matching runs are paired by position and diffed
+further, the rest are added or removed.
+
+The patch applies in order with ``apply_patch``: operations on an array
+remove, then move, then add elements, and changes inside elements use the
+indexes they have in the new document.
+"""
+import difflib
+import time
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Tuple
+
+from .backend import dumps
+from .patch import _json_equal, format_pointer
+from .viewer import PathPart
+
+OPERATIONS = ["add", "remove", "replace", "move"]
+
+# Arrays this long or shorter are aligned by difflib without trimming equal ends first
+_SHORT_ARRAY = 16
+
+def _compact(value: Any) -> str:
+    return dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+def _same(a: List[Any], b: List[Any]) -> bool:
+    """Whether two equally long lists of values hold the same JSON, assuming a == b element-wise"""
+    # == cannot tell true from 1; the serializations can, in one call for all values
+    return _compact(a) == _compact(b)
+
+def _fingerprint(value: Any) -> Any:
+    """Hashable stand-in for a value; equal fingerprints mean equal JSON"""
+    if isinstance(value, (dict, list)):
+        # repr runs at C speed and, unlike ==, tells true from 1
+        return repr(value)
+    return (value.__class__ is bool, value)
+
+def _key_positions(items: List[Any], key: str) -> Optional[Dict[Any, int]]:
+    """Element index by the value of key, or None when some element lacks it or shares it"""
+    positions: Dict[Any, int] = {}
+    for index, item in enumerate(items):
+        if not isinstance(item, dict) or key not in item:
+            return None
+        value = item[key]
+        if isinstance(value, (dict, list)):
+            return None
+        positions[(value.__class__ is bool, value)] = index
+    return positions if len(positions) == len(items) else None
+
+def _align_by_key(a: List[Any], b: List[Any], key: str) -> Optional[Tuple[List[int], List[int], List[Tuple[int, int]]]]:
+    """Removed old indexes, added new indexes and (old, new) pairs of the elements with the same key value"""
+    old = _key_positions(a, key)
+    new = _key_positions(b, key) if old is not None else None
+    if new is None:
+        return None
+    removed = sorted(i for value, i in old.items() if value not in new)
+    added = sorted(j for value, j in new.items() if value not in old)
+    pairs = sorted((i, new[value]) for value, i in old.items() if value in new)
+    return removed, added, pairs
+
+def _align_by_content(a: List[Any], b: List[Any]) -> Tuple[List[int], List[int], List[Tuple[int, int]], int]:
+    """Removed old indexes, added new indexes, changed elements paired by position, and the number of equal ones"""
+    # Equal ends are common and cheap to find: == first, the serializations only confirm
+    start, end_a, end_b = 0, len(a), len(b)
+    if min(end_a, end_b) > _SHORT_ARRAY:
+        limit = min(end_a, end_b)
+        while start < limit and a[start] == b[start]:
+            start += 1
+        while end_a > start and end_b > start and a[end_a - 1] == b[end_b - 1]:
+            end_a -= 1
+            end_b -= 1
+        if not _same(a[:start], b[:start]):
+            start = 0
+        if not _same(a[end_a:], b[end_b:]):
+            end_a, end_b = len(a), len(b)
+
+    removed: List[int] = []
+    added: List[int] = []
+    changed: List[Tuple[int, int]] = []
+    equal = start + len(a) - end_a
+    matcher = difflib.SequenceMatcher(None, [_fingerprint(x) for x in a[start:end_a]],
+                                      [_fingerprint(x) for x in b[start:end_b]], autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        i1, i2, j1, j2 = i1 + start, i2 + start, j1 + start, j2 + start
+        if tag == "equal":
+            equal += i2 - i1
+            continue
+        # Replaced runs are paired up by position; whatever one side has left over is removed or added
+        paired = min(i2 - i1, j2 - j1)
+        changed.extend(zip(range(i1, i1 + paired), range(j1, j1 + paired)))
+        removed.extend(range(i1 + paired, i2))
+        added.extend(range(j1 + paired, j2))
+    return removed, added, changed, equal
+
+def _changed_pairs(a: Any, b: Any, pairs: List[Tuple[Any, Any]]) -> List[Tuple[Any, Any]]:
+    """The (old key or index, new key or index) pairs whose values differ, in the given order"""
+    changed = []
+    equal = []
+    for old_key, new_key in pairs:
+        x, y = a[old_key], b[new_key]
+        if x is not y:
+            (equal if x == y else changed).append((old_key, new_key))
+    if equal and not _same([a[i] for i, _ in equal], [b[j] for _, j in equal]):
+        return [(i, j) for i, j in pairs if a[i] is not b[j]]
+    return changed
+
+def _longest_increasing(values: List[int]) -> List[int]:
+    """One longest strictly increasing subsequence of values"""
+    tails: List[int] = []
+    tail_positions: List[int] = []
+    previous = [-1] * len(values)
+    for position, value in enumerate(values):
+        slot = bisect_left(tails, value)
+        if slot:
+            previous[position] = tail_positions[slot - 1]
+        if slot == len(tails):
+            tails.append(value)
+            tail_positions.append(position)
+        else:
+            tails[slot] = value
+            tail_positions[slot] = position
+    result = []
+    position = tail_positions[-1] if tail_positions else -1
+    while position >= 0:
+        result.append(values[position])
+        position = previous[position]
+    result.reverse()
+    return result
+
+def _move_operations(path: List[PathPart], order: List[int]) -> List[Dict[str, Any]]:
+    """Moves that sort order, the new indexes of the kept elements in their old order"""
+    # Elements on a longest increasing run stay; every other one moves once, in new-index order,
+    # to just after the staying element that precedes it in the new array
+    staying = _longest_increasing(order)
+    if len(staying) == len(order):
+        return []
+    moving = sorted(set(order) - set(staying))
+    gap_sizes = [0] * (len(staying) + 1)
+    for target in moving:
+        gap_sizes[bisect_left(staying, target)] += 1
+
+    # Lay out a slot per element in old order, with room for the moved ones after each staying
+    # element (gap 0 is before the first); positions are then counts of occupied slots before a slot
+    rank = {target: slot + 1 for slot, target in enumerate(staying)}
+    element_slot = {}
+    gap_slot = [0] * (len(staying) + 1)
+    size = gap_sizes[0]
+    for target in order:
+        element_slot[target] = size
+        size += 1
+        if target in rank:
+            gap_slot[rank[target]] = size
+            size += gap_sizes[rank[target]]
+    # Fenwick tree of occupied slots
+    tree = [0] * (size + 1)
+
+    def occupy(slot: int, delta: int):
+        slot += 1
+        while slot <= size:
+            tree[slot] += delta
+            slot += slot & -slot
+
+    def position(slot: int) -> int:
+        total = 0
+        while slot > 0:
+            total += tree[slot]
+            slot -= slot & -slot
+        return total
+
+    for slot in element_slot.values():
+        occupy(slot, 1)
+    operations = []
+    for target in moving:
+        source = position(element_slot[target])
+        occupy(element_slot[target], -1)
+        gap = bisect_left(staying, target)
+        destination = position(gap_slot[gap])
+        occupy(gap_slot[gap], 1)
+        gap_slot[gap] += 1
+        if source != destination:
+            operations.append({"op": "move", "from": format_pointer(path + [source]),
+                               "path": format_pointer(path + [destination])})
+    return operations
+
+def diff_json(old: Any, new: Any, array_key: Optional[str] = None) -> Dict[str, Any]:
+    """JSON Patch that turns old into new, with operation counts.
+
+    The result has 'patch', the operation list, 'counts' per operation,
+    'unchanged', the number of subtrees found equal without being walked,
+    and 'elapsed' in seconds. Neither document is modified; 'add' and
+    'replace' values are shared with new.
+    """
+    started = time.perf_counter()
+    patch: List[Dict[str, Any]] = []
+    unchanged = 0
+
+    # (old value, new value, path in the new document) still to compare
+    stack: List[Tuple[Any, Any, List[PathPart]]] = [(old, new, [])]
+    while stack:
+        a, b, path = stack.pop()
+        if a is b:
+            unchanged += 1
+            continue
+        if isinstance(a, dict) and isinstance(b, dict):
+            common = []
+            for key in a:
+                if key in b:
+                    common.append(key)
+                else:
+                    patch.append({"op": "remove", "path": format_pointer(path + [key])})
+            for key in b:
+                if key not in a:
+                    patch.append({"op": "add", "path": format_pointer(path + [key]), "value": b[key]})
+            changed = _changed_pairs(a, b, [(key, key) for key in common])
+            unchanged += len(common) - len(changed)
+        elif isinstance(a, list) and isinstance(b, list):
+            aligned = _align_by_key(a, b, array_key) if array_key else None
+            if aligned is not None:
+                removed, added, pairs = aligned
+                moves = _move_operations(path, [j for _, j in pairs])
+                changed = _changed_pairs(a, b, pairs)
+                unchanged += len(pairs) - len(changed)
+            else:
+                removed, added, changed, equal = _align_by_content(a, b)
+                moves = []
+                unchanged += equal
+            patch.extend({"op": "remove", "path": format_pointer(path + [i])} for i in reversed(removed))
+            patch.extend(moves)
+            patch.extend({"op": "add", "path": format_pointer(path + [j]), "value": b[j]} for j in added)
+        else:
+            if not _json_equal(a, b):
+                patch.append({"op": "replace", "path": format_pointer(path), "value": b})
+            continue
+        # Reversed so that children are compared, and their operations listed, in document order
+        stack.extend((a[i], b[j], path + [j]) for i, j in reversed(changed))
+
+    counts = {op: 0 for op in OPERATIONS}
+    for operation in patch:
+        counts[operation["op"]] += 1
+    return {
+        "patch": patch,
+        "counts": counts,
+        "unchanged": unchanged,
+        "elapsed": time.perf_counter() - started,
+    }
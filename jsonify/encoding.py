@@ -0,0 +1,140 @@
+"""Text encoding detection from a bounded sample, for one-pass decoding of uploads.
+
+``detect_encoding`` looks at a byte-order mark first, then at the pattern of
+zero bytes that UTF-16/32 text without a BOM leaves, then checks whether the
+sample is valid UTF-8, and otherwise picks a single-byte codec. Only the
+sample is inspected, so ``decode_bytes`` decodes the whole input once, and
+``iter_decoded`` can pick a codec before decoding a stream chunk by chunk.
+"""
+import codecs
+import mmap
+import re
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+Buffer = Union[bytes, bytearray, memoryview, mmap.mmap]
+
+# Bytes inspected to pick an encoding
+SAMPLE_BYTES = 64 * 1024
+
+# Longest first: the UTF-32 LE mark starts with the UTF-16 LE one. The codecs strip the mark.
+_BOMS = [
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+]
+# Bytes that cp1252 leaves undefined; any of them rules it out
+_CP1252_UNDEFINED = re.compile(rb"[\x81\x8d\x8f\x90\x9d]")
+# C1 control range, where cp1252 puts its typographic quotes and dashes
+_C1_RANGE = re.compile(rb"[\x80-\x9f]")
+# Share of zero bytes at a code unit position that marks ASCII-range UTF-16/32 text
+_ZERO_SHARE = 0.3
+
+def _encoding_info(encoding: str, confidence: float, reason: str, bom: bool = False) -> Dict[str, Any]:
+    return {"encoding": encoding, "confidence": confidence, "reason": reason, "bom": bom}
+
+def _decodes(sample: bytes, encoding: str, complete: bool) -> bool:
+    """Whether sample is valid in encoding, allowing a character cut off at its end"""
+    try:
+        codecs.getincrementaldecoder(encoding)().decode(sample, final=complete)
+    except UnicodeDecodeError:
+        return False
+    return True
+
+def _wide_encoding(sample: bytes, complete: bool) -> Optional[Dict[str, Any]]:
+    """UTF-16 or UTF-32 without a BOM, recognized by the zero high bytes of ASCII-range characters"""
+    if sample.count(0) < len(sample) * _ZERO_SHARE / 2:
+        return None
+    for width, encoding, zero_lanes in [(4, "utf-32-le", (1, 2, 3)), (4, "utf-32-be", (0, 1, 2)),
+                                        (2, "utf-16-le", (1,)), (2, "utf-16-be", (0,))]:
+        units = len(sample) // width
+        if not units:
+            continue
+        shares = [sample[lane::width].count(0) / units for lane in range(width)]
+        if all(shares[lane] >= _ZERO_SHARE for lane in zero_lanes) and all(
+                shares[lane] < _ZERO_SHARE for lane in range(width) if lane not in zero_lanes):
+            if _decodes(sample[:units * width], encoding, complete):
+                share = min(shares[lane] for lane in zero_lanes)
+                return _encoding_info(encoding, round(min(0.95, 0.5 + share / 2), 2), "zero byte pattern")
+    return None
+
+def _single_byte_encoding(data: bytes) -> Dict[str, Any]:
+    if _CP1252_UNDEFINED.search(data):
+        return _encoding_info("latin-1", 0.4, "bytes undefined in cp1252")
+    if _C1_RANGE.search(data):
+        # In latin-1 these would be rarely used control characters
+        return _encoding_info("cp1252", 0.6, "Windows punctuation bytes")
+    return _encoding_info("latin-1", 0.5, "not valid UTF-8")
+
+def detect_encoding(sample: bytes, complete: bool = False) -> Dict[str, Any]:
+    """Guess the encoding of data from its first bytes.
+
+    complete says that sample is the whole input, which makes a UTF-8 or
+    ASCII verdict certain. Returns the codec name, a confidence between 0
+    and 1, the reason for the guess and whether a BOM was found.
+    """
+    for bom, encoding in _BOMS:
+        if sample.startswith(bom):
+            return _encoding_info(encoding, 1.0, "byte order mark", bom=True)
+    wide = _wide_encoding(sample, complete)
+    if wide is not None:
+        return wide
+    if _decodes(sample, "utf-8", complete):
+        if complete:
+            return _encoding_info("utf-8", 1.0, "valid UTF-8")
+        if sample.isascii():
+            # Later bytes may still be in any ASCII-compatible encoding
+            return _encoding_info("utf-8", 0.8, "ASCII sample")
+        return _encoding_info("utf-8", 0.99, "valid multi-byte UTF-8")
+    return _single_byte_encoding(sample)
+
+def decode_bytes(data: Buffer, encoding: Optional[str] = None,
+                 sample_bytes: int = SAMPLE_BYTES) -> Tuple[str, Dict[str, Any]]:
+    """Decode bytes or a buffer with one full pass, detecting the encoding from a sample unless given"""
+    if encoding is not None:
+        return str(data, encoding), _encoding_info(encoding, 1.0, "specified")
+    info = detect_encoding(data[:sample_bytes], complete=len(data) <= sample_bytes)
+    try:
+        return str(data, info["encoding"]), info
+    except UnicodeDecodeError:
+        # Only possible when the sample did not show the whole picture; single-byte codecs cannot fail
+        info = _single_byte_encoding(data)
+        info["confidence"] = round(info["confidence"] / 2, 2)
+        info["reason"] = f"invalid beyond the first {sample_bytes:,} bytes"
+        return str(data, info["encoding"], "replace"), info
+
+def iter_decoded(chunks: Iterable[bytes], encoding: Optional[str] = None,
+                 sample_bytes: int = SAMPLE_BYTES,
+                 on_detect: Optional[Any] = None) -> Iterator[str]:
+    """Decode byte chunks incrementally, detecting the encoding from the first sample_bytes unless given.
+
+    on_detect, if given, is called with the detection result before any text
+    is yielded. Bytes invalid in the chosen encoding raise UnicodeDecodeError.
+    """
+    chunks = iter(chunks)
+    head: List[bytes] = []
+    if encoding is None:
+        size = 0
+        complete = True
+        for chunk in chunks:
+            head.append(chunk)
+            size += len(chunk)
+            if size >= sample_bytes:
+                complete = False
+                break
+        sample = b"".join(head)
+        head = [sample]
+        info = detect_encoding(sample[:sample_bytes], complete=complete and size <= sample_bytes)
+        encoding = info["encoding"]
+    else:
+        info = _encoding_info(encoding, 1.0, "specified")
+    if on_detect is not None:
+        on_detect(info)
+
+    decoder = codecs.getincrementaldecoder(encoding)()
+    for chunk in head:
+        yield decoder.decode(chunk)
+    for chunk in chunks:
+        yield decoder.decode(chunk)
+    yield decoder.decode(b"", final=True)
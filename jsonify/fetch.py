@@ -0,0 +1,318 @@
+"""HTTP(S) fetching with timeouts, size caps, decompression and a conditional-request cache.
+
+``UrlFetcher.fetch`` streams a response in chunks and gives up as soon as it
+exceeds the size cap (after gzip/deflate decoding) or the time limit, so a
+stalled or oversized upstream cannot hold a server thread forever. Idle
+keep-alive connections are reused per host. Bodies that came with an ETag or
+Last-Modified header are kept in an on-disk cache and revalidated with
+If-None-Match / If-Modified-Since, so fetching an unchanged document again
+costs one round trip and no transfer.
+"""
+import email.utils
+import hashlib
+import http.client
+import os
+import tempfile
+import threading
+import time
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+from .backend import dumps, loads
+from .core import format_file_size
+
+# Environment variable naming the directory of the default fetcher's cache
+FETCH_CACHE_ENV = "JSONIFY_FETCH_CACHE"
+DEFAULT_CACHE_DIR = os.path.join(tempfile.gettempdir(), "jsonify-fetch-cache")
+# Seconds allowed to connect and between two received packets
+DEFAULT_TIMEOUT = 10.0
+# Seconds allowed for a whole fetch, redirects included
+DEFAULT_TOTAL_TIMEOUT = 60.0
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+DEFAULT_MAX_CACHE_BYTES = 500 * 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+MAX_REDIRECTS = 5
+# Idle keep-alive connections kept per host
+MAX_IDLE_CONNECTIONS = 8
+USER_AGENT = "JSONify"
+
+_REDIRECTS = (301, 302, 303, 307, 308)
+
+class FetchError(Exception):
+    """A URL that could not be fetched within the fetcher's limits"""
+
+class _Decompressor:
+    """Incremental Content-Encoding decoding that never produces much more than it is allowed to"""
+
+    def __init__(self, encoding: str):
+        if encoding in ("gzip", "x-gzip"):
+            self._wbits: Optional[int] = 16 + zlib.MAX_WBITS
+        elif encoding == "deflate":
+            # zlib-wrapped as the spec says, or raw deflate as some servers send; known from the header
+            self._wbits = None
+        elif encoding in ("", "identity"):
+            self._wbits = 0
+        else:
+            raise FetchError(f"Unsupported Content-Encoding: {encoding}")
+        self._decoder = None
+
+    def decompress(self, data: bytes, limit: int) -> bytes:
+        """Decode data; a result longer than limit means the size cap was exceeded"""
+        if self._wbits == 0:
+            return data
+        if self._decoder is None:
+            wbits = self._wbits
+            if wbits is None:
+                zlib_header = len(data) >= 2 and data[0] & 0x0F == 8 and (data[0] << 8 | data[1]) % 31 == 0
+                wbits = zlib.MAX_WBITS if zlib_header else -zlib.MAX_WBITS
+            self._decoder = zlib.decompressobj(wbits)
+        try:
+            return self._decoder.decompress(data, limit + 1)
+        except zlib.error as e:
+            raise FetchError(f"Could not decode compressed response: {str(e)}") from e
+
+def _content_charset(content_type: str) -> Optional[str]:
+    for param in content_type.split(";")[1:]:
+        name, _, value = param.partition("=")
+        if name.strip().lower() == "charset" and value.strip():
+            return value.strip().strip('"').lower()
+    return None
+
+class UrlFetcher:
+    """Fetches URLs over pooled connections, caching revalidatable bodies in cache_dir.
+
+    Safe to share between threads. Without a cache_dir nothing is cached.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, timeout: float = DEFAULT_TIMEOUT,
+                 total_timeout: float = DEFAULT_TOTAL_TIMEOUT, max_bytes: int = DEFAULT_MAX_BYTES,
+                 max_cache_bytes: int = DEFAULT_MAX_CACHE_BYTES):
+        self.cache_dir = cache_dir
+        self.timeout = timeout
+        self.total_timeout = total_timeout
+        self.max_bytes = max_bytes
+        self.max_cache_bytes = max_cache_bytes
+        self._idle: Dict[Tuple[str, str, Optional[int]], List[http.client.HTTPConnection]] = {}
+        self._lock = threading.Lock()
+        self._cache_lock = threading.Lock()
+
+    def close(self):
+        """Close every idle connection"""
+        with self._lock:
+            pools, self._idle = self._idle, {}
+        for pool in pools.values():
+            for connection in pool:
+                connection.close()
+
+    def _connection(self, host_key: Tuple[str, str, Optional[int]]) -> Tuple[http.client.HTTPConnection, bool]:
+        with self._lock:
+            pool = self._idle.get(host_key)
+            if pool:
+                return pool.pop(), True
+        scheme, host, port = host_key
+        connection_class = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        return connection_class(host, port, timeout=self.timeout), False
+
+    def _release(self, host_key: Tuple[str, str, Optional[int]], connection: http.client.HTTPConnection,
+                 response: http.client.HTTPResponse):
+        """Keep a connection whose response was read to the end for the next request to the host"""
+        # The connection only accepts a new request once the previous response is closed
+        response.close()
+        if not response.will_close:
+            with self._lock:
+                pool = self._idle.setdefault(host_key, [])
+                if len(pool) < MAX_IDLE_CONNECTIONS:
+                    pool.append(connection)
+                    return
+        connection.close()
+
+    def _request(self, url: str, headers: Dict[str, str]):
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https"):
+            raise FetchError(f"Unsupported URL scheme: {parts.scheme or '(none)'} (use http or https)")
+        if not parts.hostname:
+            raise FetchError(f"URL has no host: {url}")
+        host_key = (parts.scheme, parts.hostname, parts.port)
+        target = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        while True:
+            connection, reused = self._connection(host_key)
+            try:
+                connection.request("GET", target, headers=headers)
+                return host_key, connection, connection.getresponse()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                connection.close()
+                # The server may have closed an idle connection; only a fresh one is conclusive
+                if not reused:
+                    raise
+            except BaseException:
+                connection.close()
+                raise
+
+    def _read_body(self, response: http.client.HTTPResponse, deadline: float) -> Tuple[bytes, int]:
+        """Read and decode a response body in chunks, enforcing the size cap and the deadline"""
+        encoding = (response.getheader("Content-Encoding") or "identity").strip().lower()
+        length = response.getheader("Content-Length") or ""
+        if encoding == "identity" and length.isdigit() and int(length) > self.max_bytes:
+            raise FetchError(f"Response is {format_file_size(int(length))}, over the "
+                             f"{format_file_size(self.max_bytes)} limit")
+        decompressor = _Decompressor(encoding)
+        pieces: List[bytes] = []
+        size = 0
+        received = 0
+        while True:
+            if time.monotonic() > deadline:
+                raise FetchError(f"Fetch took longer than {self.total_timeout:g} s")
+            chunk = response.read1(CHUNK_SIZE)
+            if not chunk:
+                break
+            received += len(chunk)
+            data = decompressor.decompress(chunk, self.max_bytes - size)
+            size += len(data)
+            if size > self.max_bytes:
+                raise FetchError(f"Response is over the {format_file_size(self.max_bytes)} limit")
+            pieces.append(data)
+        return b"".join(pieces), received
+
+    def fetch(self, url: str) -> Dict[str, Any]:
+        """Fetch url, following redirects, and return its decoded body and response details.
+
+        Raises FetchError for unsupported URLs, network errors, timeouts, HTTP
+        error statuses and bodies over the size cap.
+        """
+        started = time.monotonic()
+        deadline = started + self.total_timeout
+        current = url.strip()
+        for _ in range(MAX_REDIRECTS + 1):
+            cached = self._cached(current)
+            headers = {"User-Agent": USER_AGENT, "Accept-Encoding": "gzip, deflate",
+                       "Accept": "application/json, text/plain;q=0.9, */*;q=0.8"}
+            if cached is not None:
+                if cached.get("etag"):
+                    headers["If-None-Match"] = cached["etag"]
+                if cached.get("last_modified"):
+                    headers["If-Modified-Since"] = cached["last_modified"]
+            try:
+                host_key, connection, response = self._request(current, headers)
+                try:
+                    if response.status in _REDIRECTS and response.getheader("Location"):
+                        current = urljoin(current, response.getheader("Location"))
+                        connection.close()
+                        continue
+                    if response.status == 304 and cached is not None:
+                        response.read()
+                        self._release(host_key, connection, response)
+                        return self._result(url, current, cached, self._cached_body(current), 0, True, started)
+                    if response.status != 200:
+                        raise FetchError(f"HTTP {response.status} {response.reason} from {current}")
+                    body, received = self._read_body(response, deadline)
+                except BaseException:
+                    connection.close()
+                    raise
+            except (OSError, http.client.HTTPException) as e:
+                raise FetchError(f"Could not fetch {current}: {str(e) or type(e).__name__}") from e
+            self._release(host_key, connection, response)
+
+            meta = {
+                "url": current,
+                "content_type": response.getheader("Content-Type") or "",
+                "etag": response.getheader("ETag"),
+                "last_modified": response.getheader("Last-Modified"),
+                "size": len(body),
+            }
+            if meta["etag"] or meta["last_modified"]:
+                self._store(current, meta, body)
+            return self._result(url, current, meta, body, received, False, started)
+        raise FetchError(f"More than {MAX_REDIRECTS} redirects from {url}")
+
+    def _result(self, url: str, final_url: str, meta: Dict[str, Any], body: bytes, received: int,
+                from_cache: bool, started: float) -> Dict[str, Any]:
+        return {
+            "url": url,
+            "final_url": final_url,
+            "content": body,
+            "content_type": meta.get("content_type", ""),
+            "charset": _content_charset(meta.get("content_type", "")),
+            "etag": meta.get("etag"),
+            "last_modified": meta.get("last_modified"),
+            "from_cache": from_cache,
+            "bytes_received": received,
+            "elapsed": time.monotonic() - started,
+        }
+
+    def _cache_paths(self, url: str) -> Tuple[str, str]:
+        digest = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.json"), os.path.join(self.cache_dir, f"{digest}.body")
+
+    def _cached(self, url: str) -> Optional[Dict[str, Any]]:
+        """Metadata of the cached response for url, if there is a usable one"""
+        if not self.cache_dir:
+            return None
+        meta_path, body_path = self._cache_paths(url)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = loads(f.read())
+            if meta.get("url") != url or os.path.getsize(body_path) != meta.get("size"):
+                return None
+        except (OSError, ValueError):
+            return None
+        return meta
+
+    def _cached_body(self, url: str) -> bytes:
+        meta_path, body_path = self._cache_paths(url)
+        try:
+            with open(body_path, "rb") as f:
+                body = f.read()
+            # Marks the entry as recently used for pruning
+            os.utime(body_path)
+        except OSError as e:
+            raise FetchError(f"Cached copy of {url} is no longer readable: {str(e)}") from e
+        return body
+
+    def _store(self, url: str, meta: Dict[str, Any], body: bytes):
+        """Write a response to the cache; the cache is best effort, so failures are ignored"""
+        if not self.cache_dir or len(body) > self.max_cache_bytes:
+            return
+        meta_path, body_path = self._cache_paths(url)
+        meta = dict(meta, stored=email.utils.formatdate(usegmt=True))
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with self._cache_lock:
+                for path, data in ((body_path, body), (meta_path, dumps(meta).encode("utf-8"))):
+                    # Written aside and renamed so readers never see a partial file
+                    fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+                    with os.fdopen(fd, "wb") as f:
+                        f.write(data)
+                    os.replace(temp_path, path)
+                self._prune()
+        except OSError:
+            pass
+
+    def _prune(self):
+        """Delete the least recently used cached bodies until the cache fits max_cache_bytes"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".body"):
+                stat = os.stat(os.path.join(self.cache_dir, name))
+                entries.append((stat.st_mtime, stat.st_size, name[:-len(".body")]))
+        total = sum(size for _, size, _ in entries)
+        for _, size, digest in sorted(entries):
+            if total <= self.max_cache_bytes:
+                break
+            for suffix in (".body", ".json"):
+                try:
+                    os.remove(os.path.join(self.cache_dir, digest + suffix))
+                except OSError:
+                    pass
+            total -= size
+
+_default_fetcher: Optional[UrlFetcher] = None
+_default_fetcher_lock = threading.Lock()
+
+def get_fetcher() -> UrlFetcher:
+    """Return the process-wide fetcher, caching in $JSONIFY_FETCH_CACHE or a temp directory"""
+    global _default_fetcher
+    with _default_fetcher_lock:
+        if _default_fetcher is None:
+            _default_fetcher = UrlFetcher(cache_dir=os.environ.get(FETCH_CACHE_ENV) or DEFAULT_CACHE_DIR)
+        return _default_fetcher
@@ -0,0 +1,188 @@
+"""Newline-delimited JSON (JSON Lines) validation, formatting and analysis.
+
+Records are grouped into batches of lines and processed across a process pool.
+Every batch returns its output text, per-line errors, analysis statistics and
+optionally an inferred schema and JSON Schema violations, which are combined
+in input order. Workers compile a validation schema once, through their
+process-wide validator cache, however many batches they handle.
+"""
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple, Union
+
+from .analysis import AnalysisAccumulator, merge_analysis
+from .backend import loads
+from .cache import NestingError
+from .core import format_json, minify_json
+from .schema import SchemaAccumulator
+from .validation import get_validator
+
+MODES = ["validate", "minify", "format"]
+
+# (number of the first line, lines)
+Batch = Tuple[int, List[str]]
+
+def iter_batches(lines: Iterable[str], batch_size: int = 10000, start_line: int = 1) -> Iterator[Batch]:
+    """Group lines into numbered batches"""
+    lines = iter(lines)
+    line_no = start_line
+    while True:
+        batch = list(islice(lines, batch_size))
+        if not batch:
+            return
+        yield line_no, batch
+        line_no += len(batch)
+
+def process_batch(batch: Batch, mode: str = "validate", options: Optional[Dict[str, Any]] = None,
+                  analyze: bool = True, max_errors: int = 1000, schema: bool = False,
+                  json_schema: Optional[Union[str, Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """Parse every line of a batch, and validate it against json_schema if given; blank lines are skipped"""
+    options = options or {}
+    first_line, lines = batch
+    outputs: List[str] = []
+    errors: List[Tuple[int, str]] = []
+    error_count = 0
+    records = 0
+    stats = AnalysisAccumulator() if analyze else None
+    schema_stats = SchemaAccumulator() if schema else None
+    validator = get_validator(json_schema) if json_schema is not None else None
+    # (line number, path, message) per violation
+    violations: List[Tuple[int, str, str]] = []
+    invalid_records = 0
+    root_types: Dict[str, int] = {}
+
+    for line_no, line in enumerate(lines, first_line):
+        if not line.strip():
+            continue
+        try:
+            record = loads(line)
+        except (json.JSONDecodeError, RecursionError) as e:
+            error_count += 1
+            if len(errors) < max_errors:
+                errors.append((line_no, str(NestingError() if isinstance(e, RecursionError) else e)))
+            continue
+        records += 1
+        if stats is not None:
+            stats.add(record)
+            root_type = type(record).__name__
+            root_types[root_type] = root_types.get(root_type, 0) + 1
+        if schema_stats is not None:
+            schema_stats.add(record)
+        if validator is not None:
+            room = max_errors - len(violations)
+            if room > 0:
+                found = validator.validate(record, max_errors=room)
+                violations.extend((line_no, v["path"], v["message"]) for v in found)
+            else:
+                # Only the count is still needed, which the first violation settles
+                found = not validator.is_valid(record)
+            if found:
+                invalid_records += 1
+        if mode == "minify":
+            outputs.append(minify_json(record, ensure_ascii=options.get("ensure_ascii", False)))
+        elif mode == "format":
+            outputs.append(format_json(record, indent=options.get("indent", 2),
+                                       sort_keys=options.get("sort_keys", False),
+                                       ensure_ascii=options.get("ensure_ascii", False)))
+
+    return {
+        "lines": len(lines),
+        "records": records,
+        "errors": errors,
+        "error_count": error_count,
+        "output": "".join(text + "\n" for text in outputs),
+        "analysis": stats.result() if stats is not None else None,
+        "record_types": root_types,
+        "schema": schema_stats,
+        "violations": violations,
+        "invalid_records": invalid_records,
+    }
+
+def process_ndjson(lines: Iterable[str], mode: str = "validate", options: Optional[Dict[str, Any]] = None,
+                   analyze: bool = True, jobs: Optional[int] = None, batch_size: int = 10000,
+                   max_errors: int = 1000, output: Optional[TextIO] = None,
+                   schema: bool = False,
+                   json_schema: Optional[Union[str, Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """Validate, minify or format every record of an NDJSON stream.
+
+    Output records are written to output in input order when it is given,
+    otherwise they are collected into the result's 'output' string. At most
+    max_errors per-line errors are kept; 'error_count' has the full count.
+    With schema, 'schema' is the JSON Schema inferred from every record.
+    With json_schema, every record is validated against it: 'invalid_records'
+    counts the records that fail and 'violations' keeps up to max_errors
+    (line, path, message) entries.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown NDJSON mode: {mode}")
+    started = time.perf_counter()
+    options = options or {}
+    jobs = jobs or os.cpu_count() or 1
+    batches = iter_batches(lines, batch_size)
+    if json_schema is not None:
+        # Raise SchemaError here rather than in every worker
+        get_validator(json_schema)
+    tasks = ((batch, mode, options, analyze, max_errors, schema, json_schema) for batch in batches)
+    schema_stats = SchemaAccumulator() if schema else None
+
+    summary = {
+        "lines": 0,
+        "records": 0,
+        "errors": [],
+        "error_count": 0,
+        "output": None,
+        "analysis": AnalysisAccumulator().result() if analyze else None,
+        "record_types": {},
+        "schema": None,
+        "violations": [],
+        "invalid_records": 0,
+    }
+    collected: List[str] = []
+
+    def combine(result: Dict[str, Any]):
+        summary["lines"] += result["lines"]
+        summary["records"] += result["records"]
+        summary["error_count"] += result["error_count"]
+        room = max_errors - len(summary["errors"])
+        summary["errors"].extend(result["errors"][:room])
+        if analyze:
+            merge_analysis(summary["analysis"], result["analysis"])
+            for t, count in result["record_types"].items():
+                summary["record_types"][t] = summary["record_types"].get(t, 0) + count
+        if schema_stats is not None:
+            schema_stats.merge(result["schema"])
+        summary["invalid_records"] += result["invalid_records"]
+        room = max_errors - len(summary["violations"])
+        summary["violations"].extend(result["violations"][:room])
+        if mode != "validate":
+            if output is not None:
+                output.write(result["output"])
+            else:
+                collected.append(result["output"])
+
+    # Small inputs are not worth the process start-up cost
+    first_tasks = list(islice(tasks, 2))
+    if jobs == 1 or len(first_tasks) < 2:
+        for task in chain(first_tasks, tasks):
+            combine(process_batch(*task))
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            # Keep a bounded window of batches in flight so input is read lazily
+            window = deque()
+            for task in chain(first_tasks, tasks):
+                window.append(pool.submit(process_batch, *task))
+                if len(window) >= jobs * 2:
+                    combine(window.popleft().result())
+            while window:
+                combine(window.popleft().result())
+
+    if mode != "validate" and output is None:
+        summary["output"] = "".join(collected)
+    if schema_stats is not None:
+        summary["schema"] = schema_stats.schema()
+    summary["elapsed"] = time.perf_counter() - started
+    return summary
@@ -0,0 +1,383 @@
+"""JSON Patch editing of persistent documents, with undo/redo and incremental output.
+
+Patches (RFC 6902) are applied by path copying: only the containers on the
+path to a change are copied, every other subtree is shared with the previous
+version. Old versions therefore cost little to keep, which makes undo and
+redo a matter of switching roots, and a failed patch leaves nothing to roll
+back. ``IncrementalSerializer`` relies on the same sharing to re-serialize
+only the subtrees that changed since the last time a document was written.
+
+Documents handled here must be treated as immutable: values are shared
+between versions and with the patches that introduced them.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+from .backend import dumps, loads
+
+# Containers serialized to more characters than this are assembled from their children
+CHUNK_CHARS = 64 * 1024
+# Containers with more children than this are always assembled from their children
+WIDE_CONTAINER = 1000
+# Children per cached block of an assembled container
+BLOCK_ITEMS = 256
+
+OPERATIONS = ["add", "remove", "replace", "move", "copy", "test"]
+
+class JsonPatchError(ValueError):
+    """A patch that is malformed or does not apply to the document"""
+
+def parse_pointer(pointer: str) -> List[str]:
+    """Split a JSON Pointer (RFC 6901) such as /users/0/name into unescaped tokens"""
+    if pointer == "":
+        return []
+    if not pointer.startswith("/"):
+        raise JsonPatchError(f"Invalid JSON Pointer '{pointer}': must be empty or start with '/'")
+    return [token.replace("~1", "/").replace("~0", "~") for token in pointer[1:].split("/")]
+
+def format_pointer(tokens: List[Any]) -> str:
+    """Inverse of parse_pointer; integer tokens are written as array indexes"""
+    return "".join("/" + str(token).replace("~", "~0").replace("/", "~1") for token in tokens)
+
+def _array_index(node: List[Any], token: str, pointer: str, allow_end: bool = False) -> int:
+    if allow_end and token == "-":
+        return len(node)
+    if not token.isdigit() or (token != "0" and token.startswith("0")):
+        raise JsonPatchError(f"Invalid array index '{token}' in '{pointer}'")
+    index = int(token)
+    if index > len(node) or (index == len(node) and not allow_end):
+        raise JsonPatchError(f"Array index {index} out of range in '{pointer}'")
+    return index
+
+def _child(node: Any, token: str, pointer: str) -> Any:
+    if isinstance(node, dict):
+        if token not in node:
+            raise JsonPatchError(f"Path not found: '{pointer}'")
+        return node[token]
+    elif isinstance(node, list):
+        return node[_array_index(node, token, pointer)]
+    raise JsonPatchError(f"Path not found: '{pointer}'")
+
+def resolve_pointer(doc: Any, pointer: str) -> Any:
+    """Return the value a JSON Pointer refers to"""
+    node = doc
+    for token in parse_pointer(pointer):
+        node = _child(node, token, pointer)
+    return node
+
+def _json_equal(a: Any, b: Any) -> bool:
+    """Equality as JSON defines it: booleans are not numbers, 1 equals 1.0"""
+    if isinstance(a, bool) or isinstance(b, bool):
+        return type(a) is type(b) and a == b
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.keys() == b.keys() and all(_json_equal(a[k], b[k]) for k in a)
+    if isinstance(a, list) and isinstance(b, list):
+        return len(a) == len(b) and all(_json_equal(x, y) for x, y in zip(a, b))
+    if isinstance(a, (dict, list)) or isinstance(b, (dict, list)):
+        return False
+    return a == b
+
+def _update(doc: Any, pointer: str, change) -> Any:
+    """Copy the containers on the path to pointer's parent and apply change to the parent copy"""
+    tokens = parse_pointer(pointer)
+    ancestors = [doc]
+    for token in tokens[:-1]:
+        ancestors.append(_child(ancestors[-1], token, pointer))
+    parent = ancestors[-1]
+    if not isinstance(parent, (dict, list)):
+        raise JsonPatchError(f"Path not found: '{pointer}'")
+
+    node = parent.copy()
+    change(node, tokens[-1])
+    for ancestor, token in zip(reversed(ancestors[:-1]), reversed(tokens[:-1])):
+        copied = ancestor.copy()
+        copied[token if isinstance(copied, dict) else int(token)] = node
+        node = copied
+    return node
+
+def _add(doc: Any, pointer: str, value: Any) -> Any:
+    if pointer == "":
+        return value
+
+    def change(node, token):
+        if isinstance(node, dict):
+            node[token] = value
+        else:
+            node.insert(_array_index(node, token, pointer, allow_end=True), value)
+    return _update(doc, pointer, change)
+
+def _remove(doc: Any, pointer: str) -> Any:
+    if pointer == "":
+        raise JsonPatchError("Cannot remove the whole document")
+
+    def change(node, token):
+        if isinstance(node, dict):
+            if token not in node:
+                raise JsonPatchError(f"Path not found: '{pointer}'")
+            del node[token]
+        else:
+            del node[_array_index(node, token, pointer)]
+    return _update(doc, pointer, change)
+
+def _replace(doc: Any, pointer: str, value: Any) -> Any:
+    if pointer == "":
+        return value
+
+    def change(node, token):
+        if isinstance(node, dict):
+            if token not in node:
+                raise JsonPatchError(f"Path not found: '{pointer}'")
+            node[token] = value
+        else:
+            node[_array_index(node, token, pointer)] = value
+    return _update(doc, pointer, change)
+
+def _operation_field(operation: Dict[str, Any], field: str) -> Any:
+    if field not in operation:
+        raise JsonPatchError(f"'{operation.get('op')}' operation is missing '{field}'")
+    return operation[field]
+
+def apply_operation(doc: Any, operation: Dict[str, Any]) -> Any:
+    """Apply one patch operation and return the new version of the document"""
+    if not isinstance(operation, dict):
+        raise JsonPatchError("Patch operations must be JSON objects")
+    op = operation.get("op")
+    if op not in OPERATIONS:
+        raise JsonPatchError(f"Unknown patch operation: {op!r}")
+    path = _operation_field(operation, "path")
+    if not isinstance(path, str):
+        raise JsonPatchError("'path' must be a string")
+
+    if op == "add":
+        return _add(doc, path, _operation_field(operation, "value"))
+    elif op == "remove":
+        return _remove(doc, path)
+    elif op == "replace":
+        return _replace(doc, path, _operation_field(operation, "value"))
+    elif op == "test":
+        if not _json_equal(resolve_pointer(doc, path), _operation_field(operation, "value")):
+            raise JsonPatchError(f"Test failed: value at '{path}' differs")
+        return doc
+
+    source = _operation_field(operation, "from")
+    value = resolve_pointer(doc, source)
+    if op == "move":
+        if path.startswith(source + "/"):
+            raise JsonPatchError(f"Cannot move '{source}' into its own child '{path}'")
+        if path == source:
+            return doc
+        doc = _remove(doc, source)
+    return _add(doc, path, value)
+
+def apply_patch(doc: Any, patch: List[Dict[str, Any]]) -> Any:
+    """Apply a JSON Patch and return the new document; doc itself is never modified.
+
+    Either every operation applies or JsonPatchError is raised.
+    """
+    if not isinstance(patch, list):
+        raise JsonPatchError("A JSON Patch must be an array of operations")
+    for operation in patch:
+        doc = apply_operation(doc, operation)
+    return doc
+
+class IncrementalSerializer:
+    """Indented serialization that reuses the text of unchanged subtrees.
+
+    Large containers are assembled from blocks of consecutive children, and
+    the text of each block of small children is cached under the identities
+    of those children. After an edit only the blocks holding a changed child
+    and the copies on the edited path are serialized again. The output
+    matches format_json.
+    """
+
+    def __init__(self, indent: int = 2, sort_keys: bool = False, ensure_ascii: bool = False):
+        self.indent = indent
+        self.sort_keys = sort_keys
+        self.ensure_ascii = ensure_ascii
+        # id -> node for containers assembled block by block
+        self._spine: Dict[int, Any] = {}
+        # (depth, first block, keys, child ids) -> (children, text); the children keep the ids from being reused
+        self._blocks: Dict[Tuple, Tuple[List[Any], str]] = {}
+        self._last: Optional[Tuple[Any, str]] = None
+
+    def _dumps(self, value: Any, depth: int) -> str:
+        text = dumps(value, indent=self.indent, sort_keys=self.sort_keys, ensure_ascii=self.ensure_ascii)
+        return text.replace("\n", "\n" + " " * (self.indent * depth)) if depth else text
+
+    def _assembled(self, value: Any) -> bool:
+        return isinstance(value, (dict, list)) and bool(value) and (
+            len(value) > WIDE_CONTAINER or self._spine.get(id(value)) is value)
+
+    def carry_over(self, old_doc: Any, new_doc: Any, pointers: List[str]):
+        """Assemble the copies on the paths to pointers in new_doc like their originals in old_doc"""
+        for pointer in pointers:
+            old, new = old_doc, new_doc
+            tokens = parse_pointer(pointer)
+            for depth in range(len(tokens) + 1):
+                if not self._assembled(old) or not isinstance(new, (dict, list)):
+                    break
+                self._spine[id(new)] = new
+                if depth == len(tokens):
+                    break
+                try:
+                    old = _child(old, tokens[depth], pointer)
+                    new = _child(new, tokens[depth], pointer)
+                except JsonPatchError:
+                    break
+
+    def serialize(self, doc: Any) -> str:
+        """Serialize doc, reusing the blocks of the previously serialized version"""
+        if self._last is not None and self._last[0] is doc:
+            return self._last[1]
+        out: List[str] = []
+        spine: Dict[int, Any] = {}
+        blocks: Dict[Tuple, Tuple[List[Any], str]] = {}
+        if isinstance(doc, (dict, list)) and doc:
+            self._assemble(doc, 0, out, spine, blocks)
+        else:
+            out.append(self._dumps(doc, 0))
+        # Only what this document still uses is kept
+        self._spine = spine
+        self._blocks = blocks
+        text = "".join(out)
+        self._last = (doc, text)
+        return text
+
+    def _assemble(self, node: Any, depth: int, out: List[str], spine: Dict[int, Any],
+                  blocks: Dict[Tuple, Tuple[List[Any], str]]):
+        spine[id(node)] = node
+        inner = "\n" + " " * (self.indent * (depth + 1))
+        if isinstance(node, dict):
+            keys: Optional[List[str]] = sorted(node) if self.sort_keys else list(node)
+            values = [node[key] for key in keys] if self.sort_keys else list(node.values())
+            out.append("{")
+        else:
+            keys = None
+            values = node
+            out.append("[")
+
+        for start in range(0, len(values), BLOCK_ITEMS):
+            block_values = values[start:start + BLOCK_ITEMS]
+            block_keys = keys[start:start + BLOCK_ITEMS] if keys is not None else None
+            key = (depth, start == 0, tuple(block_keys) if block_keys else None, tuple(map(id, block_values)))
+            cached = self._blocks.get(key)
+            if cached is not None:
+                blocks[key] = cached
+                out.append(cached[1])
+                continue
+            if any(self._assembled(value) for value in block_values):
+                # Blocks holding large children are never cached, so each text is held once
+                key = None
+
+            mark = len(out)
+            for offset, value in enumerate(block_values):
+                out.append(("," if start + offset else "") + inner)
+                if block_keys:
+                    out.append(dumps(block_keys[offset], ensure_ascii=self.ensure_ascii) + ": ")
+                text = None if self._assembled(value) else self._child_text(value, depth + 1)
+                if text is None:
+                    key = None
+                    self._assemble(value, depth + 1, out, spine, blocks)
+                else:
+                    out.append(text)
+            if key is not None:
+                text = "".join(out[mark:])
+                del out[mark:]
+                out.append(text)
+                blocks[key] = (block_values, text)
+        out.append("\n" + " " * (self.indent * depth) + ("}" if keys is not None else "]"))
+
+    def _child_text(self, value: Any, depth: int) -> Optional[str]:
+        """Text of a child, or None if it is a container too large to cache whole"""
+        text = self._dumps(value, depth)
+        if isinstance(value, (dict, list)) and len(text) > CHUNK_CHARS:
+            return None
+        return text
+
+class DocumentEditor:
+    """A document edited through JSON Patches, with cheap undo and redo.
+
+    Every version is kept as its own root; thanks to structural sharing a
+    version costs about as much memory as the containers its patch copied.
+    """
+
+    def __init__(self, doc: Any, history_limit: int = 100):
+        self.history_limit = history_limit
+        # (document, patch that produced it); the first entry is the oldest undoable state
+        self._versions: List[Tuple[Any, List[Dict[str, Any]]]] = [(doc, [])]
+        self._redo: List[Tuple[Any, List[Dict[str, Any]]]] = []
+        # Operations of versions dropped from the history, still part of patch()
+        self._committed: List[Dict[str, Any]] = []
+        self._serializers: Dict[Tuple[int, bool, bool], IncrementalSerializer] = {}
+
+    @property
+    def document(self) -> Any:
+        return self._versions[-1][0]
+
+    @property
+    def can_undo(self) -> bool:
+        return len(self._versions) > 1
+
+    @property
+    def can_redo(self) -> bool:
+        return bool(self._redo)
+
+    @property
+    def undo_steps(self) -> int:
+        return len(self._versions) - 1
+
+    @property
+    def redo_steps(self) -> int:
+        return len(self._redo)
+
+    def _switch(self, old_doc: Any, patch: List[Dict[str, Any]]):
+        pointers = [value for operation in patch for value in (operation.get("path"), operation.get("from"))
+                    if isinstance(value, str)]
+        for serializer in self._serializers.values():
+            serializer.carry_over(old_doc, self.document, pointers)
+
+    def apply(self, patch: List[Dict[str, Any]]) -> Any:
+        """Apply a patch as one undoable step and return the new document"""
+        old_doc = self.document
+        self._versions.append((apply_patch(old_doc, patch), patch))
+        self._redo.clear()
+        if len(self._versions) > self.history_limit + 1:
+            self._versions.pop(0)
+            doc, oldest = self._versions[0]
+            self._committed.extend(oldest)
+            self._versions[0] = (doc, [])
+        self._switch(old_doc, patch)
+        return self.document
+
+    def undo(self) -> Any:
+        if self.can_undo:
+            old_doc, patch = self._versions.pop()
+            self._redo.append((old_doc, patch))
+            self._switch(old_doc, patch)
+        return self.document
+
+    def redo(self) -> Any:
+        if self.can_redo:
+            old_doc = self.document
+            self._versions.append(self._redo.pop())
+            self._switch(old_doc, self._versions[-1][1])
+        return self.document
+
+    def patch(self) -> List[Dict[str, Any]]:
+        """All operations applied since the document was loaded, as one JSON Patch"""
+        return self._committed + [operation for _, patch in self._versions[1:] for operation in patch]
+
+    def serialize(self, indent: int = 2, sort_keys: bool = False, ensure_ascii: bool = False) -> str:
+        """Indented text of the current document, re-serializing only what changed"""
+        key = (indent, sort_keys, ensure_ascii)
+        if key not in self._serializers:
+            self._serializers[key] = IncrementalSerializer(indent, sort_keys, ensure_ascii)
+        return self._serializers[key].serialize(self.document)
+
+def parse_patch(text: str) -> List[Dict[str, Any]]:
+    """Parse JSON Patch text; a single operation object is accepted as a one-item patch"""
+    patch = loads(text)
+    if isinstance(patch, dict):
+        patch = [patch]
+    if not isinstance(patch, list):
+        raise JsonPatchError("A JSON Patch must be an array of operations")
+    return patch
@@ -0,0 +1,126 @@
+"""Per-run instrumentation: stage timings, input sizes and peak memory.
+
+A ``Profiler`` is created at the start of a run (one Streamlit rerun, one CLI
+invocation) and each expensive step is wrapped in ``profiler.stage(name, size)``.
+``finish()`` returns a plain dict record that front ends can display and that
+``append_profile_log`` writes as one JSON line to a structured log file.
+
+Memory tracing uses tracemalloc, which is process wide and slows Python code
+down noticeably, so it is off unless asked for. With several concurrent runs
+in one process the traced peaks include the other runs' allocations.
+"""
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from .backend import dumps
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows
+    resource = None
+
+# Environment variable naming the file profile records are appended to
+PROFILE_LOG_ENV = "JSONIFY_PROFILE_LOG"
+
+_log_lock = threading.Lock()
+_tracing_lock = threading.Lock()
+# Profilers currently tracing memory, and whether tracing was started by them
+_tracing_users = 0
+_tracing_started = False
+
+def _acquire_tracing():
+    global _tracing_users, _tracing_started
+    with _tracing_lock:
+        if _tracing_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracing_started = True
+        _tracing_users += 1
+
+def _release_tracing():
+    global _tracing_users, _tracing_started
+    with _tracing_lock:
+        _tracing_users -= 1
+        if _tracing_users == 0 and _tracing_started:
+            tracemalloc.stop()
+            _tracing_started = False
+
+def max_rss_bytes() -> Optional[int]:
+    """Peak resident memory of the whole process so far, if the platform reports it"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+class Profiler:
+    """Times the named stages of one run and summarizes them as a record"""
+
+    def __init__(self, label: str = "", trace_memory: bool = False):
+        self.label = label
+        self.trace_memory = trace_memory
+        self.stages: List[Dict[str, Any]] = []
+        self.timestamp = time.time()
+        self._started = time.perf_counter()
+        self._tracing = False
+        if trace_memory:
+            _acquire_tracing()
+            self._tracing = True
+
+    def __del__(self):
+        # A run that is aborted before finish() must not leave tracing switched on
+        self._stop_tracing()
+
+    def _stop_tracing(self):
+        if self._tracing:
+            self._tracing = False
+            _release_tracing()
+
+    @contextmanager
+    def stage(self, name: str, size: Optional[int] = None) -> Iterator[None]:
+        """Time the enclosed block; size is the number of input bytes or chars it handles"""
+        baseline = 0
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            entry = {"stage": name, "ms": (time.perf_counter() - started) * 1000, "bytes": size}
+            if self.trace_memory and tracemalloc.is_tracing():
+                # Peak allocated on top of what was already in use when the stage began
+                entry["peak_memory_bytes"] = max(tracemalloc.get_traced_memory()[1] - baseline, 0)
+            self.stages.append(entry)
+
+    def finish(self) -> Dict[str, Any]:
+        """Stop memory tracing and return the record of this run"""
+        self._stop_tracing()
+        sizes = [entry["bytes"] for entry in self.stages if entry["bytes"] is not None]
+        peaks = [entry["peak_memory_bytes"] for entry in self.stages if "peak_memory_bytes" in entry]
+        return {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.timestamp)),
+            "label": self.label,
+            "total_ms": (time.perf_counter() - self._started) * 1000,
+            "stage_ms": sum(entry["ms"] for entry in self.stages),
+            "input_bytes": max(sizes) if sizes else None,
+            "peak_memory_bytes": max(peaks) if peaks else None,
+            "max_rss_bytes": max_rss_bytes(),
+            "stages": self.stages,
+        }
+
+def append_profile_log(record: Dict[str, Any], path: Optional[str] = None) -> bool:
+    """Append a record as one JSON line to path (default: $JSONIFY_PROFILE_LOG)"""
+    path = path or os.environ.get(PROFILE_LOG_ENV)
+    if not path:
+        return False
+    line = dumps(record, separators=(',', ':'), ensure_ascii=False) + "\n"
+    with _log_lock:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(line)
+    return True
@@ -0,0 +1,528 @@
+"""JSONPath queries over parsed documents, with a lazily built key index.
+
+Expressions follow JSONPath (RFC 9535): ``$.store.book[0].title``,
+``$..author``, ``$.items[*].name``, ``$.items[-3:]``, ``$['a','b']`` and
+filters such as ``$.items[?(@.price < 10 && @.tags)]``. JMESPath-style
+spellings are accepted too: a leading ``$`` may be left out
+(``items[0].name``), ``[]`` projects like ``[*]`` and filters may use bare
+field names and backtick literals (``items[?price < `10`]``).
+
+Matches are produced lazily in the order RFC 9535 gives them: document
+order, except that recursive descent selects from each node in document
+order, so a node's own members come before those of its descendants. The
+first page of results of most queries costs only the part of the tree it
+visits. The exception is recursive descent to a name (``$..id``), which
+would have to visit every node to find a few matches. For those, a
+``QueryIndex`` lists every object member by key in document order along
+with each node's parent and subtree end, so the members under any node are
+found by bisection, put in walk order by their parents, and their paths
+rebuilt from the parent links. The index is built on the first such query
+and can be memoized per document (``ParsedDocument.derive``); later queries
+on the same document only read it.
+"""
+import re
+from array import array
+from bisect import bisect_right
+from functools import lru_cache
+from itertools import islice
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from .backend import loads
+from .viewer import PathPart, format_path, json_type_name, preview_value
+
+Path = Tuple[PathPart, ...]
+Match = Tuple[Path, Any]
+IndexSource = Union["QueryIndex", Callable[[], "QueryIndex"], None]
+
+_NAME = re.compile(r'[A-Za-z_\u0080-\uffff][\w\u0080-\uffff]*')
+_INDEX = re.compile(r'-?\d+')
+_NUMBER = re.compile(r'-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?')
+_SLICE = re.compile(r'\s*(-?\d+)?\s*:\s*(-?\d+)?\s*(?::\s*(-?\d+)?\s*)?')
+_COMPARISONS = ["==", "!=", "<=", ">=", "<", ">"]
+
+class QueryError(ValueError):
+    """A query expression that cannot be parsed"""
+
+# Stand-in for a filter operand whose path does not exist
+_MISSING = object()
+
+class QueryIndex:
+    """Parent links, subtree ends and object members by key, in document order"""
+
+    def __init__(self, root: Any):
+        self.root = root
+        # Per node id (preorder): key in the parent object or index in the parent
+        # array, parent id, and the id of the last node in its subtree
+        self.keys: List[Optional[PathPart]] = [None]
+        self.parents = array('q', [-1])
+        self.ends = array('q', [0])
+        self.by_key: Dict[str, array] = {}
+
+        keys, parents, ends, by_key = self.keys, self.parents, self.ends, self.by_key
+        # (node id, iterator over its remaining children) per open container
+        stack: List[Tuple[int, Iterator[Tuple[PathPart, Any]]]] = []
+        if isinstance(root, (dict, list)) and root:
+            stack.append((0, iter(root.items()) if isinstance(root, dict) else enumerate(root)))
+        while stack:
+            node, children = stack[-1]
+            for key, child in children:
+                child_id = len(keys)
+                keys.append(key)
+                parents.append(node)
+                ends.append(child_id)
+                if isinstance(key, str):
+                    ids = by_key.get(key)
+                    if ids is None:
+                        ids = by_key[key] = array('q')
+                    ids.append(child_id)
+                # Descend into a non-empty container; its siblings resume afterwards
+                if isinstance(child, dict):
+                    if child:
+                        stack.append((child_id, iter(child.items())))
+                        break
+                elif isinstance(child, list):
+                    if child:
+                        stack.append((child_id, enumerate(child)))
+                        break
+            else:
+                ends[node] = len(keys) - 1
+                stack.pop()
+
+    @property
+    def node_count(self) -> int:
+        return len(self.parents)
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the index, not counting the document"""
+        arrays = sum(len(ids) for ids in self.by_key.values()) + 2 * len(self.parents)
+        return arrays * 8 + len(self.keys) * 8 + len(self.by_key) * 100
+
+    def path(self, node: int) -> Path:
+        """Path of a node, rebuilt from its parent links"""
+        parts: List[PathPart] = []
+        while node > 0:
+            parts.append(self.keys[node])
+            node = self.parents[node]
+        parts.reverse()
+        return tuple(parts)
+
+    def node_id(self, path: Path) -> Optional[int]:
+        """Id of the node at a path, or None if there is no such node"""
+        node = 0
+        for part in path:
+            end = self.ends[node]
+            if isinstance(part, str):
+                ids = self.by_key.get(part)
+                if ids is None:
+                    return None
+                # The members with this key under node: the child is the one whose parent is node
+                for i in range(bisect_right(ids, node), bisect_right(ids, end)):
+                    if self.parents[ids[i]] == node:
+                        node = ids[i]
+                        break
+                else:
+                    return None
+            else:
+                child = node + 1
+                while child <= end and self.keys[child] != part:
+                    child = self.ends[child] + 1
+                if child > end:
+                    return None
+                node = child
+        return node
+
+    def members(self, names: List[str], node: int) -> List[int]:
+        """Ids of the object members named any of names in node's subtree, in the order a walk selects them.
+
+        That is by parent in document order, then by the order of names, so
+        a node's own members come before those of its descendants.
+        """
+        start, end = node, self.ends[node]
+        found = array('q')
+        for name in names:
+            ids = self.by_key.get(name)
+            if ids is not None:
+                found.extend(ids[bisect_right(ids, start):bisect_right(ids, end)])
+        # Stable, so members of one parent keep the order of names
+        return sorted(found, key=self.parents.__getitem__)
+
+def _value_at(root: Any, path: Path) -> Any:
+    node = root
+    for part in path:
+        node = node[part]
+    return node
+
+def _children(value: Any, path: Path) -> Iterator[Match]:
+    if isinstance(value, dict):
+        for key, child in value.items():
+            yield path + (key,), child
+    elif isinstance(value, list):
+        for i, child in enumerate(value):
+            yield path + (i,), child
+
+def _descendants(value: Any, path: Path) -> Iterator[Match]:
+    """The value and everything below it, in document order"""
+    pending = [(path, value)]
+    while pending:
+        path, value = pending.pop()
+        yield path, value
+        if isinstance(value, dict):
+            pending.extend((path + (key,), child) for key, child in reversed(list(value.items())))
+        elif isinstance(value, list):
+            pending.extend((path + (i,), value[i]) for i in range(len(value) - 1, -1, -1))
+
+class _Selector:
+    """One bracket or dot selector: names/indexes, wildcard, slice or filter"""
+
+    def __init__(self, kind: str, names: Optional[List[PathPart]] = None,
+                 bounds: Optional[Tuple[Optional[int], Optional[int], Optional[int]]] = None,
+                 predicate: Optional[Callable[[Any, Any], bool]] = None):
+        self.kind = kind
+        self.names = names or []
+        self.bounds = bounds
+        self.predicate = predicate
+
+    def select(self, value: Any, path: Path, root: Any) -> Iterator[Match]:
+        if self.kind == "names":
+            for name in self.names:
+                if isinstance(name, str):
+                    if isinstance(value, dict) and name in value:
+                        yield path + (name,), value[name]
+                elif isinstance(value, list) and -len(value) <= name < len(value):
+                    index = name % len(value)
+                    yield path + (index,), value[index]
+        elif self.kind == "wildcard":
+            yield from _children(value, path)
+        elif self.kind == "slice":
+            if isinstance(value, list):
+                start, stop, step = self.bounds
+                if step == 0:
+                    return
+                for i in range(*slice(start, stop, step).indices(len(value))):
+                    yield path + (i,), value[i]
+        else:
+            for child_path, child in _children(value, path):
+                if self.predicate(child, root):
+                    yield child_path, child
+
+class Query:
+    """A parsed query: a sequence of (selector, recursive) steps from the root"""
+
+    def __init__(self, expression: str, steps: List[Tuple[_Selector, bool]]):
+        self.expression = expression
+        self.steps = steps
+
+    @property
+    def uses_index(self) -> bool:
+        """Whether the query has a recursive descent that a QueryIndex speeds up"""
+        return any(recursive and selector.kind == "names" and all(isinstance(n, str) for n in selector.names)
+                   for selector, recursive in self.steps)
+
+    def iter_matches(self, root: Any, index: IndexSource = None) -> Iterator[Match]:
+        """Every (path, value) the query selects, in RFC 9535 order, produced lazily.
+
+        index is a QueryIndex of root, or a callable returning one that is only
+        called when the query needs it; without one, recursive descent walks the tree.
+        """
+        matches: Iterator[Match] = iter([((), root)])
+        for selector, recursive in self.steps:
+            matches = self._step(matches, selector, recursive, root, index)
+        return matches
+
+    def _step(self, matches: Iterator[Match], selector: _Selector, recursive: bool,
+              root: Any, index: IndexSource) -> Iterator[Match]:
+        if not recursive:
+            for path, value in matches:
+                yield from selector.select(value, path, root)
+            return
+        names_only = selector.kind == "names" and all(isinstance(n, str) for n in selector.names)
+        if names_only and index is not None:
+            if callable(index):
+                index = index()
+            for path, value in matches:
+                if not isinstance(value, (dict, list)):
+                    continue
+                node = index.node_id(path)
+                if node is None:
+                    continue
+                for member in index.members(selector.names, node):
+                    member_path = index.path(member)
+                    yield member_path, _value_at(root, member_path)
+            return
+        for path, value in matches:
+            for descendant_path, descendant in _descendants(value, path):
+                yield from selector.select(descendant, descendant_path, root)
+
+class _Parser:
+    """Recursive-descent parser for query expressions"""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.position = 0
+
+    def error(self, message: str) -> QueryError:
+        return QueryError(f"{message} at position {self.position + 1} of {self.text!r}")
+
+    def skip_spaces(self):
+        while self.position < len(self.text) and self.text[self.position].isspace():
+            self.position += 1
+
+    def peek(self, token: str) -> bool:
+        self.skip_spaces()
+        return self.text.startswith(token, self.position)
+
+    def accept(self, token: str) -> bool:
+        if self.peek(token):
+            self.position += len(token)
+            return True
+        return False
+
+    def expect(self, token: str):
+        if not self.accept(token):
+            raise self.error(f"Expected '{token}'")
+
+    def at_end(self) -> bool:
+        self.skip_spaces()
+        return self.position >= len(self.text)
+
+    def name(self) -> str:
+        match = _NAME.match(self.text, self.position)
+        if match is None:
+            raise self.error("Expected a member name")
+        self.position = match.end()
+        return match.group()
+
+    def string(self) -> str:
+        quote = self.text[self.position]
+        end = self.position + 1
+        while end < len(self.text) and self.text[end] != quote:
+            end += 2 if self.text[end] == '\\' else 1
+        if end >= len(self.text):
+            raise self.error("Unterminated string")
+        raw = self.text[self.position + 1:end]
+        self.position = end + 1
+        if quote == '"':
+            try:
+                return loads(f'"{raw}"')
+            except ValueError:
+                raise self.error("Invalid string escape") from None
+        # Single-quoted strings only escape the quote and the backslash
+        return raw.replace("\\'", "'").replace("\\\\", "\\")
+
+    def query(self) -> List[Tuple[_Selector, bool]]:
+        """A whole expression: $ (optional) followed by steps"""
+        steps = []
+        if not self.accept("$") and not self.peek("[") and not self.peek("."):
+            # JMESPath style: a leading member name is relative to the root
+            steps.append((_Selector("names", [self.name()]), False))
+        return steps + self.steps()
+
+    def steps(self, singular: bool = False) -> List[Tuple[_Selector, bool]]:
+        steps = []
+        while True:
+            if self.accept(".."):
+                if singular:
+                    raise self.error("Recursive descent is not allowed here")
+                if self.peek("["):
+                    steps.append((self.bracket(singular), True))
+                elif self.accept("*"):
+                    steps.append((_Selector("wildcard"), True))
+                else:
+                    steps.append((_Selector("names", [self.name()]), True))
+            elif self.accept("."):
+                if self.accept("*"):
+                    if singular:
+                        raise self.error("Wildcards are not allowed here")
+                    steps.append((_Selector("wildcard"), False))
+                else:
+                    steps.append((_Selector("names", [self.name()]), False))
+            elif self.peek("["):
+                steps.append((self.bracket(singular), False))
+            else:
+                return steps
+
+    def bracket(self, singular: bool = False) -> _Selector:
+        self.expect("[")
+        self.skip_spaces()
+        if self.accept("]"):
+            # JMESPath flatten projection, treated as a wildcard
+            selector = _Selector("wildcard")
+        elif self.accept("*"):
+            selector = _Selector("wildcard")
+            self.expect("]")
+        elif self.accept("?"):
+            selector = _Selector("filter", predicate=self.filter())
+            self.expect("]")
+        else:
+            slice_match = _SLICE.match(self.text, self.position)
+            if slice_match is not None and ':' in slice_match.group():
+                self.position = slice_match.end()
+                start, stop, step = (int(g) if g else None for g in slice_match.groups())
+                selector = _Selector("slice", bounds=(start, stop, step))
+            else:
+                names: List[PathPart] = [self.member()]
+                while self.accept(","):
+                    names.append(self.member())
+                selector = _Selector("names", names)
+            self.expect("]")
+        if singular and not (selector.kind == "names" and len(selector.names) == 1):
+            raise self.error("Only single names and indexes are allowed here")
+        return selector
+
+    def member(self) -> PathPart:
+        self.skip_spaces()
+        if self.position < len(self.text) and self.text[self.position] in "'\"":
+            return self.string()
+        match = _INDEX.match(self.text, self.position)
+        if match is None:
+            raise self.error("Expected a quoted name or an index")
+        self.position = match.end()
+        return int(match.group())
+
+    def filter(self) -> Callable[[Any, Any], bool]:
+        # Both [?(expr)] and [?expr] are accepted
+        return self.disjunction()
+
+    def disjunction(self) -> Callable[[Any, Any], bool]:
+        terms = [self.conjunction()]
+        while self.accept("||"):
+            terms.append(self.conjunction())
+        if len(terms) == 1:
+            return terms[0]
+        return lambda node, root: any(term(node, root) for term in terms)
+
+    def conjunction(self) -> Callable[[Any, Any], bool]:
+        terms = [self.negation()]
+        while self.accept("&&"):
+            terms.append(self.negation())
+        if len(terms) == 1:
+            return terms[0]
+        return lambda node, root: all(term(node, root) for term in terms)
+
+    def negation(self) -> Callable[[Any, Any], bool]:
+        if self.accept("!"):
+            term = self.negation()
+            return lambda node, root: not term(node, root)
+        if self.accept("("):
+            term = self.disjunction()
+            self.expect(")")
+            return term
+        return self.comparison()
+
+    def comparison(self) -> Callable[[Any, Any], bool]:
+        left = self.operand()
+        operator = next((op for op in _COMPARISONS if self.accept(op)), None)
+        if operator is None:
+            # A bare path tests for existence; a bare literal for truthiness
+            return lambda node, root: _truthy(left(node, root))
+        right = self.operand()
+        compare = _COMPARE[operator]
+        return lambda node, root: compare(left(node, root), right(node, root))
+
+    def operand(self) -> Callable[[Any, Any], Any]:
+        self.skip_spaces()
+        text, position = self.text, self.position
+        if position >= len(text):
+            raise self.error("Expected a value")
+        char = text[position]
+        if char in "@$":
+            self.position += 1
+            steps = self.steps(singular=True)
+            if char == "@":
+                return lambda node, root: _singular(node, steps)
+            return lambda node, root: _singular(root, steps)
+        if char in "'\"":
+            literal = self.string()
+            return lambda node, root: literal
+        if char == "`":
+            # JMESPath literal: JSON between backticks
+            end = text.find("`", position + 1)
+            if end < 0:
+                raise self.error("Unterminated literal")
+            try:
+                literal = loads(text[position + 1:end])
+            except ValueError:
+                raise self.error("Invalid JSON literal") from None
+            self.position = end + 1
+            return lambda node, root: literal
+        match = _NUMBER.match(text, position)
+        if match is not None:
+            self.position = match.end()
+            literal = loads(match.group())
+            return lambda node, root: literal
+        for word, literal in (("true", True), ("false", False), ("null", None)):
+            if text.startswith(word, position) and not _NAME.match(text, position + len(word)):
+                self.position += len(word)
+                return lambda node, root, literal=literal: literal
+        # JMESPath style: a bare field name refers to the current node
+        if _NAME.match(text, position) is None:
+            raise self.error("Expected a value")
+        steps = [(_Selector("names", [self.name()]), False)] + self.steps(singular=True)
+        return lambda node, root: _singular(node, steps)
+
+def _singular(value: Any, steps: List[Tuple[_Selector, bool]]) -> Any:
+    """Value at a singular path below value, or _MISSING"""
+    for selector, _ in steps:
+        name = selector.names[0]
+        if isinstance(name, str):
+            if not isinstance(value, dict) or name not in value:
+                return _MISSING
+            value = value[name]
+        else:
+            if not isinstance(value, list) or not -len(value) <= name < len(value):
+                return _MISSING
+            value = value[name]
+    return value
+
+def _truthy(value: Any) -> bool:
+    return value is not _MISSING and value is not False and value is not None
+
+def _comparable(a: Any, b: Any) -> bool:
+    if isinstance(a, bool) or isinstance(b, bool):
+        return False
+    numbers = (int, float)
+    return (isinstance(a, numbers) and isinstance(b, numbers)) or (isinstance(a, str) and isinstance(b, str))
+
+def _equal(a: Any, b: Any) -> bool:
+    if a is _MISSING or b is _MISSING:
+        return a is b
+    if isinstance(a, bool) or isinstance(b, bool):
+        return type(a) is type(b) and a == b
+    return a == b
+
+_COMPARE: Dict[str, Callable[[Any, Any], bool]] = {
+    "==": _equal,
+    "!=": lambda a, b: not _equal(a, b),
+    "<": lambda a, b: _comparable(a, b) and a < b,
+    "<=": lambda a, b: _comparable(a, b) and a <= b,
+    ">": lambda a, b: _comparable(a, b) and a > b,
+    ">=": lambda a, b: _comparable(a, b) and a >= b,
+}
+
+@lru_cache(maxsize=256)
+def compile_query(expression: str) -> Query:
+    """Parse a JSONPath (or JMESPath-style) expression; parsed queries are cached"""
+    if not expression.strip():
+        raise QueryError("Empty query")
+    parser = _Parser(expression)
+    steps = parser.query()
+    if not parser.at_end():
+        raise parser.error("Unexpected text")
+    return Query(expression, steps)
+
+def query_json(value: Any, expression: str, index: IndexSource = None) -> Iterator[Match]:
+    """Lazily evaluate a query against a parsed value"""
+    return compile_query(expression).iter_matches(value, index)
+
+def query_page(value: Any, expression: str, start: int = 0, count: int = 100,
+               index: IndexSource = None) -> Dict[str, Any]:
+    """One page of matches as rows of path, type, preview and value, evaluating no further than needed"""
+    matches = list(islice(query_json(value, expression, index), start, start + count + 1))
+    rows = [{
+        "path": format_path(list(path)),
+        "type": json_type_name(match),
+        "preview": preview_value(match),
+        "value": match,
+    } for path, match in matches[:count]]
+    return {"rows": rows, "start": start, "has_more": len(matches) > count}
@@ -0,0 +1,326 @@
+"""Schema inference: the merged structure of every value, emitted as JSON Schema.
+
+A ``SchemaAccumulator`` keeps one node per property path ("$.items[*].name"),
+counting the JSON types seen there, how often each property is present and
+the observed number, string-length and array-length ranges. Every element of
+an array is merged into the same items node, so optional fields, mixed types
+and nulls anywhere in an array of records show up. Values can be added as
+parsed trees or as an event stream from ``iter_events`` (one pass, memory
+proportional to the schema), and accumulators built over separate chunks
+merge into the one a single pass would have built, so large exports can be
+profiled in parallel.
+
+With ``sample_size``, arrays longer than that contribute a reservoir sample
+of their elements to the items schema; array lengths are still exact.
+"""
+import math
+import random
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .streaming import END_ARRAY, END_MAP, KEY, START_ARRAY, START_MAP, Event
+from .viewer import format_path
+
+SCHEMA_DIALECT = "https://json-schema.org/draft/2020-12/schema"
+# Order of the "type" keyword when a path holds several types
+JSON_TYPES = ["object", "array", "string", "integer", "number", "boolean", "null"]
+
+def _json_type(value: Any) -> str:
+    if value is None:
+        return "null"
+    value_type = type(value)
+    if value_type is str:
+        return "string"
+    if value_type is bool:
+        return "boolean"
+    if value_type is int:
+        return "integer"
+    if value_type is float:
+        return "number"
+    if isinstance(value, dict):
+        return "object"
+    if isinstance(value, list):
+        return "array"
+    if isinstance(value, bool):
+        return "boolean"
+    if isinstance(value, int):
+        return "integer"
+    if isinstance(value, float):
+        return "number"
+    return "string"
+
+def _merge_range(low: Optional[float], high: Optional[float], other_low: Optional[float],
+                 other_high: Optional[float]) -> Tuple[Optional[float], Optional[float]]:
+    if other_low is not None and (low is None or other_low < low):
+        low = other_low
+    if other_high is not None and (high is None or other_high > high):
+        high = other_high
+    return low, high
+
+class SchemaNode:
+    """Observations at one path: type counts, value ranges and child nodes"""
+
+    __slots__ = ('count', 'types', 'minimum', 'maximum', 'min_length', 'max_length',
+                 'min_items', 'max_items', 'properties', 'items', 'sampled')
+
+    def __init__(self):
+        self.count = 0
+        self.types: Dict[str, int] = {}
+        self.minimum: Optional[float] = None
+        self.maximum: Optional[float] = None
+        self.min_length: Optional[int] = None
+        self.max_length: Optional[int] = None
+        self.min_items: Optional[int] = None
+        self.max_items: Optional[int] = None
+        self.properties: Dict[str, "SchemaNode"] = {}
+        self.items: Optional["SchemaNode"] = None
+        # Whether some array here contributed only a sample of its elements
+        self.sampled = False
+
+    def observe_scalar(self, value: Any, json_type: str):
+        self.count += 1
+        self.types[json_type] = self.types.get(json_type, 0) + 1
+        if json_type == "string":
+            length = len(value)
+            if self.min_length is None or length < self.min_length:
+                self.min_length = length
+            if self.max_length is None or length > self.max_length:
+                self.max_length = length
+        elif (json_type == "integer" or json_type == "number") and math.isfinite(value):
+            if self.minimum is None or value < self.minimum:
+                self.minimum = value
+            if self.maximum is None or value > self.maximum:
+                self.maximum = value
+
+    def observe_array(self, size: int):
+        self.count += 1
+        self.types["array"] = self.types.get("array", 0) + 1
+        if self.min_items is None or size < self.min_items:
+            self.min_items = size
+        if self.max_items is None or size > self.max_items:
+            self.max_items = size
+
+    def observe_object(self):
+        self.count += 1
+        self.types["object"] = self.types.get("object", 0) + 1
+
+    def child(self, key: str) -> "SchemaNode":
+        node = self.properties.get(key)
+        if node is None:
+            node = self.properties[key] = SchemaNode()
+        return node
+
+    def item_node(self) -> "SchemaNode":
+        if self.items is None:
+            self.items = SchemaNode()
+        return self.items
+
+class SchemaAccumulator:
+    """Running schema of any number of values, mergeable across chunks"""
+
+    def __init__(self, sample_size: Optional[int] = None, seed: int = 0):
+        if sample_size is not None and sample_size < 1:
+            raise ValueError("Sample size must be at least 1")
+        self.sample_size = sample_size
+        self.root = SchemaNode()
+        self._random = random.Random(seed)
+
+    def _sampled(self, node: SchemaNode, values: List[Any]) -> List[Any]:
+        """The elements of an array that contribute to its items schema"""
+        if self.sample_size is None or len(values) <= self.sample_size:
+            return values
+        node.sampled = True
+        return [values[i] for i in sorted(self._random.sample(range(len(values)), self.sample_size))]
+
+    def add(self, value: Any, node: Optional[SchemaNode] = None):
+        """Merge the structure of a parsed value into the schema (at the root unless node is given).
+
+        Walks the tree once with an explicit stack, so deep documents do not hit the recursion limit.
+        """
+        pending = [(node or self.root, value)]
+        while pending:
+            target, value = pending.pop()
+            json_type = _json_type(value)
+            if json_type == "object":
+                target.observe_object()
+                # Pushed in reverse so that new properties are recorded in document order, as in add_events
+                children = [(target.child(key), child) for key, child in value.items()]
+                pending.extend(reversed(children))
+            elif json_type == "array":
+                target.observe_array(len(value))
+                if value:
+                    items = target.item_node()
+                    pending.extend((items, child) for child in reversed(self._sampled(target, value)))
+            else:
+                target.observe_scalar(value, json_type)
+
+    def add_events(self, events: Iterable[Event]):
+        """Merge a document given as iter_events events, keeping only the open containers.
+
+        Sub-tree events (from subtrees=True) are merged like parsed values.
+        With sample_size, the elements of long arrays that arrive as single
+        events are reservoir-sampled; larger elements are always merged.
+        """
+        # Per open container: [node, is_array, element count, reservoir, pending key]
+        frames: List[List[Any]] = []
+        for event, value in events:
+            if event == KEY:
+                frames[-1][4] = value
+                continue
+            if event == END_MAP or event == END_ARRAY:
+                node, is_array, size, reservoir, _ = frames.pop()
+                if is_array:
+                    node.observe_array(size)
+                    if reservoir:
+                        for element in reservoir:
+                            self.add(element, node.items)
+                    if self.sample_size is not None and size > self.sample_size:
+                        node.sampled = True
+                continue
+
+            # A value, or the start of one, at the current position
+            if not frames:
+                target = self.root
+            else:
+                frame = frames[-1]
+                if frame[1]:
+                    target = frame[0].item_node()
+                    frame[2] += 1
+                else:
+                    target = frame[0].child(frame[4])
+
+            if event == START_MAP:
+                target.observe_object()
+                frames.append([target, False, 0, None, None])
+            elif event == START_ARRAY:
+                frames.append([target, True, 0, [] if self.sample_size is not None else None, None])
+            elif frames and frames[-1][3] is not None:
+                # Reservoir sampling of the elements of the enclosing array
+                frame = frames[-1]
+                reservoir, seen = frame[3], frame[2]
+                if len(reservoir) < self.sample_size:
+                    reservoir.append(value)
+                else:
+                    slot = self._random.randrange(seen)
+                    if slot < self.sample_size:
+                        reservoir[slot] = value
+            else:
+                self.add(value, target)
+
+    def merge(self, other: "SchemaAccumulator") -> "SchemaAccumulator":
+        """Fold the observations of another accumulator into this one"""
+        pending = [(self.root, other.root)]
+        while pending:
+            target, source = pending.pop()
+            target.count += source.count
+            for json_type, count in source.types.items():
+                target.types[json_type] = target.types.get(json_type, 0) + count
+            target.minimum, target.maximum = _merge_range(
+                target.minimum, target.maximum, source.minimum, source.maximum)
+            target.min_length, target.max_length = _merge_range(
+                target.min_length, target.max_length, source.min_length, source.max_length)
+            target.min_items, target.max_items = _merge_range(
+                target.min_items, target.max_items, source.min_items, source.max_items)
+            target.sampled = target.sampled or source.sampled
+            for key, child in source.properties.items():
+                pending.append((target.child(key), child))
+            if source.items is not None:
+                pending.append((target.item_node(), source.items))
+        return self
+
+    def schema(self) -> Dict[str, Any]:
+        """The observations as a JSON Schema document.
+
+        Observed counts are kept in annotation keywords: "x-count" (values
+        seen), "x-types" (count per type, when there are several) and
+        "x-presence" (share of the parent objects that have the property).
+        """
+        result = _node_schema(self.root)
+        return {"$schema": SCHEMA_DIALECT, **result}
+
+def _node_schema(root: SchemaNode) -> Dict[str, Any]:
+    """Build the schema of a node and its descendants without recursion"""
+    root_schema: Dict[str, Any] = {}
+    pending: List[Tuple[SchemaNode, Dict[str, Any], Optional[float]]] = [(root, root_schema, None)]
+    while pending:
+        node, schema, presence = pending.pop()
+        types = [t for t in JSON_TYPES if t in node.types]
+        # Integers are numbers; "integer" alone is kept when no other number was seen
+        if "integer" in types and "number" in types:
+            types.remove("integer")
+        if len(types) == 1:
+            schema["type"] = types[0]
+        elif types:
+            schema["type"] = types
+        schema["x-count"] = node.count
+        if presence is not None:
+            schema["x-presence"] = presence
+        if len(node.types) > 1:
+            schema["x-types"] = {t: node.types[t] for t in JSON_TYPES if t in node.types}
+
+        if node.minimum is not None:
+            schema["minimum"] = node.minimum
+            schema["maximum"] = node.maximum
+        if node.min_length is not None:
+            schema["minLength"] = node.min_length
+            schema["maxLength"] = node.max_length
+        if node.min_items is not None:
+            schema["minItems"] = node.min_items
+            schema["maxItems"] = node.max_items
+            if node.sampled:
+                schema["x-sampled"] = True
+
+        objects = node.types.get("object", 0)
+        if node.properties:
+            properties: Dict[str, Any] = {}
+            for key, child in node.properties.items():
+                child_schema: Dict[str, Any] = {}
+                properties[key] = child_schema
+                pending.append((child, child_schema, round(child.count / objects, 4) if objects else 0))
+            schema["properties"] = properties
+            required = [key for key, child in node.properties.items() if child.count >= objects]
+            if required:
+                schema["required"] = required
+        if node.items is not None:
+            items_schema: Dict[str, Any] = {}
+            schema["items"] = items_schema
+            pending.append((node.items, items_schema, None))
+    return root_schema
+
+def infer_schema(value: Any, sample_size: Optional[int] = None, seed: int = 0) -> Dict[str, Any]:
+    """Infer a JSON Schema from a parsed value, merging every array element (or a sample of sample_size)"""
+    accumulator = SchemaAccumulator(sample_size, seed)
+    accumulator.add(value)
+    return accumulator.schema()
+
+def schema_paths(schema: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """One row per path of an inferred schema: path, types, presence and observed range"""
+    rows = []
+    pending = [("$", schema, None)]
+    while pending:
+        path, node, presence = pending.pop()
+        types = node.get("type", [])
+        type_counts = node.get("x-types")
+        if type_counts:
+            type_text = ", ".join(f"{t} ({n:,})" for t, n in type_counts.items())
+        else:
+            type_text = types if isinstance(types, str) else " | ".join(types)
+        value_range = ""
+        if "minimum" in node:
+            value_range = f"{node['minimum']} … {node['maximum']}"
+        elif "minLength" in node:
+            value_range = f"length {node['minLength']:,} … {node['maxLength']:,}"
+        elif "minItems" in node:
+            value_range = f"{node['minItems']:,} … {node['maxItems']:,} items"
+        rows.append({
+            "path": path,
+            "type": type_text or "no values",
+            "count": node.get("x-count", 0),
+            "presence": presence,
+            "range": value_range,
+        })
+        # Pushed in reverse so that rows come out in document order
+        if "items" in node:
+            pending.append((f"{path}[*]", node["items"], None))
+        for key, child in reversed(list(node.get("properties", {}).items())):
+            pending.append((path + format_path([key])[1:], child, child.get("x-presence")))
+    return rows
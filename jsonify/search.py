@@ -0,0 +1,245 @@
+"""Key and value search over parsed documents through an inverted index.
+
+``SearchIndex`` walks a document once and records, for every object key and
+every scalar value (strings as they are, numbers, booleans and null by their
+JSON text), the nodes where it occurs. Nodes are numbered in document order
+and keep a link to their parent, so a match's path is rebuilt only when it
+is shown. A term that occurs once is stored as a bare node id, which keeps
+documents with millions of distinct values affordable.
+
+Queries look at distinct terms rather than nodes: exact matches are a
+dictionary lookup, prefix matches bisect the sorted terms, and substring
+matches search one string holding every distinct term with ``str.find``,
+whose offsets are mapped back to terms. Case-insensitive variants of these
+structures are built on first use. The index is meant to be memoized per
+document (``ParsedDocument.derive``).
+"""
+import math
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from .backend import dumps
+from .viewer import PathPart, format_path, json_type_name, preview_value
+
+MODES = ["substring", "prefix", "exact"]
+SCOPES = ["all", "keys", "values"]
+
+# Separates terms in the substring search text; never part of a match
+_SEPARATOR = "\x00"
+
+# Node ids of one term: a single id, or a list of ids in document order
+Postings = Union[int, List[int]]
+
+def _scalar_term(value: Any) -> str:
+    """Text a scalar is searched by: strings as they are, other values as JSON"""
+    if isinstance(value, str):
+        return value
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, int):
+        return int.__repr__(value)
+    if isinstance(value, float) and math.isfinite(value):
+        return float.__repr__(value)
+    return dumps(value)
+
+class _TermTable:
+    """Distinct terms of one kind (keys or values), searchable by exact, prefix or substring match"""
+
+    def __init__(self, postings: Dict[str, Postings]):
+        self.postings = postings
+        self._lock = threading.Lock()
+        # Lookup structures per case sensitivity, built on first use
+        self._sorted: Dict[bool, List[str]] = {}
+        self._text: Dict[bool, Tuple[str, array, List[str]]] = {}
+        self._folded: Optional[Dict[str, Union[str, List[str]]]] = None
+
+    def _folded_terms(self) -> Dict[str, Union[str, List[str]]]:
+        """Casefolded term -> the original term that folds to it, or a list when there are several"""
+        if self._folded is None:
+            folded: Dict[str, Union[str, List[str]]] = {}
+            for term in self.postings:
+                key = term.casefold()
+                current = folded.get(key)
+                if current is None:
+                    folded[key] = term
+                elif isinstance(current, str):
+                    folded[key] = [current, term]
+                else:
+                    current.append(term)
+            self._folded = folded
+        return self._folded
+
+    def _sorted_terms(self, case_sensitive: bool) -> List[str]:
+        with self._lock:
+            if case_sensitive not in self._sorted:
+                source = self.postings if case_sensitive else self._folded_terms()
+                self._sorted[case_sensitive] = sorted(source)
+            return self._sorted[case_sensitive]
+
+    def _search_text(self, case_sensitive: bool) -> Tuple[str, array, List[str]]:
+        """All distinct terms joined by separators, with the offset where each starts"""
+        with self._lock:
+            if case_sensitive not in self._text:
+                terms = list(self.postings if case_sensitive else self._folded_terms())
+                offsets = array('q')
+                position = 0
+                for term in terms:
+                    offsets.append(position)
+                    position += len(term) + 1
+                self._text[case_sensitive] = (_SEPARATOR.join(terms), offsets, terms)
+            return self._text[case_sensitive]
+
+    def matching_terms(self, query: str, mode: str, case_sensitive: bool) -> Iterator[str]:
+        """The original terms that match query"""
+        if not case_sensitive:
+            query = query.casefold()
+        if mode == "exact":
+            found = [query] if query in (self.postings if case_sensitive else self._folded_terms()) else []
+        elif mode == "prefix":
+            terms = self._sorted_terms(case_sensitive)
+            # Every term starting with query sorts between query and query followed by the highest character
+            found = terms[bisect_left(terms, query):bisect_right(terms, query + "\U0010ffff")]
+        else:
+            found = self._substring(query, case_sensitive)
+        if case_sensitive:
+            return iter(found)
+        folded = self._folded_terms()
+        return (term for key in found
+                for term in ((folded[key],) if isinstance(folded[key], str) else folded[key]))
+
+    def _substring(self, query: str, case_sensitive: bool) -> Iterator[str]:
+        if _SEPARATOR in query:
+            return
+        text, offsets, terms = self._search_text(case_sensitive)
+        if not query:
+            yield from terms
+            return
+        position = text.find(query)
+        while position >= 0:
+            slot = bisect_right(offsets, position) - 1
+            yield terms[slot]
+            # Continue after the end of this term, so each term is reported once
+            position = text.find(query, offsets[slot] + len(terms[slot]) + 1)
+
+class SearchIndex:
+    """Inverted index of a document's keys and scalar values to the nodes holding them"""
+
+    def __init__(self, root: Any):
+        self.root = root
+        # Per node id (preorder): key in the parent object or index in the parent array, and parent id
+        self.keys: List[Optional[PathPart]] = [None]
+        self.parents = array('q', [-1])
+        key_postings: Dict[str, Postings] = {}
+        value_postings: Dict[str, Postings] = {}
+
+        keys, parents = self.keys, self.parents
+        if not isinstance(root, (dict, list)):
+            value_postings[_scalar_term(root)] = 0
+        # (node id, iterator over its remaining children) per open container
+        stack: List[Tuple[int, Iterator[Tuple[PathPart, Any]]]] = []
+        if isinstance(root, (dict, list)) and root:
+            stack.append((0, iter(root.items()) if isinstance(root, dict) else enumerate(root)))
+        while stack:
+            node, children = stack[-1]
+            for key, child in children:
+                child_id = len(keys)
+                keys.append(key)
+                parents.append(node)
+                # A term's first node is stored bare and becomes a list on its second
+                if isinstance(key, str):
+                    current = key_postings.get(key)
+                    if current is None:
+                        key_postings[key] = child_id
+                    elif isinstance(current, list):
+                        current.append(child_id)
+                    else:
+                        key_postings[key] = [current, child_id]
+                if isinstance(child, dict):
+                    if child:
+                        stack.append((child_id, iter(child.items())))
+                        break
+                elif isinstance(child, list):
+                    if child:
+                        stack.append((child_id, enumerate(child)))
+                        break
+                else:
+                    term = child if isinstance(child, str) else _scalar_term(child)
+                    current = value_postings.get(term)
+                    if current is None:
+                        value_postings[term] = child_id
+                    elif isinstance(current, list):
+                        current.append(child_id)
+                    else:
+                        value_postings[term] = [current, child_id]
+            else:
+                stack.pop()
+
+        self.key_terms = _TermTable(key_postings)
+        self.value_terms = _TermTable(value_postings)
+
+    @property
+    def node_count(self) -> int:
+        return len(self.parents)
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the index, not counting the document"""
+        terms = len(self.key_terms.postings) + len(self.value_terms.postings)
+        return len(self.parents) * 16 + terms * 100
+
+    def path(self, node: int) -> List[PathPart]:
+        """Path of a node, rebuilt from its parent links"""
+        parts: List[PathPart] = []
+        while node > 0:
+            parts.append(self.keys[node])
+            node = self.parents[node]
+        parts.reverse()
+        return parts
+
+    def value(self, node: int) -> Any:
+        value = self.root
+        for part in self.path(node):
+            value = value[part]
+        return value
+
+    def search(self, query: str, mode: str = "substring", scope: str = "all",
+               case_sensitive: bool = False) -> List[Tuple[int, str]]:
+        """(node id, "key" or "value") of every match in document order; a node matching twice is listed once"""
+        if mode not in MODES:
+            raise ValueError(f"Unknown search mode: {mode}")
+        if scope not in SCOPES:
+            raise ValueError(f"Unknown search scope: {scope}")
+        matches: Dict[int, str] = {}
+        tables = []
+        if scope != "values":
+            tables.append(("key", self.key_terms))
+        if scope != "keys":
+            tables.append(("value", self.value_terms))
+        for kind, table in tables:
+            for term in table.matching_terms(query, mode, case_sensitive):
+                postings = table.postings[term]
+                for node in ((postings,) if isinstance(postings, int) else postings):
+                    matches.setdefault(node, kind)
+        return sorted(matches.items())
+
+def search_page(index: SearchIndex, query: str, mode: str = "substring", scope: str = "all",
+                case_sensitive: bool = False, start: int = 0, count: int = 100) -> Dict[str, Any]:
+    """One page of matches as rows of path, match kind, type and preview, plus the total"""
+    matches = index.search(query, mode, scope, case_sensitive)
+    rows = []
+    for node, kind in islice(matches, start, start + count):
+        parts = index.path(node)
+        value = index.value(node)
+        rows.append({
+            "path": format_path(parts),
+            "match": kind,
+            "key": parts[-1] if parts else None,
+            "type": json_type_name(value),
+            "preview": preview_value(value),
+        })
+    return {"rows": rows, "start": start, "total": len(matches)}
@@ -0,0 +1,69 @@
+"""Uploads spooled to a temporary file and memory-mapped.
+
+``read()`` on an upload gives every session its own bytes copy, and decoding it
+makes a second one. A ``SpooledUpload`` copies the upload once, in chunks, to
+an anonymous temporary file and maps it read-only. Hashing, parsing and
+streaming then read the mapped pages, which the operating system keeps in its
+page cache and can evict under memory pressure instead of holding them in
+the Python heap. The buffer supports slicing and the buffer protocol, so it
+can be passed to ``loads``, ``document_hash`` and ``decode_bytes``.
+"""
+import mmap
+import tempfile
+from typing import BinaryIO, Iterator, Optional
+
+from .encoding import Buffer
+from .streaming import CHUNK_SIZE
+
+def iter_buffer_chunks(buffer: Buffer, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Slices of a bytes-like buffer, chunk_size bytes at a time"""
+    for start in range(0, len(buffer), chunk_size):
+        yield buffer[start:start + chunk_size]
+
+class SpooledUpload:
+    """The contents of a binary file, copied to disk and mapped read-only"""
+
+    def __init__(self, source: BinaryIO, chunk_size: int = CHUNK_SIZE):
+        self._file = tempfile.TemporaryFile(prefix="jsonify-upload-")
+        self._map: Optional[mmap.mmap] = None
+        try:
+            for chunk in iter(lambda: source.read(chunk_size), b""):
+                self._file.write(chunk)
+            self._file.flush()
+            self.size = self._file.tell()
+            # Empty files cannot be mapped
+            if self.size:
+                self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except BaseException:
+            self._file.close()
+            raise
+
+    @property
+    def buffer(self) -> Buffer:
+        """The mapped contents; valid until close"""
+        if self._file.closed:
+            raise ValueError("Spooled upload is closed")
+        return self._map if self._map is not None else b""
+
+    def __len__(self) -> int:
+        return self.size
+
+    def iter_chunks(self, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        """The contents chunk_size bytes at a time, for streaming passes"""
+        return iter_buffer_chunks(self.buffer, chunk_size)
+
+    def close(self):
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                # A view of the map is still alive; the pages are unmapped when it is collected
+                pass
+            self._map = None
+        self._file.close()
+
+    def __enter__(self) -> "SpooledUpload":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
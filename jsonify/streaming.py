@@ -0,0 +1,504 @@
+"""Incremental JSON tokenizer for documents too large to hold as a parsed tree.
+
+Text is consumed chunk by chunk and turned into a flat stream of events::
+
+    ('start_map', None)  ('key', 'name')  ('value', 'Ada')  ('end_map', None)
+
+Validation, analysis and re-serialization are built on top of that stream, so
+memory stays proportional to the chunk size and nesting depth rather than to
+the size of the document.
+"""
+import json
+import re
+from json.decoder import JSONDecoder, scanstring
+from json.encoder import encode_basestring, encode_basestring_ascii
+from json.scanner import make_scanner
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .analysis import AnalysisAccumulator
+from .backend import dumps
+from .encoding import iter_decoded
+
+CHUNK_SIZE = 1024 * 1024
+
+START_MAP = 'start_map'
+END_MAP = 'end_map'
+START_ARRAY = 'start_array'
+END_ARRAY = 'end_array'
+KEY = 'key'
+VALUE = 'value'
+
+Event = Tuple[str, Any]
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_NUMBER = re.compile(r'(-?(?:0|[1-9]\d*))(\.\d+)?([eE][-+]?\d+)?')
+_STRING_END = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+# Fast path covering the common tokens in one regex call; escaped strings and
+# tokens near the end of the buffer fall back to the slower general path
+_TOKEN = re.compile(r'''[ \t\n\r]*(?:
+    ([{}\[\]:,])
+  | "([^"\\\x00-\x1f]*)"
+  | (-?(?:0|[1-9]\d*))(\.\d+)?([eE][-+]?\d+)?
+  | (true|false|null)
+)''', re.VERBOSE)
+# The same tokens as they are spelled, for reformatting without decoding; strings
+# with invalid escapes or control characters fall back to the general path
+_RAW_TOKEN = re.compile(r'''[ \t\n\r]*(?:
+    ([{}\[\]:,])
+  | ("[^"\\\x00-\x1f]*(?:\\(?:["\\/bfnrt]|u[0-9a-fA-F]{4})[^"\\\x00-\x1f]*)*")
+  | (-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][-+]?\d+)?)
+  | (true|false|null)
+)''', re.VERBOSE)
+_WHITESPACE_BYTES = b' \t\n\r'
+_scan_value = make_scanner(JSONDecoder())
+_MISSING = object()
+
+_CONSTANTS = {
+    'true': True,
+    'false': False,
+    'null': None,
+    'NaN': float('nan'),
+    'Infinity': float('inf'),
+    '-Infinity': float('-inf'),
+}
+
+class StreamDecodeError(json.JSONDecodeError):
+    """JSONDecodeError raised without access to the full document text"""
+
+    def __init__(self, msg: str, pos: int, lineno: int, colno: int):
+        ValueError.__init__(self, f"{msg}: line {lineno} column {colno} (char {pos})")
+        self.msg = msg
+        self.doc = ''
+        self.pos = pos
+        self.lineno = lineno
+        self.colno = colno
+
+    def __reduce__(self):
+        return self.__class__, (self.msg, self.pos, self.lineno, self.colno)
+
+class _Tokenizer:
+    """Splits a stream of text chunks into JSON tokens"""
+
+    def __init__(self, chunks: Iterable[str]):
+        self._chunks = iter(chunks)
+        self.buf = ''
+        self.pos = 0
+        self.offset = 0          # absolute position of buf[0]
+        self.lines = 0           # newlines before buf[0]
+        self.line_start = 0      # absolute position just after the last dropped newline
+        self.eof = False
+        self.token_start = 0
+
+    def _fill(self) -> bool:
+        """Append the next chunk, dropping consumed text; False once input is exhausted"""
+        if self.eof:
+            return False
+        for chunk in self._chunks:
+            if not chunk:
+                continue
+            consumed = self.buf[:self.pos]
+            newlines = consumed.count('\n')
+            if newlines:
+                self.lines += newlines
+                self.line_start = self.offset + consumed.rindex('\n') + 1
+            self.offset += self.pos
+            self.buf = self.buf[self.pos:] + chunk
+            self.pos = 0
+            return True
+        self.eof = True
+        return False
+
+    def error(self, msg: str, pos: Optional[int] = None) -> StreamDecodeError:
+        """Build an error located at an absolute position inside the current buffer"""
+        pos = self.token_start if pos is None else pos
+        local = pos - self.offset
+        lineno = self.lines + self.buf.count('\n', 0, local) + 1
+        last_newline = self.buf.rfind('\n', 0, local)
+        line_start = self.offset + last_newline + 1 if last_newline >= 0 else self.line_start
+        return StreamDecodeError(msg, pos, lineno, pos - line_start + 1)
+
+    def next_token(self) -> Tuple[Optional[str], Any]:
+        """Return (kind, value): kind is a structural character, 's' for strings,
+        'v' for other scalars, '?' for unexpected input, or None at the end"""
+        buf = self.buf
+        match = _TOKEN.match(buf, self.pos)
+        if match is not None and match.end() < len(buf) - 2:
+            group = match.lastindex
+            # Where the token starts: a number at its integer part, a string at its opening quote
+            if group == 2:
+                start = match.start(2) - 1
+            elif group == 4 or group == 5:
+                start = match.start(3)
+            else:
+                start = match.start(group)
+            self.token_start = self.offset + start
+            self.pos = match.end()
+            if group == 1:
+                return match.group(1), None
+            if group == 2:
+                return 's', match.group(2)
+            if group == 6:
+                return 'v', _CONSTANTS[match.group(6)]
+            integer, frac, exp = match.group(3, 4, 5)
+            if frac or exp:
+                return 'v', float(integer + (frac or '') + (exp or ''))
+            return 'v', int(integer)
+        return self._next_token_slow(True)
+
+    def next_raw_token(self) -> Tuple[Optional[str], str]:
+        """Return (kind, text) like next_token, with the token as it is spelled in the input"""
+        buf = self.buf
+        match = _RAW_TOKEN.match(buf, self.pos)
+        if match is not None and match.end() < len(buf) - 2:
+            group = match.lastindex
+            self.token_start = self.offset + match.start(group)
+            self.pos = match.end()
+            text = match.group(group)
+            return (text if group == 1 else 's' if group == 2 else 'v'), text
+        kind, _ = self._next_token_slow(False)
+        if kind is None or kind == '?':
+            return kind, ''
+        return kind, self.buf[self.token_start - self.offset:self.pos]
+
+    def _next_token_slow(self, decode: bool) -> Tuple[Optional[str], Any]:
+        """General path of next_token, reading more input when a token may be cut off.
+        Without decode, tokens are validated but numbers are not converted"""
+        while True:
+            buf = self.buf
+            pos = _WHITESPACE.match(buf, self.pos).end()
+            self.pos = pos
+            self.token_start = self.offset + pos
+            if pos == len(buf):
+                if self._fill():
+                    continue
+                return None, None
+
+            char = buf[pos]
+            if char in '{}[]:,':
+                self.pos = pos + 1
+                return char, None
+
+            if char == '"':
+                if _STRING_END.match(buf, pos + 1) is None:
+                    if self._fill():
+                        continue
+                    raise self.error("Unterminated string starting at")
+                try:
+                    value, end = scanstring(buf, pos + 1, True)
+                except json.JSONDecodeError as e:
+                    raise self.error(e.msg, self.offset + e.pos)
+                self.pos = end
+                return 's', value
+
+            match = _NUMBER.match(buf, pos)
+            if match is not None and not buf.startswith('-Infinity', pos):
+                # A number ending within two characters of the buffer may continue ("1." + "5")
+                if len(buf) - match.end() <= 2 and self._fill():
+                    continue
+                integer, frac, exp = match.groups()
+                self.pos = match.end()
+                if not decode:
+                    return 'v', None
+                if frac or exp:
+                    return 'v', float(integer + (frac or '') + (exp or ''))
+                return 'v', int(integer)
+
+            for literal, value in _CONSTANTS.items():
+                if buf.startswith(literal, pos):
+                    self.pos = pos + len(literal)
+                    return 'v', value
+            if len(buf) - pos < 9 and not self.eof and any(
+                    literal.startswith(buf[pos:]) for literal in _CONSTANTS):
+                if self._fill():
+                    continue
+            # Not a token; the parser reports an error that depends on what it expected
+            return '?', None
+
+    def next_subtree(self, raw: bool = False) -> Any:
+        """Decode the next value in one C-level call if it is a container that is
+        already complete in the buffer; otherwise return _MISSING and consume nothing.
+        With raw, return the value together with its text"""
+        buf = self.buf
+        pos = _WHITESPACE.match(buf, self.pos).end()
+        if pos == len(buf) or buf[pos] not in '{[':
+            return _MISSING
+        try:
+            value, end = _scan_value(buf, pos)
+        except (StopIteration, ValueError, RecursionError):
+            # Truncated by the end of the buffer, or invalid: the token path decides
+            return _MISSING
+        self.token_start = self.offset + pos
+        self.pos = end
+        return (value, buf[pos:end]) if raw else value
+
+# Parser states
+_EXPECT_VALUE, _EXPECT_VALUE_OR_END, _EXPECT_KEY, _EXPECT_KEY_OR_END, \
+    _EXPECT_COLON, _EXPECT_COMMA_OR_END, _EXPECT_EOF = range(7)
+
+def iter_events(chunks: Iterable[str], subtrees: bool = False, raw: bool = False) -> Iterator[Event]:
+    """Parse text chunks into events, raising StreamDecodeError on invalid JSON.
+
+    With subtrees=True, containers that fit entirely in the read buffer are
+    decoded by the C parser and yielded as a single ('value', dict_or_list)
+    event, which is much faster; memory stays bounded by the buffer size.
+    With raw=True, keys and scalar values are not decoded but yielded as they
+    are spelled in the input (strings with their quotes and escapes), and
+    sub-tree events carry a (value, text) pair.
+    """
+    tokens = _Tokenizer(chunks)
+    next_token = tokens.next_raw_token if raw else tokens.next_token
+    stack: List[str] = []
+    expect = _EXPECT_VALUE
+
+    while True:
+        if subtrees and (expect == _EXPECT_VALUE or expect == _EXPECT_VALUE_OR_END):
+            value = tokens.next_subtree(raw)
+            if value is not _MISSING:
+                yield VALUE, value
+                expect = _EXPECT_COMMA_OR_END if stack else _EXPECT_EOF
+                continue
+
+        kind, value = next_token()
+        if kind is None and expect == _EXPECT_EOF:
+            return
+        # An early end of input matches nothing below and is reported as what was expected
+
+        if expect == _EXPECT_VALUE or expect == _EXPECT_VALUE_OR_END:
+            if kind == 's' or kind == 'v':
+                yield VALUE, value
+            elif kind == '{':
+                stack.append('{')
+                yield START_MAP, None
+                expect = _EXPECT_KEY_OR_END
+                continue
+            elif kind == '[':
+                stack.append('[')
+                yield START_ARRAY, None
+                expect = _EXPECT_VALUE_OR_END
+                continue
+            elif kind == ']' and expect == _EXPECT_VALUE_OR_END:
+                stack.pop()
+                yield END_ARRAY, None
+            else:
+                raise tokens.error("Expecting value")
+
+        elif expect == _EXPECT_KEY or expect == _EXPECT_KEY_OR_END:
+            if kind == 's':
+                yield KEY, value
+                expect = _EXPECT_COLON
+                continue
+            elif kind == '}' and expect == _EXPECT_KEY_OR_END:
+                stack.pop()
+                yield END_MAP, None
+            else:
+                raise tokens.error("Expecting property name enclosed in double quotes")
+
+        elif expect == _EXPECT_COLON:
+            if kind != ':':
+                raise tokens.error("Expecting ':' delimiter")
+            expect = _EXPECT_VALUE
+            continue
+
+        elif expect == _EXPECT_COMMA_OR_END:
+            top = stack[-1]
+            if kind == ',':
+                expect = _EXPECT_KEY if top == '{' else _EXPECT_VALUE
+                continue
+            elif kind == '}' and top == '{':
+                stack.pop()
+                yield END_MAP, None
+            elif kind == ']' and top == '[':
+                stack.pop()
+                yield END_ARRAY, None
+            else:
+                raise tokens.error("Expecting ',' delimiter")
+
+        else:
+            raise tokens.error("Extra data")
+
+        # A value just finished
+        expect = _EXPECT_COMMA_OR_END if stack else _EXPECT_EOF
+
+def iter_text_chunks(binary_file: BinaryIO, encoding: Optional[str] = None,
+                     chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+    """Decode a binary file incrementally into text chunks, detecting the encoding unless given"""
+    return iter_decoded(iter(lambda: binary_file.read(chunk_size), b''), encoding)
+
+def stream_validate(chunks: Iterable[str]) -> Tuple[bool, str]:
+    """Validate a streamed document and return status with message"""
+    try:
+        for _ in iter_events(chunks):
+            pass
+        return True, "Valid JSON"
+    except (json.JSONDecodeError, UnicodeDecodeError) as e:
+        return False, f"Invalid JSON: {str(e)}"
+
+def stream_analyze(events: Iterable[Event]) -> Dict[str, Any]:
+    """Compute the analyze_json metrics from an event stream in O(depth) memory"""
+    stats = AnalysisAccumulator()
+    # One entry per open container: item count for arrays, -1 for objects
+    open_items: List[int] = []
+
+    for event, value in events:
+        if event == KEY:
+            stats.total_keys += 1
+            continue
+        if event == END_MAP:
+            open_items.pop()
+            continue
+        if event == END_ARRAY:
+            stats.add_array_length(open_items.pop())
+            continue
+
+        in_array = bool(open_items) and open_items[-1] >= 0
+        if in_array:
+            open_items[-1] += 1
+
+        if event == VALUE:
+            if isinstance(value, (dict, list)):
+                stats.add(value, len(open_items))
+            elif type(value) is str and open_items:
+                stats.add_string(value)
+            # Object values count towards the type histogram even when they are containers
+            if open_items and not (in_array and isinstance(value, (dict, list))):
+                stats.count_type(type(value))
+            continue
+
+        if open_items and not in_array:
+            stats.count_type(dict if event == START_MAP else list)
+        if len(open_items) > stats.max_depth:
+            stats.max_depth = len(open_items)
+        if event == START_MAP:
+            stats.objects += 1
+            open_items.append(-1)
+        else:
+            open_items.append(0)
+
+    return stats.result()
+
+def _encode_scalar(value: Any, encode_string) -> str:
+    if isinstance(value, str):
+        return encode_string(value)
+    if value is True:
+        return 'true'
+    if value is False:
+        return 'false'
+    if value is None:
+        return 'null'
+    if isinstance(value, float):
+        if value != value:
+            return 'NaN'
+        if value in (float('inf'), float('-inf')):
+            return 'Infinity' if value > 0 else '-Infinity'
+        return float.__repr__(value)
+    return int.__repr__(value)
+
+def _respell_string(text: str) -> str:
+    """Escape the non-ASCII characters of a raw string token"""
+    return encode_basestring_ascii(scanstring(text, 1, True)[0]) if not text.isascii() else text
+
+def _raw_scalar(text: str) -> str:
+    return text
+
+def _reformat_subtree(value: Any, text: str, indent: Optional[int], ensure_ascii: bool) -> str:
+    """Reformat the text of a complete container, through the serializer backend when
+    its output keeps every token as spelled, otherwise token by token.
+
+    The backend never escapes spaces, so its output equals the text once all
+    whitespace is dropped from both only if every token is spelled the same.
+    """
+    candidate = dumps(value, indent=indent, ensure_ascii=ensure_ascii,
+                      separators=(',', ':') if indent is None else None)
+    # Deleting from bytes is several times faster than str.translate
+    if (candidate.encode('utf-8', 'surrogatepass').translate(None, _WHITESPACE_BYTES)
+            == text.encode('utf-8', 'surrogatepass').translate(None, _WHITESPACE_BYTES)):
+        return candidate
+    return ''.join(stream_format(iter_events([text], raw=True), indent=indent,
+                                 ensure_ascii=ensure_ascii, raw=True))
+
+def stream_format(events: Iterable[Event], indent: Optional[int] = None,
+                  ensure_ascii: bool = False, batch_size: int = 64 * 1024,
+                  raw: bool = False) -> Iterator[str]:
+    """Serialize an event stream as json.dumps would, without building the tree.
+
+    With indent=None the output is minified (separators ',' and ':'); otherwise it
+    matches json.dumps(obj, indent=indent). Sub-tree events are encoded through
+    the serializer backend. Key sorting needs the whole object and is not supported.
+    raw says that the events come from iter_events(raw=True); their tokens are
+    written as spelled, except that ensure_ascii escapes non-ASCII strings.
+    """
+    if raw:
+        encode_string = _respell_string if ensure_ascii else _raw_scalar
+    else:
+        encode_string = encode_basestring_ascii if ensure_ascii else encode_basestring
+    key_separator = ':' if indent is None else ': '
+    pad = '' if indent is None else ' ' * indent
+    pieces: List[str] = []
+    size = 0
+    # Per open container: True until its first item has been written
+    first: List[bool] = []
+    after_key = False
+
+    for event, value in events:
+        if event == END_MAP or event == END_ARRAY:
+            closer = '}' if event == END_MAP else ']'
+            if not first.pop() and indent is not None:
+                pieces.append('\n' + pad * len(first) + closer)
+            else:
+                pieces.append(closer)
+            after_key = False
+        else:
+            if after_key:
+                after_key = False
+            elif first:
+                prefix = '' if first[-1] else ','
+                first[-1] = False
+                if indent is not None:
+                    prefix += '\n' + pad * len(first)
+                if prefix:
+                    pieces.append(prefix)
+
+            if event == KEY:
+                pieces.append(encode_string(value) + key_separator)
+                after_key = True
+            elif event == VALUE:
+                if raw and type(value) is str:
+                    pieces.append(encode_string(value) if value[0] == '"' else value)
+                elif raw or isinstance(value, (dict, list)):
+                    if raw:
+                        text = _reformat_subtree(value[0], value[1], indent, ensure_ascii)
+                    else:
+                        text = dumps(value, indent=indent, ensure_ascii=ensure_ascii,
+                                     separators=(',', ':') if indent is None else None)
+                    # Encoded strings never contain raw newlines, so this only shifts line starts
+                    if indent is not None and first:
+                        text = text.replace('\n', '\n' + pad * len(first))
+                    pieces.append(text)
+                else:
+                    pieces.append(_encode_scalar(value, encode_string))
+            else:
+                pieces.append('{' if event == START_MAP else '[')
+                first.append(True)
+
+        size += 1
+        if size >= batch_size:
+            yield ''.join(pieces)
+            pieces = []
+            size = 0
+
+    if pieces:
+        yield ''.join(pieces)
+
+def stream_reformat(chunks: Iterable[str], indent: Optional[int] = None,
+                    ensure_ascii: bool = False) -> Iterator[str]:
+    """Minify (indent=None) or re-indent JSON text chunk by chunk, validating it on the way.
+
+    Only whitespace changes: numbers, strings and duplicate keys keep their exact
+    spelling, and memory stays proportional to the chunk size and nesting depth.
+    """
+    events = iter_events(chunks, subtrees=True, raw=True)
+    return stream_format(events, indent=indent, ensure_ascii=ensure_ascii, raw=True)
+
+def reformat_text(text: str, indent: Optional[int] = None, ensure_ascii: bool = False) -> str:
+    """Minify or re-indent a JSON document without parsing it into Python values"""
+    return ''.join(stream_reformat([text], indent=indent, ensure_ascii=ensure_ascii))
@@ -0,0 +1,572 @@
+"""JSON Schema validation through compiled, cached validators.
+
+Generic validators walk the schema for every document, looking up keywords
+and dispatching on them as they go. ``compile_schema`` does that walk once:
+every subschema becomes a chain of small closures that only hold the checks
+the schema actually uses, with patterns compiled, enum and const values
+hashed and ``$ref`` targets resolved. Validating a document then only runs
+those closures. Compiled validators are kept in an LRU cache keyed by a hash
+of the schema, so the app and NDJSON worker processes compile each schema
+once however many documents they check.
+
+Validation reports every violation with its JSONPath and JSON Pointer rather
+than stopping at the first, up to an optional limit. ``anyOf``, ``oneOf``,
+``not`` and ``if`` stop probing a subschema at its first violation.
+
+Draft 2020-12 keywords are supported along with the draft 7 spellings
+(``definitions``, array-form ``items``, ``additionalItems``,
+``dependencies``). ``format`` is treated as an annotation, as 2020-12 does
+by default. ``unevaluatedProperties``, ``unevaluatedItems``, dynamic
+references and references outside the schema raise ``SchemaError``.
+"""
+import math
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from .backend import dumps, loads
+from .cache import document_hash
+from .patch import JsonPatchError, format_pointer, resolve_pointer
+from .viewer import format_path, preview_value
+
+# Instance location as a linked list of (parent, key) pairs, built only on the way down
+Location = Optional[Tuple[Any, Union[str, int]]]
+Check = Callable[[Any, Location, List[Dict[str, Any]]], None]
+
+UNSUPPORTED_KEYWORDS = ["unevaluatedProperties", "unevaluatedItems", "$dynamicRef", "$recursiveRef"]
+
+# JSON type of each parsed Python type; integral floats also count as integers
+_TYPE_NAMES = {dict: "object", list: "array", str: "string", bool: "boolean",
+               int: "integer", float: "number", type(None): "null"}
+
+class SchemaError(ValueError):
+    """A schema that is malformed or uses features the compiler does not support"""
+
+class _Enough(Exception):
+    """Raised by a collector once it holds as many violations as were asked for"""
+
+class _Collector(list):
+    """Violation list that stops validation when its limit is reached"""
+
+    def __init__(self, limit: float):
+        super().__init__()
+        self.limit = limit
+
+    def append(self, violation: Dict[str, Any]):
+        list.append(self, violation)
+        if len(self) >= self.limit:
+            raise _Enough
+
+def _json_type(value: Any) -> str:
+    name = _TYPE_NAMES.get(type(value))
+    if name is not None:
+        return name
+    for python_type, name in _TYPE_NAMES.items():
+        if isinstance(value, python_type):
+            return name
+    return "string"
+
+def _canonical(value: Any) -> Any:
+    """Hashable key under which JSON-equal values are equal (true is not 1, 1 is 1.0)"""
+    if isinstance(value, bool):
+        return (bool, value)
+    if isinstance(value, dict):
+        return (dict, frozenset((key, _canonical(child)) for key, child in value.items()))
+    if isinstance(value, list):
+        return (list, tuple(_canonical(child) for child in value))
+    return value
+
+def _parts(location: Location) -> List[Union[str, int]]:
+    parts = []
+    while location is not None:
+        location, key = location
+        parts.append(key)
+    parts.reverse()
+    return parts
+
+def _violation(location: Location, keyword: str, message: str) -> Dict[str, Any]:
+    parts = _parts(location)
+    return {"path": format_path(parts), "pointer": format_pointer(parts), "keyword": keyword, "message": message}
+
+def _passes(check: Optional[Check], value: Any, location: Location) -> bool:
+    """Whether value satisfies a compiled subschema, stopping at its first violation"""
+    if check is None:
+        return True
+    probe = _Collector(1)
+    try:
+        check(value, location, probe)
+    except _Enough:
+        return False
+    return True
+
+def _chain(checks: List[Check]) -> Optional[Check]:
+    if not checks:
+        return None
+    if len(checks) == 1:
+        return checks[0]
+    checks = tuple(checks)
+
+    def check_all(value, location, errors):
+        for check in checks:
+            check(value, location, errors)
+    return check_all
+
+def _number(schema: Dict[str, Any], keyword: str) -> Union[int, float]:
+    value = schema[keyword]
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise SchemaError(f"'{keyword}' must be a number")
+    return value
+
+def _count(schema: Dict[str, Any], keyword: str) -> int:
+    value = schema[keyword]
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    if isinstance(value, bool) or not isinstance(value, int) or value < 0:
+        raise SchemaError(f"'{keyword}' must be a non-negative integer")
+    return value
+
+class _Compiler:
+    """Turns one schema document into checks, resolving references within it"""
+
+    def __init__(self, root: Any):
+        self.root = root
+        self.refs: Dict[str, Check] = {}
+
+    def compile(self, schema: Any) -> Optional[Check]:
+        """Compile a subschema; None means it accepts everything"""
+        if schema is True:
+            return None
+        if schema is False:
+            def reject(value, location, errors):
+                errors.append(_violation(location, "false", "No value is allowed here"))
+            return reject
+        if not isinstance(schema, dict):
+            raise SchemaError(f"A schema must be an object or a boolean, not {_json_type(schema)}")
+        for keyword in UNSUPPORTED_KEYWORDS:
+            if keyword in schema:
+                raise SchemaError(f"'{keyword}' is not supported")
+
+        checks: List[Check] = []
+        if "$ref" in schema:
+            checks.append(self._ref(schema["$ref"]))
+        if "type" in schema:
+            checks.append(self._type(schema["type"]))
+        if "enum" in schema:
+            checks.append(self._enum(schema["enum"]))
+        if "const" in schema:
+            checks.append(self._const(schema["const"]))
+        checks.extend(self._numeric(schema))
+        checks.extend(self._string(schema))
+        checks.extend(self._array(schema))
+        checks.extend(self._object(schema))
+        checks.extend(self._combinators(schema))
+        return _chain(checks)
+
+    def _ref(self, ref: Any) -> Check:
+        if not isinstance(ref, str) or not ref.startswith("#"):
+            raise SchemaError(f"Only references within the schema are supported, not {ref!r}")
+        pointer = ref[1:]
+        if pointer not in self.refs:
+            # Registered before compiling the target so recursive schemas terminate
+            target: List[Optional[Check]] = [None]
+
+            def follow(value, location, errors):
+                if target[0] is not None:
+                    target[0](value, location, errors)
+            self.refs[pointer] = follow
+            try:
+                resolved = resolve_pointer(self.root, pointer)
+            except JsonPatchError:
+                raise SchemaError(f"Reference {ref!r} does not resolve") from None
+            target[0] = self.compile(resolved)
+        return self.refs[pointer]
+
+    def _type(self, types: Any) -> Check:
+        names = [types] if isinstance(types, str) else types
+        if not isinstance(names, list) or not all(isinstance(name, str) for name in names):
+            raise SchemaError("'type' must be a type name or an array of type names")
+        allowed = set(names)
+        unknown = allowed - set(_TYPE_NAMES.values())
+        if unknown:
+            raise SchemaError(f"Unknown type {sorted(unknown)[0]!r}")
+        expected = types if isinstance(types, str) else " or ".join(types)
+        if "number" in allowed:
+            allowed.add("integer")
+        integral = "integer" in allowed and "number" not in allowed
+
+        def check_type(value, location, errors):
+            actual = _json_type(value)
+            if actual in allowed or (integral and actual == "number" and value.is_integer()):
+                return
+            errors.append(_violation(location, "type", f"Expected {expected}, got {actual}"))
+        return check_type
+
+    def _enum(self, options: Any) -> Check:
+        if not isinstance(options, list):
+            raise SchemaError("'enum' must be an array")
+        allowed = {_canonical(option) for option in options}
+        listed = ", ".join(preview_value(option, 20) for option in options[:5])
+        if len(options) > 5:
+            listed += ", …"
+
+        def check_enum(value, location, errors):
+            if _canonical(value) not in allowed:
+                errors.append(_violation(location, "enum", f"{preview_value(value, 40)} is not one of {listed}"))
+        return check_enum
+
+    def _const(self, constant: Any) -> Check:
+        expected = _canonical(constant)
+        shown = preview_value(constant, 40)
+
+        def check_const(value, location, errors):
+            if _canonical(value) != expected:
+                errors.append(_violation(location, "const", f"Expected {shown}, got {preview_value(value, 40)}"))
+        return check_const
+
+    def _numeric(self, schema: Dict[str, Any]) -> List[Check]:
+        bounds: List[Tuple[str, Union[int, float], Callable[[Any, Any], bool], str]] = []
+        if "minimum" in schema:
+            exclusive = schema.get("exclusiveMinimum") is True
+            bounds.append(("minimum", _number(schema, "minimum"),
+                           (lambda v, b: v > b) if exclusive else (lambda v, b: v >= b),
+                           "greater than" if exclusive else "at least"))
+        if "maximum" in schema:
+            exclusive = schema.get("exclusiveMaximum") is True
+            bounds.append(("maximum", _number(schema, "maximum"),
+                           (lambda v, b: v < b) if exclusive else (lambda v, b: v <= b),
+                           "less than" if exclusive else "at most"))
+        # Draft 4 spelled exclusive bounds as booleans next to minimum/maximum
+        if not isinstance(schema.get("exclusiveMinimum", True), bool):
+            bounds.append(("exclusiveMinimum", _number(schema, "exclusiveMinimum"),
+                           lambda v, b: v > b, "greater than"))
+        if not isinstance(schema.get("exclusiveMaximum", True), bool):
+            bounds.append(("exclusiveMaximum", _number(schema, "exclusiveMaximum"),
+                           lambda v, b: v < b, "less than"))
+        multiple_of = _number(schema, "multipleOf") if "multipleOf" in schema else None
+        if multiple_of is not None and multiple_of <= 0:
+            raise SchemaError("'multipleOf' must be greater than 0")
+        if not bounds and multiple_of is None:
+            return []
+
+        def check_number(value, location, errors):
+            if type(value) not in (int, float):
+                return
+            for keyword, bound, satisfied, relation in bounds:
+                if not satisfied(value, bound):
+                    errors.append(_violation(location, keyword, f"{value} is not {relation} {bound}"))
+            if multiple_of is not None:
+                if isinstance(value, int) and isinstance(multiple_of, int):
+                    ok = value % multiple_of == 0
+                else:
+                    quotient = value / multiple_of
+                    ok = math.isfinite(quotient) and quotient == int(quotient)
+                if not ok:
+                    errors.append(_violation(location, "multipleOf", f"{value} is not a multiple of {multiple_of}"))
+        return [check_number]
+
+    def _string(self, schema: Dict[str, Any]) -> List[Check]:
+        min_length = _count(schema, "minLength") if "minLength" in schema else None
+        max_length = _count(schema, "maxLength") if "maxLength" in schema else None
+        pattern = None
+        if "pattern" in schema:
+            try:
+                pattern = re.compile(schema["pattern"])
+            except (re.error, TypeError) as e:
+                raise SchemaError(f"Invalid pattern {schema['pattern']!r}: {e}") from None
+        if min_length is None and max_length is None and pattern is None:
+            return []
+
+        def check_string(value, location, errors):
+            if not isinstance(value, str):
+                return
+            if min_length is not None and len(value) < min_length:
+                errors.append(_violation(location, "minLength",
+                                         f"String of length {len(value):,} is shorter than {min_length:,}"))
+            if max_length is not None and len(value) > max_length:
+                errors.append(_violation(location, "maxLength",
+                                         f"String of length {len(value):,} is longer than {max_length:,}"))
+            if pattern is not None and not pattern.search(value):
+                errors.append(_violation(location, "pattern",
+                                         f"{preview_value(value, 40)} does not match {pattern.pattern!r}"))
+        return [check_string]
+
+    def _array(self, schema: Dict[str, Any]) -> List[Check]:
+        min_items = _count(schema, "minItems") if "minItems" in schema else None
+        max_items = _count(schema, "maxItems") if "maxItems" in schema else None
+        unique = schema.get("uniqueItems") is True
+        # Draft 7 wrote prefixItems as an items array, followed by additionalItems
+        items = schema.get("items", True)
+        if isinstance(items, list):
+            prefix, rest = items, schema.get("additionalItems", True)
+        else:
+            prefix, rest = schema.get("prefixItems", []), items
+        prefix_checks = [self.compile(subschema) for subschema in prefix]
+        rest_check = self.compile(rest)
+        contains = self.compile(schema["contains"]) if "contains" in schema else None
+        min_contains = _count(schema, "minContains") if "minContains" in schema else 1
+        max_contains = _count(schema, "maxContains") if "maxContains" in schema else None
+        has_contains = "contains" in schema
+        if (min_items is None and max_items is None and not unique and rest_check is None
+                and not any(prefix_checks) and not has_contains):
+            return []
+
+        def check_array(value, location, errors):
+            if not isinstance(value, list):
+                return
+            size = len(value)
+            if min_items is not None and size < min_items:
+                errors.append(_violation(location, "minItems", f"{size:,} items, fewer than {min_items:,}"))
+            if max_items is not None and size > max_items:
+                errors.append(_violation(location, "maxItems", f"{size:,} items, more than {max_items:,}"))
+            if unique and len({_canonical(item) for item in value}) < size:
+                errors.append(_violation(location, "uniqueItems", "Items are not unique"))
+            for index, item_check in enumerate(prefix_checks[:size]):
+                if item_check is not None:
+                    item_check(value[index], (location, index), errors)
+            if rest_check is not None:
+                for index in range(len(prefix_checks), size):
+                    rest_check(value[index], (location, index), errors)
+            if has_contains:
+                matches = sum(1 for index, item in enumerate(value)
+                              if _passes(contains, item, (location, index)))
+                if matches < min_contains:
+                    errors.append(_violation(location, "contains",
+                                             f"{matches:,} items match 'contains', fewer than {min_contains:,}"))
+                if max_contains is not None and matches > max_contains:
+                    errors.append(_violation(location, "maxContains",
+                                             f"{matches:,} items match 'contains', more than {max_contains:,}"))
+        return [check_array]
+
+    def _object(self, schema: Dict[str, Any]) -> List[Check]:
+        min_properties = _count(schema, "minProperties") if "minProperties" in schema else None
+        max_properties = _count(schema, "maxProperties") if "maxProperties" in schema else None
+        required = schema.get("required", [])
+        if not isinstance(required, list):
+            raise SchemaError("'required' must be an array")
+        properties = {key: self.compile(subschema) for key, subschema in schema.get("properties", {}).items()}
+        checked_properties = [(key, check) for key, check in properties.items() if check is not None]
+        try:
+            patterns = [(re.compile(pattern), self.compile(subschema))
+                        for pattern, subschema in schema.get("patternProperties", {}).items()]
+        except re.error as e:
+            raise SchemaError(f"Invalid patternProperties pattern: {e}") from None
+        additional = schema.get("additionalProperties", True)
+        additional_check = self.compile(additional) if additional is not False else None
+        property_names = self.compile(schema["propertyNames"]) if "propertyNames" in schema else None
+
+        # Draft 7 "dependencies" held both forms, split into two keywords in 2019-09
+        dependent_required = dict(schema.get("dependentRequired", {}))
+        dependent_schemas = {key: self.compile(subschema)
+                             for key, subschema in schema.get("dependentSchemas", {}).items()}
+        for key, dependency in schema.get("dependencies", {}).items():
+            if isinstance(dependency, list):
+                dependent_required[key] = dependency
+            else:
+                dependent_schemas[key] = self.compile(dependency)
+        dependent_schemas = {key: check for key, check in dependent_schemas.items() if check is not None}
+
+        walk_keys = bool(patterns) or additional is not True or property_names is not None
+        if not (min_properties is not None or max_properties is not None or required or checked_properties
+                or walk_keys or dependent_required or dependent_schemas):
+            return []
+
+        def check_object(value, location, errors):
+            if not isinstance(value, dict):
+                return
+            size = len(value)
+            if min_properties is not None and size < min_properties:
+                errors.append(_violation(location, "minProperties",
+                                         f"{size:,} properties, fewer than {min_properties:,}"))
+            if max_properties is not None and size > max_properties:
+                errors.append(_violation(location, "maxProperties",
+                                         f"{size:,} properties, more than {max_properties:,}"))
+            for key in required:
+                if key not in value:
+                    errors.append(_violation(location, "required", f"Missing required property '{key}'"))
+            for key, names in dependent_required.items():
+                if key in value:
+                    for name in names:
+                        if name not in value:
+                            errors.append(_violation(location, "dependentRequired",
+                                                     f"Property '{key}' requires property '{name}'"))
+            for key, dependent_check in dependent_schemas.items():
+                if key in value:
+                    dependent_check(value, location, errors)
+            for key, property_check in checked_properties:
+                if key in value:
+                    property_check(value[key], (location, key), errors)
+            if not walk_keys:
+                return
+            for key, child in value.items():
+                child_location = (location, key)
+                if property_names is not None and not _passes(property_names, key, child_location):
+                    errors.append(_violation(child_location, "propertyNames",
+                                             f"Property name '{key}' does not match 'propertyNames'"))
+                matched = key in properties
+                for pattern, pattern_check in patterns:
+                    if pattern.search(key):
+                        matched = True
+                        if pattern_check is not None:
+                            pattern_check(child, child_location, errors)
+                if matched:
+                    continue
+                if additional is False:
+                    errors.append(_violation(child_location, "additionalProperties",
+                                             f"Unexpected property '{key}'"))
+                elif additional_check is not None:
+                    additional_check(child, child_location, errors)
+        return [check_object]
+
+    def _combinators(self, schema: Dict[str, Any]) -> List[Check]:
+        checks: List[Check] = []
+        for keyword in ("allOf", "anyOf", "oneOf"):
+            if keyword in schema and (not isinstance(schema[keyword], list) or not schema[keyword]):
+                raise SchemaError(f"'{keyword}' must be a non-empty array")
+
+        all_of = [check for check in map(self.compile, schema.get("allOf", [])) if check is not None]
+        checks.extend(all_of)
+
+        if "anyOf" in schema:
+            any_of = [self.compile(subschema) for subschema in schema["anyOf"]]
+
+            def check_any_of(value, location, errors):
+                if not any(_passes(check, value, location) for check in any_of):
+                    errors.append(_violation(location, "anyOf",
+                                             f"Value does not match any of the {len(any_of)} 'anyOf' schemas"))
+            checks.append(check_any_of)
+
+        if "oneOf" in schema:
+            one_of = [self.compile(subschema) for subschema in schema["oneOf"]]
+
+            def check_one_of(value, location, errors):
+                matches = 0
+                for check in one_of:
+                    if _passes(check, value, location):
+                        matches += 1
+                        if matches > 1:
+                            break
+                if matches != 1:
+                    problem = "none" if not matches else "more than one"
+                    errors.append(_violation(location, "oneOf",
+                                             f"Value matches {problem} of the {len(one_of)} 'oneOf' schemas"))
+            checks.append(check_one_of)
+
+        if "not" in schema:
+            negated = self.compile(schema["not"])
+
+            def check_not(value, location, errors):
+                if _passes(negated, value, location):
+                    errors.append(_violation(location, "not", "Value matches the 'not' schema"))
+            checks.append(check_not)
+
+        if "if" in schema:
+            condition = self.compile(schema["if"])
+            then_check = self.compile(schema.get("then", True))
+            else_check = self.compile(schema.get("else", True))
+            if then_check is not None or else_check is not None:
+                def check_if(value, location, errors):
+                    branch = then_check if _passes(condition, value, location) else else_check
+                    if branch is not None:
+                        branch(value, location, errors)
+                checks.append(check_if)
+        return checks
+
+class CompiledSchema:
+    """A JSON Schema compiled into checks; validates any number of documents"""
+
+    def __init__(self, schema: Any, digest: Optional[str] = None):
+        self.schema = schema
+        self.digest = digest or schema_hash(schema)
+        try:
+            self._check = _Compiler(schema).compile(schema)
+        except RecursionError:
+            raise SchemaError("Schema is nested too deeply") from None
+        except (AttributeError, TypeError) as e:
+            raise SchemaError(f"Malformed schema: {e}") from None
+
+    def validate(self, value: Any, max_errors: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Every violation in value (at most max_errors), each with path, pointer, keyword and message"""
+        if self._check is None:
+            return []
+        errors = _Collector(max_errors if max_errors is not None else math.inf)
+        try:
+            self._check(value, None, errors)
+        except _Enough:
+            pass
+        except RecursionError:
+            raise ValueError("Document is nested too deeply to validate") from None
+        return list(errors)
+
+    def is_valid(self, value: Any) -> bool:
+        """Whether value satisfies the schema, stopping at the first violation"""
+        return not self.validate(value, max_errors=1)
+
+def schema_hash(schema: Any) -> str:
+    """Hash of a schema's canonical text, so equal schemas share a compiled validator"""
+    return document_hash(dumps(schema, sort_keys=True, separators=(',', ':'), ensure_ascii=False))
+
+def _parse_schema(text: str) -> Any:
+    try:
+        return loads(text)
+    except ValueError as e:
+        raise SchemaError(f"Schema is not valid JSON: {e}") from None
+
+def compile_schema(schema: Union[str, Dict[str, Any], bool]) -> CompiledSchema:
+    """Compile a schema, given parsed or as JSON text; raises SchemaError for bad schemas"""
+    if isinstance(schema, str):
+        schema = _parse_schema(schema)
+    return CompiledSchema(schema)
+
+class ValidatorCache:
+    """Bounded LRU cache of compiled validators keyed by schema hash"""
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CompiledSchema]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, schema: Union[str, Dict[str, Any], bool]) -> CompiledSchema:
+        """The compiled validator for a schema (parsed or JSON text), compiling it on first use"""
+        if isinstance(schema, str):
+            # Text is hashed as it is; reformatted copies of a schema compile separately
+            digest = document_hash(schema)
+        else:
+            digest = schema_hash(schema)
+        with self._lock:
+            validator = self._entries.get(digest)
+            if validator is not None:
+                self._entries.move_to_end(digest)
+                return validator
+
+        if isinstance(schema, str):
+            schema = _parse_schema(schema)
+        validator = CompiledSchema(schema, digest)
+        with self._lock:
+            self._entries[digest] = validator
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return validator
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+_default_cache = ValidatorCache()
+
+def get_validator_cache() -> ValidatorCache:
+    """Return the process-wide validator cache"""
+    return _default_cache
+
+def get_validator(schema: Union[str, Dict[str, Any], bool]) -> CompiledSchema:
+    """Compile a schema through the process-wide validator cache"""
+    return _default_cache.get(schema)
+
+def validate_with_schema(value: Any, schema: Union[str, Dict[str, Any], bool],
+                         max_errors: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Validate a parsed value against a schema, reusing its cached compiled validator"""
+    return get_validator(schema).validate(value, max_errors)
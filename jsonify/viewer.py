@@ -0,0 +1,188 @@
+"""Windowed views of large outputs: line pages, path lookups and lazy tree listings.
+
+A front end never needs to hold more than one page of a large document on
+screen. ``LineIndex`` slices a page of lines out of an output text without
+splitting it, ``path_line`` finds the line a value starts on in indented
+output without rendering it, and ``child_entries`` lists one page of a
+container's children for a tree that is expanded a level at a time.
+"""
+import re
+from array import array
+from itertools import islice
+from typing import Any, Dict, List, Optional, Union
+
+from .backend import dumps, loads
+
+PathPart = Union[str, int]
+
+_PATH_TOKEN = re.compile(
+    r'\.(?P<name>[^.\[\]]+)'
+    r'|\[(?P<index>-?\d+)\]'
+    r'|\[(?P<quoted>"(?:[^"\\]|\\.)*")\]'
+    r"|\['(?P<single>[^']*)'\]"
+)
+_IDENTIFIER = re.compile(r'[A-Za-z_$][\w$]*')
+
+class LineIndex:
+    """Start offsets of every line of a text, for slicing out pages of lines"""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.starts = array('q', [0])
+        self.starts.extend(match.end() for match in re.finditer('\n', text))
+
+    @property
+    def line_count(self) -> int:
+        return len(self.starts)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the offsets, not counting the text itself"""
+        return len(self.starts) * self.starts.itemsize
+
+    def lines(self, start: int, count: int, max_line_chars: Optional[int] = None) -> str:
+        """Return count lines from 1-based line start, shortening very long lines"""
+        start = min(max(start, 1), self.line_count)
+        begin = self.starts[start - 1]
+        stop = start - 1 + count
+        end = self.starts[stop] - 1 if stop < self.line_count else len(self.text)
+        page = self.text[begin:end]
+        if max_line_chars is None or end - begin <= max_line_chars:
+            return page
+        return '\n'.join(
+            line if len(line) <= max_line_chars
+            else f"{line[:max_line_chars]}… (+{len(line) - max_line_chars:,} chars)"
+            for line in page.split('\n')
+        )
+
+def parse_path(path: str) -> List[PathPart]:
+    """Split a path such as $.users[0].name or $["odd key"] into keys and indexes"""
+    path = path.strip()
+    if path.startswith('$'):
+        path = path[1:]
+    elif path and path[0] not in '.[':
+        path = '.' + path
+    parts: List[PathPart] = []
+    position = 0
+    while position < len(path):
+        match = _PATH_TOKEN.match(path, position)
+        if match is None:
+            raise ValueError(f"Invalid path syntax at '{path[position:]}'")
+        if match.group('name') is not None:
+            parts.append(match.group('name'))
+        elif match.group('index') is not None:
+            parts.append(int(match.group('index')))
+        elif match.group('quoted') is not None:
+            parts.append(loads(match.group('quoted')))
+        else:
+            parts.append(match.group('single'))
+        position = match.end()
+    return parts
+
+def format_path(parts: List[PathPart]) -> str:
+    """Inverse of parse_path"""
+    pieces = ['$']
+    for part in parts:
+        if isinstance(part, int):
+            pieces.append(f"[{part}]")
+        elif _IDENTIFIER.fullmatch(part):
+            pieces.append(f".{part}")
+        else:
+            pieces.append(f"[{dumps(part, ensure_ascii=False)}]")
+    return ''.join(pieces)
+
+def _child_key(node: Any, part: PathPart, parts: List[PathPart]) -> PathPart:
+    """Match a path part to a child of node, accepting [0] for a "0" key and .0 for index 0"""
+    if isinstance(node, dict):
+        key = str(part)
+        if key in node:
+            return key
+    elif isinstance(node, list):
+        try:
+            index = int(part)
+        except ValueError:
+            index = None
+        if index is not None and 0 <= index < len(node):
+            return index
+    raise ValueError(f"Path not found: {format_path(parts)}")
+
+def resolve_path(obj: Any, parts: List[PathPart]) -> Any:
+    """Return the value at a parsed path, raising ValueError if it does not exist"""
+    node = obj
+    for depth, part in enumerate(parts):
+        node = node[_child_key(node, part, parts[:depth + 1])]
+    return node
+
+def count_lines(value: Any) -> int:
+    """Number of lines value takes up when serialized with an indent"""
+    lines = 0
+    stack = [value]
+    while stack:
+        node = stack.pop()
+        lines += 1
+        if isinstance(node, dict):
+            if node:
+                # Closing brace on a line of its own
+                lines += 1
+                stack.extend(node.values())
+        elif isinstance(node, list):
+            if node:
+                lines += 1
+                stack.extend(node)
+    return lines
+
+def path_line(obj: Any, parts: List[PathPart], sort_keys: bool = False) -> int:
+    """1-based line on which the value at a path starts in format_json output of obj"""
+    line = 1
+    node = obj
+    for depth, part in enumerate(parts):
+        key = _child_key(node, part, parts[:depth + 1])
+        line += 1
+        if isinstance(node, dict):
+            for sibling in (sorted(node) if sort_keys else node):
+                if sibling == key:
+                    break
+                line += count_lines(node[sibling])
+        else:
+            line += sum(count_lines(item) for item in islice(node, key))
+        node = node[key]
+    return line
+
+def json_type_name(value: Any) -> str:
+    """JSON name of a parsed value's type"""
+    if isinstance(value, dict):
+        return "object"
+    elif isinstance(value, list):
+        return "array"
+    elif isinstance(value, str):
+        return "string"
+    elif isinstance(value, bool):
+        return "boolean"
+    elif value is None:
+        return "null"
+    return "number"
+
+def preview_value(value: Any, max_chars: int = 80) -> str:
+    """One-line summary of a value: containers by size, scalars by their JSON text"""
+    if isinstance(value, dict):
+        return f"{{…}} {len(value):,} keys"
+    elif isinstance(value, list):
+        return f"[…] {len(value):,} items"
+    if isinstance(value, str) and len(value) > max_chars:
+        value = value[:max_chars]
+        return dumps(value, ensure_ascii=False)[:-1] + '…'
+    text = dumps(value, ensure_ascii=False)
+    return text if len(text) <= max_chars else text[:max_chars] + '…'
+
+def child_entries(value: Any, start: int = 0, count: int = 100) -> List[Dict[str, Any]]:
+    """Describe one page of a container's children for a lazily expanded tree"""
+    if isinstance(value, dict):
+        children = islice(value.items(), start, start + count)
+    elif isinstance(value, list):
+        children = zip(range(start, start + count), islice(value, start, start + count))
+    else:
+        return []
+    return [
+        {"key": key, "type": json_type_name(child), "preview": preview_value(child)}
+        for key, child in children
+    ]
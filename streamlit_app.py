@@ -1,7 +1,81 @@
 import streamlit as st
+import io
 import json
+import os
 import re
-from typing import Any, Dict, List, Tuple
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from jsonify import (
+    VALUE_TYPES,
+    analyze_json,
+    document_hash,
+    format_file_size,
+    format_json,
+    minify_json,
+    parse_json_cached,
+    validate_json_string,
+)
+from jsonify import backend as json_backend
+from jsonify.builder import PairStore
+from jsonify.delivery import encode_output
+from jsonify.diff import diff_json
+from jsonify.encoding import SAMPLE_BYTES as ENCODING_SAMPLE_BYTES, decode_bytes, detect_encoding, iter_decoded
+from jsonify.fetch import FetchError, get_fetcher
+from jsonify.multifetch import DEFAULT_CONCURRENCY, expand_url_template, fetch_and_merge, parse_url_list
+from jsonify.ndjson import process_ndjson
+from jsonify.patch import DocumentEditor, format_pointer, parse_patch
+from jsonify.profiling import PROFILE_LOG_ENV, Profiler, append_profile_log
+from jsonify.query import QueryError, QueryIndex, compile_query, query_page
+from jsonify.schema import SchemaAccumulator, infer_schema, schema_paths
+from jsonify.search import SearchIndex, search_page
+from jsonify.spool import SpooledUpload, iter_buffer_chunks
+from jsonify.validation import SchemaError, get_validator
+from jsonify.streaming import iter_events, reformat_text, stream_analyze, stream_reformat
+from jsonify.viewer import (
+    LineIndex,
+    child_entries,
+    format_path,
+    parse_path,
+    path_line,
+    preview_value,
+    resolve_path,
+)
+
+# Uploads larger than this are processed in streaming mode by default
+STREAMING_THRESHOLD_BYTES = 20 * 1024 * 1024
+# Longer outputs are downloaded instead of copied to the clipboard
+CLIPBOARD_MAX_CHARS = 1_000_000
+# Larger uploads are spooled to a memory-mapped temporary file instead of copied into memory
+SPOOL_THRESHOLD_BYTES = 8 * 1024 * 1024
+# Characters of streamed output shown in the preview
+STREAMING_PREVIEW_CHARS = 100_000
+# Outputs longer than this are shown a page of lines at a time
+VIEWER_INLINE_CHARS = 100_000
+VIEWER_PAGE_SIZES = [100, 250, 1000]
+# Longer lines are cut short in the viewer (the download is always complete)
+VIEWER_MAX_LINE_CHARS = 2_000
+# Children listed per page in the tree view
+TREE_PAGE_SIZE = 100
+# Builders with more pairs than this are edited in the table view only
+FORM_MAX_PAIRS = 50
+# Rows per page in the builder's table view
+TABLE_PAGE_SIZE = 100
+# Paths listed in inferred schema tables
+SCHEMA_MAX_LINES = 500
+# Matches per page of query and search results
+QUERY_PAGE_SIZES = [50, 100, 500]
+# Schema violations reported for the validator sidebar's document
+SCHEMA_MAX_VIOLATIONS = 500
+# Reruns kept in the profiling panel history
+PROFILE_HISTORY_SIZE = 20
+# Nodes with longer text are edited through JSON Patches instead of a text area
+TREE_EDIT_MAX_CHARS = 200_000
+# Undo steps kept by the tree editor
+TREE_HISTORY_LIMIT = 100
+# URLs fetched by one Multi-URL Fetch run
+MULTI_FETCH_MAX_URLS = 1000
+# Patch operations listed in the diff summary table (the patch itself is always complete)
+DIFF_TABLE_ROWS = 1000
 
 st.set_page_config(
     page_title="JSON String Converter & Object Builder",
@@ -58,75 +132,46 @@ st.markdown("""
 
 def initialize_session_state():
     """Initialize session state variables"""
-    if 'kv_pairs' not in st.session_state:
-        st.session_state.kv_pairs = [{"key": "", "value": "", "type": "string", "id": 0}]
-    if 'pair_counter' not in st.session_state:
-        st.session_state.pair_counter = 1
+    if 'pair_store' not in st.session_state:
+        st.session_state.pair_store = PairStore()
+        st.session_state.pair_store.append()
+    if 'builder_table_version' not in st.session_state:
+        st.session_state.builder_table_version = 0
     if 'last_json_output' not in st.session_state:
         st.session_state.last_json_output = ""
 
 def add_new_pair():
     """Add a new key-value pair"""
-    new_pair = {
-        "key": "",
-        "value": "",
-        "type": "string",
-        "id": st.session_state.pair_counter
-    }
-    st.session_state.kv_pairs.append(new_pair)
-    st.session_state.pair_counter += 1
+    st.session_state.pair_store.append()
 
 def remove_pair(pair_id: int):
     """Remove a pair by ID"""
-    st.session_state.kv_pairs = [
-        pair for pair in st.session_state.kv_pairs 
-        if pair["id"] != pair_id
-    ]
+    store = st.session_state.pair_store
+    store.remove([store.position(pair_id)])
     # Ensure at least one pair exists
-    if not st.session_state.kv_pairs:
-        st.session_state.kv_pairs = [{"key": "", "value": "", "type": "string", "id": st.session_state.pair_counter}]
-        st.session_state.pair_counter += 1
+    if not store:
+        store.append()
 
 def clear_all_pairs():
     """Clear all pairs and reset to single empty pair"""
-    st.session_state.kv_pairs = [{"key": "", "value": "", "type": "string", "id": st.session_state.pair_counter}]
-    st.session_state.pair_counter += 1
+    st.session_state.pair_store.clear()
+    st.session_state.pair_store.append()
 
-def validate_json_string(json_str: str) -> Tuple[bool, str]:
-    """Validate JSON string and return status with message"""
-    try:
-        json.loads(json_str)
-        return True, "Valid JSON"
-    except json.JSONDecodeError as e:
-        return False, f"Invalid JSON: {str(e)}"
-
-def safe_json_parse(value_str: str, default_value: Any = None):
-    """Safely parse JSON string with fallback"""
-    if not value_str.strip():
-        return default_value
-    try:
-        return json.loads(value_str)
-    except json.JSONDecodeError:
-        return value_str
-
-def format_file_size(size_bytes: int) -> str:
-    """Format file size in human readable format"""
-    if size_bytes < 1024:
-        return f"{size_bytes} B"
-    elif size_bytes < 1024 * 1024:
-        return f"{size_bytes / 1024:.1f} KB"
-    else:
-        return f"{size_bytes / (1024 * 1024):.1f} MB"
+def apply_pair_table_edits(editor_key: str, positions: List[int]):
+    """Apply the table editor's diff to the pair store as one batch"""
+    st.session_state.pair_store.apply_table_edits(positions, st.session_state[editor_key])
+    # A fresh editor key drops the diff that has just been applied
+    st.session_state.builder_table_version += 1
 
 def copy_to_clipboard_js(text: str, success_message: str = "Copied to clipboard!"):
     """Generate JavaScript to copy text to clipboard"""
-    # Escape special characters for JavaScript
-    escaped_text = text.replace('\\', '\\\\').replace('`', '\\`').replace('$', '\\$')
+    # One encoding pass gives a valid JavaScript string literal; "</" must not close the script tag
+    text_literal = json_backend.dumps(text, ensure_ascii=False).replace('</', '<\\/')
     
     st.markdown(f"""
     <script>
     (function() {{
-        const text = `{escaped_text}`;
+        const text = {text_literal};
         if (navigator.clipboard && window.isSecureContext) {{
             navigator.clipboard.writeText(text).then(function() {{
                 console.log('Copied to clipboard successfully');
@@ -153,9 +198,488 @@ def copy_to_clipboard_js(text: str, success_message: str = "Copied to clipboard!
     </script>
     """, unsafe_allow_html=True)
 
+def copy_button(label: str, key: str, text: Union[str, Callable[[], str]], success_message: str,
+                file_name: str = "output.json", size_hint: Optional[int] = None):
+    """Copy button for small outputs; larger ones are downloaded from a cached buffer instead.
+
+    text may be a callable that builds the output on click, with size_hint its expected length.
+    """
+    size = size_hint if size_hint is not None else len(text)
+    if size <= CLIPBOARD_MAX_CHARS:
+        if st.button(label, key=key, use_container_width=True):
+            copy_to_clipboard_js(text() if callable(text) else text)
+            st.success(success_message)
+        return
+    
+    compress = st.session_state.get('gzip_downloads', False)
+    st.download_button(
+        f"⬇️ Download{label.split('Copy', 1)[-1]}",
+        data=lambda: encode_output(text() if callable(text) else text, compress),
+        file_name=f"{file_name}.gz" if compress else file_name,
+        mime="application/gzip" if compress else "application/json",
+        key=f"{key}_download",
+        help=f"Outputs over {CLIPBOARD_MAX_CHARS:,} characters are downloaded instead of copied",
+        use_container_width=True
+    )
+
+def show_json_analysis(analysis: Dict[str, Any], size_metrics: Dict[str, str]):
+    """Render analyze_json results as metrics plus type and length breakdowns"""
+    col_stats1, col_stats2 = st.columns(2)
+    
+    with col_stats1:
+        st.metric("Total Keys", analysis['total_keys'])
+        st.metric("Max Depth", analysis['max_depth'])
+        st.metric("Objects", analysis['objects'])
+    
+    with col_stats2:
+        st.metric("Arrays", analysis['arrays'])
+        for label, value in size_metrics.items():
+            st.metric(label, value)
+    
+    if analysis['types']:
+        st.markdown("**Data Types:**")
+        for data_type, count in sorted(analysis['types'].items()):
+            st.text(f"• {data_type}: {count}")
+
+    for label, unit, distribution in [
+        ("String Lengths", "chars", analysis['string_lengths']),
+        ("Array Lengths", "items", analysis['array_lengths'])
+    ]:
+        if distribution['count']:
+            st.markdown(f"**{label}:** {distribution['count']} total, "
+                        f"mean {distribution['mean']:.1f}, max {distribution['max']}")
+            for bucket, count in distribution['histogram'].items():
+                st.text(f"• {bucket} {unit}: {count}")
+
+def show_inferred_schema(schema: Dict[str, Any], key: str):
+    """Show an inferred JSON Schema as a table of paths and as a document"""
+    rows = schema_paths(schema)
+    st.dataframe(
+        [{
+            "Path": row["path"],
+            "Type": row["type"],
+            "Count": row["count"],
+            "Present": f"{row['presence']:.1%}" if row["presence"] is not None else "",
+            "Range": row["range"],
+        } for row in rows[:SCHEMA_MAX_LINES]],
+        use_container_width=True,
+        hide_index=True
+    )
+    if len(rows) > SCHEMA_MAX_LINES:
+        st.caption(f"Showing {SCHEMA_MAX_LINES:,} of {len(rows):,} paths")
+    schema_text = json_backend.dumps(schema, indent=2, ensure_ascii=False)
+    show_json_viewer(schema_text, f"{key}_schema", file_name="schema.json")
+    copy_button("📋 Copy JSON Schema", f"copy_{key}_schema", schema_text, "✅ JSON Schema copied!",
+                file_name="schema.json")
+
+def show_schema_violations(rows: List[Dict[str, Any]], truncated: bool = False):
+    """Table of JSON Schema violations, noting when only the first ones are listed"""
+    st.dataframe(rows, use_container_width=True, hide_index=True)
+    if truncated:
+        st.caption(f"Showing the first {len(rows):,} violations")
+
+def show_json_error(e: json.JSONDecodeError):
+    """Show a parse error with the line it occurred on"""
+    st.error(f"❌ Invalid JSON: {str(e)}")
+    
+    # Try to show where the error is
+    try:
+        error_line = str(e).split('line ')[1].split(' ')[0] if 'line ' in str(e) else None
+        if error_line:
+            st.error(f"Error appears to be around line {error_line}")
+    except:
+        pass
+
+def jump_to_path(key: str, value: Any, sort_keys: bool):
+    """Move the paged viewer to the line where the entered path starts"""
+    path = st.session_state[f"{key}_path"].strip()
+    st.session_state[f"{key}_path_error"] = None
+    if not path:
+        return
+    try:
+        st.session_state[f"{key}_line"] = path_line(value, parse_path(path), sort_keys=sort_keys)
+    except ValueError as e:
+        st.session_state[f"{key}_path_error"] = str(e)
+
+def show_json_viewer(text: str, key: str, value: Any = None, sort_keys: bool = False,
+                     line_index: Optional[LineIndex] = None, file_name: str = "output.json",
+                     download: bool = True):
+    """Show output inline when it is small, otherwise one page of lines at a time"""
+    if len(text) <= VIEWER_INLINE_CHARS:
+        st.code(text, language="json")
+        return
+    
+    index = line_index or LineIndex(text)
+    line_key = f"{key}_line"
+    page_size = st.session_state.get(f"{key}_page_size", VIEWER_PAGE_SIZES[0])
+    if not 1 <= st.session_state.get(line_key, 1) <= index.line_count:
+        st.session_state[line_key] = 1
+    
+    if value is not None:
+        st.text_input(
+            "Jump to path:",
+            placeholder="$.items[0].name",
+            key=f"{key}_path",
+            on_change=jump_to_path,
+            args=(key, value, sort_keys)
+        )
+        if st.session_state.get(f"{key}_path_error"):
+            st.error(f"❌ {st.session_state[f'{key}_path_error']}")
+    
+    col_line, col_size = st.columns(2)
+    with col_line:
+        start = st.number_input(
+            "Go to line:",
+            min_value=1,
+            max_value=index.line_count,
+            step=page_size,
+            key=line_key,
+            help="Use − and + to move a page at a time"
+        )
+    with col_size:
+        st.selectbox("Lines per page:", VIEWER_PAGE_SIZES, key=f"{key}_page_size")
+    
+    st.code(index.lines(start, page_size, VIEWER_MAX_LINE_CHARS), language="json")
+    end = min(start + page_size - 1, index.line_count)
+    st.caption(f"Lines {start:,}–{end:,} of {index.line_count:,} ({format_file_size(len(text))}). "
+               f"Download for the full output.")
+    if download:
+        compress = st.session_state.get('gzip_downloads', False)
+        st.download_button(
+            "⬇️ Download Full Output",
+            data=lambda: encode_output(text, compress),
+            file_name=f"{file_name}.gz" if compress else file_name,
+            mime="application/gzip" if compress else "application/json",
+            key=f"{key}_download",
+            use_container_width=True
+        )
+
+def reset_query_page(key: str):
+    st.session_state[f"{key}_query_page"] = 1
+
+def show_query_panel(value: Any, key: str, get_index: Callable[[], QueryIndex]):
+    """Evaluate a JSONPath query against a parsed value and show one page of matches"""
+    expression = st.text_input(
+        "Query:",
+        placeholder="$..name  ·  $.items[?(@.price < 10)].id  ·  items[*].tags",
+        key=f"{key}_query",
+        on_change=reset_query_page,
+        args=(key,)
+    )
+    st.caption("JSONPath (`$..key`, `[*]`, `[0:5]`, `[?(@.a > 1)]`) or JMESPath-style paths. "
+               "Recursive `..key` queries build a key index on first use.")
+    if not expression:
+        return
+    
+    try:
+        query = compile_query(expression)
+    except QueryError as e:
+        st.error(f"❌ {str(e)}")
+        return
+    
+    col_page, col_size = st.columns(2)
+    with col_size:
+        page_size = st.selectbox("Matches per page:", QUERY_PAGE_SIZES, key=f"{key}_query_page_size")
+    with col_page:
+        page = st.number_input("Page:", min_value=1, step=1, key=f"{key}_query_page")
+    
+    result = query_page(value, expression, (page - 1) * page_size, page_size, get_index)
+    rows = result["rows"]
+    if not rows:
+        st.info("No matches" if page == 1 else "No matches on this page")
+        return
+    
+    st.dataframe(
+        [{"Path": row["path"], "Type": row["type"], "Value": row["preview"]} for row in rows],
+        use_container_width=True,
+        hide_index=True
+    )
+    first = result["start"] + 1
+    st.caption(f"Matches {first:,}–{first + len(rows) - 1:,}"
+               + (" · more on the next page" if result["has_more"] else ""))
+    page_text = json_backend.dumps({row["path"]: row["value"] for row in rows}, indent=2, ensure_ascii=False)
+    show_json_viewer(page_text, f"{key}_query_results", download=False)
+    
+    # Every match, one per line, generated only when the download is requested
+    st.download_button(
+        "⬇️ Download All Matches",
+        data=lambda: ''.join(
+            json_backend.dumps({"path": format_path(list(path)), "value": match}, ensure_ascii=False) + "\n"
+            for path, match in query.iter_matches(value, get_index)
+        ).encode('utf-8'),
+        file_name="matches.jsonl",
+        mime="application/x-ndjson",
+        key=f"{key}_query_download",
+        use_container_width=True
+    )
+
+def reset_search_page(key: str):
+    st.session_state[f"{key}_search_page"] = 1
+
+def open_search_result(key: str, value: Any, sort_keys: bool):
+    """Show the picked search result in the paged viewer and the tree view"""
+    path = st.session_state[f"{key}_search_open"]
+    if path is None:
+        return
+    st.session_state[f"{key}_path"] = path
+    jump_to_path(key, value, sort_keys)
+    st.session_state[f"{key}_tree_path"] = path
+    st.session_state[f"{key}_tree_start"] = 0
+    st.session_state[f"{key}_tree_panel"] = True
+    st.session_state[f"{key}_search_open"] = None
+
+def show_search_panel(value: Any, key: str, get_index: Callable[[], SearchIndex], sort_keys: bool = False):
+    """Search keys and values through the document's inverted index and link matches to their paths"""
+    col_query, col_mode = st.columns([2, 1])
+    with col_query:
+        query = st.text_input("Search for:", placeholder="email, user42, 3.14 …", key=f"{key}_search",
+                              on_change=reset_search_page, args=(key,))
+    with col_mode:
+        mode = st.selectbox("Match:", ["Substring", "Prefix", "Exact"], key=f"{key}_search_mode",
+                            on_change=reset_search_page, args=(key,))
+    col_scope, col_case = st.columns([2, 1])
+    with col_scope:
+        scope = st.radio("In:", ["All", "Keys", "Values"], horizontal=True, key=f"{key}_search_scope",
+                         on_change=reset_search_page, args=(key,))
+    with col_case:
+        case_sensitive = st.checkbox("Match case", key=f"{key}_search_case", on_change=reset_search_page, args=(key,))
+    if not query:
+        st.caption("Keys, string values and numbers are indexed on the first search")
+        return
+    
+    col_page, col_size = st.columns(2)
+    with col_size:
+        page_size = st.selectbox("Matches per page:", QUERY_PAGE_SIZES, key=f"{key}_search_page_size")
+    with col_page:
+        page = st.number_input("Page:", min_value=1, step=1, key=f"{key}_search_page")
+    
+    result = search_page(get_index(), query, mode.lower(), scope.lower(), case_sensitive,
+                         (page - 1) * page_size, page_size)
+    rows = result["rows"]
+    if not rows:
+        st.info("No matches" if result["total"] == 0 else "No matches on this page")
+        return
+    
+    first = result["start"] + 1
+    st.caption(f"Matches {first:,}–{first + len(rows) - 1:,} of {result['total']:,}")
+    st.dataframe(
+        [{"Path": row["path"], "Match": row["match"], "Type": row["type"], "Value": row["preview"]} for row in rows],
+        use_container_width=True,
+        hide_index=True
+    )
+    st.selectbox(
+        "Open result:",
+        [None] + [row["path"] for row in rows],
+        format_func=lambda path: "Choose a path…" if path is None else path,
+        key=f"{key}_search_open",
+        on_change=open_search_result,
+        args=(key, value, sort_keys),
+        help="Jumps the output to this path and opens it in the tree view"
+    )
+
+def open_tree_child(key: str):
+    """Descend the tree view into the child picked in the selectbox"""
+    child = st.session_state[f"{key}_open"]
+    if child is not None:
+        parts = parse_path(st.session_state[f"{key}_tree_path"])
+        st.session_state[f"{key}_tree_path"] = format_path(parts + [child])
+        st.session_state[f"{key}_tree_start"] = 0
+        st.session_state[f"{key}_open"] = None
+
+def open_tree_parent(key: str):
+    parts = parse_path(st.session_state[f"{key}_tree_path"])
+    st.session_state[f"{key}_tree_path"] = format_path(parts[:-1])
+    st.session_state[f"{key}_tree_start"] = 0
+
+def show_json_tree(value: Any, key: str):
+    """Browse a parsed value one level and one page of children at a time"""
+    path_key = f"{key}_tree_path"
+    st.session_state.setdefault(path_key, "$")
+    st.text_input("Node path:", key=path_key)
+    
+    try:
+        parts = parse_path(st.session_state[path_key])
+        node = resolve_path(value, parts)
+    except ValueError as e:
+        st.error(f"❌ {str(e)}")
+        return
+    
+    if parts:
+        st.button("⬆️ Parent", key=f"{key}_parent", on_click=open_tree_parent, args=(key,))
+    if not isinstance(node, (dict, list)):
+        st.code(preview_value(node, VIEWER_MAX_LINE_CHARS), language="json")
+        return
+    if not node:
+        st.info("📭 Empty container")
+        return
+    
+    start = 0
+    if len(node) > TREE_PAGE_SIZE:
+        start = st.number_input(
+            f"First child (of {len(node):,}):",
+            min_value=0,
+            max_value=len(node) - 1,
+            step=TREE_PAGE_SIZE,
+            key=f"{key}_tree_start"
+        )
+    rows = child_entries(node, start, TREE_PAGE_SIZE)
+    st.dataframe(rows, use_container_width=True, hide_index=True)
+    
+    containers = [row["key"] for row in rows if row["type"] in ("object", "array")]
+    if containers:
+        st.selectbox(
+            "Open child:",
+            [None] + containers,
+            format_func=lambda child: "—" if child is None else format_path(parts + [child]),
+            key=f"{key}_open",
+            on_change=open_tree_child,
+            args=(key,)
+        )
+
+def get_upload_buffer(uploaded_file, key: str):
+    """Contents of an upload; large ones are spooled to a memory-mapped file once and reused across reruns"""
+    spooled_id, spooled = st.session_state.get(key, (None, None))
+    if uploaded_file.size <= SPOOL_THRESHOLD_BYTES:
+        if spooled is not None:
+            spooled.close()
+            del st.session_state[key]
+        return uploaded_file.getvalue()
+    if spooled_id != uploaded_file.file_id:
+        if spooled is not None:
+            spooled.close()
+        uploaded_file.seek(0)
+        spooled = SpooledUpload(uploaded_file)
+        st.session_state[key] = (uploaded_file.file_id, spooled)
+    return spooled.buffer
+
+def load_tree_document(value: Any):
+    """Start editing a new document in the tree editor"""
+    st.session_state.tree_editor = DocumentEditor(value, history_limit=TREE_HISTORY_LIMIT)
+    st.session_state.tree_editor_version = st.session_state.get('tree_editor_version', 0) + 1
+    st.session_state.tree_editor_tree_path = "$"
+    st.session_state.tree_editor_tree_start = 0
+    st.session_state.tree_editor_message = None
+
+def edit_tree_document(action: str, parts: List[Any], value_key: Optional[str] = None):
+    """Turn a tree editor action into a JSON Patch and apply it as one undoable step"""
+    editor = st.session_state.tree_editor
+    pointer = format_pointer(parts)
+    new_parts = parts
+    try:
+        if action == "replace":
+            patch = [{"op": "replace", "path": pointer, "value": json_backend.loads(st.session_state[value_key])}]
+        elif action == "add":
+            child = st.session_state.get('tree_editor_child_key', '').strip()
+            if isinstance(resolve_path(editor.document, parts), dict) and not child:
+                raise ValueError("Enter a key for the new member")
+            value_text = st.session_state.get('tree_editor_child_value', '')
+            value = json_backend.loads(value_text) if value_text.strip() else None
+            # A blank index appends to an array
+            patch = [{"op": "add", "path": format_pointer(parts + [child or "-"]), "value": value}]
+        elif action == "rename":
+            new_key = st.session_state.get('tree_editor_new_key', '')
+            if not new_key:
+                raise ValueError("Enter the new key")
+            new_parts = parts[:-1] + [new_key]
+            patch = [{"op": "move", "from": pointer, "path": format_pointer(new_parts)}]
+        elif action == "remove":
+            new_parts = parts[:-1]
+            patch = [{"op": "remove", "path": pointer}]
+        else:
+            patch = parse_patch(st.session_state.get('tree_editor_patch', ''))
+        editor.apply(patch)
+    except ValueError as e:
+        st.session_state.tree_editor_message = f"❌ {str(e)}"
+        return
+    st.session_state.tree_editor_message = f"✅ Applied {len(patch)} operation(s)"
+    st.session_state.tree_editor_version += 1
+    st.session_state.tree_editor_tree_path = format_path(new_parts)
+
+def undo_tree_edit():
+    st.session_state.tree_editor.undo()
+    st.session_state.tree_editor_version += 1
+    st.session_state.tree_editor_message = None
+
+def redo_tree_edit():
+    st.session_state.tree_editor.redo()
+    st.session_state.tree_editor_version += 1
+    st.session_state.tree_editor_message = None
+
+def diff_input(side: str, label: str):
+    """Input widgets for one side of the diff; returns its JSON text or upload buffer, or None"""
+    method = st.selectbox(
+        "Choose input method:",
+        ["Paste JSON", "Upload JSON File", "Use Last Object Builder Output"],
+        key=f"diff_{side}_input_method"
+    )
+    if method == "Paste JSON":
+        return st.text_area(f"Paste the {label} JSON here:", height=200, key=f"diff_{side}_input") or None
+    if method == "Upload JSON File":
+        diff_file = st.file_uploader(f"Upload the {label} JSON file", type=['json'], key=f"diff_{side}_upload")
+        if diff_file is None:
+            return None
+        try:
+            with profiler.stage("read upload", diff_file.size):
+                content = get_upload_buffer(diff_file, f'diff_{side}_upload_spool')
+            # UTF-8 is parsed straight from the upload buffer; other encodings are decoded first
+            encoding_info = detect_encoding(content[:ENCODING_SAMPLE_BYTES],
+                                            complete=len(content) <= ENCODING_SAMPLE_BYTES)
+            if encoding_info['encoding'] == 'utf-8':
+                return content
+            with profiler.stage("decode", len(content)):
+                return decode_bytes(content)[0]
+        except UnicodeDecodeError as e:
+            st.error(f"❌ Error reading file: {str(e)}")
+            return None
+    if st.session_state.last_json_output:
+        st.info("✅ Using output from JSON Object Builder")
+        return st.session_state.last_json_output
+    st.warning("⚠️ No output available from Object Builder. Please build an object first.")
+    return None
+
+def show_profile_panel(record: Dict[str, Any]):
+    """Show the stage timings of this rerun and the totals of recent reruns"""
+    st.caption(f"{record['label']} — {record['total_ms']:.1f} ms total, "
+               f"{record['stage_ms']:.1f} ms in timed stages")
+    if record['stages']:
+        st.dataframe(
+            [{
+                "Stage": entry['stage'],
+                "ms": round(entry['ms'], 2),
+                "Input": format_file_size(entry['bytes']) if entry['bytes'] is not None else "",
+                "Peak memory": format_file_size(entry['peak_memory_bytes']) if 'peak_memory_bytes' in entry else "",
+            } for entry in record['stages']],
+            use_container_width=True,
+            hide_index=True
+        )
+    if record['max_rss_bytes'] is not None:
+        st.caption(f"💾 Process peak RSS: {format_file_size(record['max_rss_bytes'])}")
+    
+    history = st.session_state.profile_history
+    if len(history) > 1:
+        st.markdown("**Recent reruns:**")
+        st.dataframe(
+            [{
+                "Time": past['timestamp'][-8:],
+                "Mode": past['label'],
+                "ms": round(past['total_ms'], 1),
+                "Input": format_file_size(past['input_bytes']) if past['input_bytes'] is not None else "",
+            } for past in reversed(history)],
+            use_container_width=True,
+            hide_index=True
+        )
+    
+    st.checkbox("Trace peak memory", key="profile_memory",
+                help="Measure per-stage peak memory with tracemalloc (slows processing down)")
+    if os.environ.get(PROFILE_LOG_ENV):
+        st.caption(f"📝 Appending records to {os.environ[PROFILE_LOG_ENV]}")
+
 # Initialize session state
 initialize_session_state()
 
+# Per-rerun instrumentation, shown in the sidebar and optionally logged
+profiler = Profiler(trace_memory=st.session_state.get('profile_memory', False))
+
 # Header
 st.title("🔧 JSON String Converter & Object Builder")
 st.markdown("Convert any input to JSON strings or build JSON objects from key-value pairs")
@@ -174,38 +698,73 @@ with st.sidebar:
     )
     
     if json_to_validate:
-        is_valid, message = validate_json_string(json_to_validate)
+        with profiler.stage("validate", len(json_to_validate)):
+            is_valid, message = validate_json_string(json_to_validate)
         if is_valid:
             st.success(f"✅ {message}")
-            try:
-                parsed = json.loads(json_to_validate)
-                st.info(f"📊 Type: {type(parsed).__name__}")
-                if isinstance(parsed, dict):
-                    st.info(f"🔑 Keys: {len(parsed)}")
-                elif isinstance(parsed, list):
-                    st.info(f"📝 Items: {len(parsed)}")
-            except:
-                pass
+            parsed = parse_json_cached(json_to_validate).value
+            st.info(f"📊 Type: {type(parsed).__name__}")
+            if isinstance(parsed, dict):
+                st.info(f"🔑 Keys: {len(parsed)}")
+            elif isinstance(parsed, list):
+                st.info(f"📝 Items: {len(parsed)}")
         else:
             st.error(f"❌ {message}")
     
+    with st.expander("📐 JSON Schema"):
+        validator_schema = st.text_area(
+            "Validate against this schema:",
+            placeholder='{"type": "object", "required": ["key"]}',
+            height=100,
+            key="validator_schema"
+        )
+        if json_to_validate and validator_schema and is_valid:
+            try:
+                # Compiled once per distinct schema text, then reused on every rerun
+                with profiler.stage("validate schema", len(json_to_validate)):
+                    violations = get_validator(validator_schema).validate(parsed, max_errors=SCHEMA_MAX_VIOLATIONS)
+            except SchemaError as e:
+                st.error(f"❌ Invalid schema: {e}")
+            except ValueError as e:
+                st.error(f"❌ {e}")
+            else:
+                if violations:
+                    st.error(f"❌ {len(violations):,} schema violation(s)")
+                    show_schema_violations(
+                        [{"Path": v["path"], "Message": v["message"]} for v in violations],
+                        truncated=len(violations) >= SCHEMA_MAX_VIOLATIONS
+                    )
+                else:
+                    st.success("✅ Matches the schema")
+    
     st.divider()
     
+    # Filled in at the end of the rerun, once every stage has been timed
+    profile_panel = st.empty()
+    
     # Quick Actions
     st.subheader("⚡ Quick Actions")
     if st.button("🔄 Reset All", help="Clear all data and start fresh"):
         for key in list(st.session_state.keys()):
-            if key.startswith(('kv_pairs', 'pair_counter', 'last_json_output')):
+            if key.startswith(('last_json_output', 'builder_', 'tree_editor', 'converter_fetched', 'multi_fetch_result')):
                 del st.session_state[key]
+        clear_all_pairs()
         initialize_session_state()
         st.rerun()
+    
+    st.checkbox("🗜️ Gzip downloads", key="gzip_downloads",
+                help="Compress full-output downloads and outputs too large for the clipboard")
+    
+    st.caption(f"⚙️ Serializer backend: {json_backend.get_backend_name()}")
 
 # Mode selection
 mode = st.radio(
     "Choose mode:",
-    ["🔤 String Converter", "🗂️ JSON Object Builder", "🔄 JSON Formatter"],
+    ["🔤 String Converter", "🗂️ JSON Object Builder", "🔄 JSON Formatter", "🌳 Tree Editor", "📜 NDJSON",
+     "🌐 Multi-URL Fetch", "🆚 JSON Diff"],
     horizontal=True
 )
+profiler.label = mode
 
 if mode == "🔤 String Converter":
     # String Converter Mode
@@ -246,22 +805,26 @@ if mode == "🔤 String Converter":
             
             if url_input and st.button("🌐 Fetch URL Content"):
                 try:
-                    import urllib.request
-                    import urllib.error
-                    
-                    with urllib.request.urlopen(url_input) as response:
-                        content = response.read()
-                        try:
-                            input_text = content.decode('utf-8')
-                            st.success(f"✅ Successfully fetched {format_file_size(len(content))} from URL")
-                        except UnicodeDecodeError:
-                            input_text = content.decode('latin-1')
-                            st.warning("⚠️ Used Latin-1 encoding as fallback")
-                            
-                except urllib.error.URLError as e:
+                    # Unchanged documents are revalidated against the disk cache instead of downloaded again
+                    with profiler.stage("fetch"):
+                        fetched = get_fetcher().fetch(url_input)
+                    st.session_state.converter_fetched = (url_input, fetched)
+                except FetchError as e:
                     st.error(f"❌ Error fetching URL: {str(e)}")
-                except Exception as e:
-                    st.error(f"❌ Unexpected error: {str(e)}")
+            
+            # The fetched content stays in use across reruns until another URL is fetched
+            fetched_url, fetched = st.session_state.get('converter_fetched', (None, None))
+            if fetched is not None and fetched_url == url_input:
+                content = fetched['content']
+                try:
+                    # A charset declared by the server wins; otherwise it is detected from the body
+                    input_text, _ = decode_bytes(content, fetched['charset'])
+                    source = "cache (not modified)" if fetched['from_cache'] else "URL"
+                    st.success(f"✅ Fetched {format_file_size(len(content))} from {source} "
+                               f"in {fetched['elapsed'] * 1000:.0f} ms")
+                except (UnicodeDecodeError, LookupError):
+                    input_text = content.decode('latin-1')
+                    st.warning("⚠️ Used Latin-1 encoding as fallback")
             
         elif input_method == "File Upload":
             uploaded_file = st.file_uploader(
@@ -272,28 +835,20 @@ if mode == "🔤 String Converter":
             
             if uploaded_file is not None:
                 try:
-                    content = uploaded_file.read()
+                    with profiler.stage("read upload", uploaded_file.size):
+                        content = get_upload_buffer(uploaded_file, 'converter_upload_spool')
                     file_size = len(content)
                     
-                    # Try UTF-8 first, then fallback to other encodings
-                    encodings = ['utf-8', 'latin-1', 'cp1252', 'ascii']
-                    decoded_content = None
-                    used_encoding = None
+                    # The encoding is picked from a sample, so the file is decoded only once
+                    with profiler.stage("decode", file_size):
+                        input_text, encoding_info = decode_bytes(content)
                     
-                    for encoding in encodings:
-                        try:
-                            decoded_content = content.decode(encoding)
-                            used_encoding = encoding
-                            break
-                        except UnicodeDecodeError:
-                            continue
-                    
-                    if decoded_content is not None:
-                        input_text = decoded_content
-                        st.success(f"✅ File '{uploaded_file.name}' loaded successfully!")
-                        st.info(f"📊 Size: {format_file_size(file_size)} | Encoding: {used_encoding.upper()}")
-                    else:
-                        st.error("❌ Could not decode file with any supported encoding")
+                    st.success(f"✅ File '{uploaded_file.name}' loaded successfully!")
+                    st.info(f"📊 Size: {format_file_size(file_size)} | "
+                            f"Encoding: {encoding_info['encoding'].upper()} "
+                            f"({encoding_info['confidence']:.0%} confidence, {encoding_info['reason']})")
+                    if encoding_info['confidence'] < 0.5:
+                        st.warning("⚠️ Encoding is a best guess; check accented characters in the output")
                         
                 except Exception as e:
                     st.error(f"❌ Error reading file: {str(e)}")
@@ -304,25 +859,26 @@ if mode == "🔤 String Converter":
         if input_text:
             try:
                 # Basic JSON string conversion
-                json_string = json.dumps(input_text, ensure_ascii=False)
+                with profiler.stage("convert", len(input_text)):
+                    json_string = json_backend.dumps(input_text, ensure_ascii=False)
                 
                 # Display result
-                st.code(json_string, language="json")
+                with profiler.stage("render", len(json_string)):
+                    show_json_viewer(json_string, "converter", file_name="string.json")
                 
                 # Action buttons
                 col_copy1, col_copy2 = st.columns(2)
                 
                 with col_copy1:
-                    if st.button("📋 Copy JSON String", key="copy_string", use_container_width=True):
-                        copy_to_clipboard_js(json_string)
-                        st.success("✅ Copied to clipboard!")
+                    copy_button("📋 Copy JSON String", "copy_string", json_string, "✅ Copied to clipboard!",
+                                file_name="string.json")
                 
                 with col_copy2:
-                    # Escaped version for code
-                    escaped_for_code = json_string.replace('\\', '\\\\').replace('"', '\\"')
-                    if st.button("📋 Copy for Code", key="copy_escaped", use_container_width=True):
-                        copy_to_clipboard_js(f'"{escaped_for_code}"')
-                        st.success("✅ Code-ready version copied!")
+                    # Escaped version for code, built only when it is copied or downloaded
+                    def escape_for_code() -> str:
+                        return '"' + json_string.replace('\\', '\\\\').replace('"', '\\"') + '"'
+                    copy_button("📋 Copy for Code", "copy_escaped", escape_for_code, "✅ Code-ready version copied!",
+                                file_name="string.txt", size_hint=len(json_string))
                 
                 # Stats
                 original_lines = input_text.count('\n') + 1 if input_text else 0
@@ -341,25 +897,24 @@ if mode == "🔤 String Converter":
                     
                     if ascii_only or sort_keys or indent_level:
                         try:
-                            advanced_json = json.dumps(
+                            advanced_json = json_backend.dumps(
                                 input_text,
                                 ensure_ascii=ascii_only,
                                 sort_keys=sort_keys,
                                 indent=indent_level
                             )
-                            st.code(advanced_json, language="json")
+                            show_json_viewer(advanced_json, "converter_advanced", file_name="string.json")
                             
-                            if st.button("📋 Copy Advanced JSON", key="copy_advanced"):
-                                copy_to_clipboard_js(advanced_json)
-                                st.success("✅ Advanced JSON copied!")
+                            copy_button("📋 Copy Advanced JSON", "copy_advanced", advanced_json,
+                                        "✅ Advanced JSON copied!", file_name="string.json")
                         except Exception as e:
                             st.error(f"❌ Error with advanced options: {str(e)}")
                 
                 # Validation preview
                 with st.expander("🔍 Validation Preview"):
                     try:
-                        parsed_back = json.loads(json_string)
-                        st.text_area("Parsed back:", value=str(parsed_back), height=100, disabled=True)
+                        parsed_back = json_backend.loads(json_string)
+                        st.text_area("Parsed back:", value=str(parsed_back)[:VIEWER_INLINE_CHARS], height=100, disabled=True)
                         
                         if parsed_back == input_text:
                             st.success("✅ Perfect match - JSON string is valid!")
@@ -378,6 +933,7 @@ elif mode == "🗂️ JSON Object Builder":
     # JSON Object Builder Mode
     st.subheader("🗂️ Build JSON Object from Key-Value Pairs")
     
+    store = st.session_state.pair_store
     col1, col2 = st.columns([1.2, 0.8])
     
     with col1:
@@ -387,14 +943,10 @@ elif mode == "🗂️ JSON Object Builder":
         col_btn1, col_btn2, col_btn3 = st.columns(3)
         
         with col_btn1:
-            if st.button("➕ Add Pair", use_container_width=True):
-                add_new_pair()
-                st.rerun()
+            st.button("➕ Add Pair", on_click=add_new_pair, use_container_width=True)
         
         with col_btn2:
-            if st.button("🗑️ Clear All", use_container_width=True):
-                clear_all_pairs()
-                st.rerun()
+            st.button("🗑️ Clear All", on_click=clear_all_pairs, use_container_width=True)
         
         with col_btn3:
             if st.button("📋 Import JSON", use_container_width=True):
@@ -414,33 +966,13 @@ elif mode == "🗂️ JSON Object Builder":
                 with col_import1:
                     if st.button("✅ Import", key="confirm_import"):
                         try:
-                            imported_data = json.loads(import_json)
+                            imported_data = parse_json_cached(import_json).get_value()
                             if isinstance(imported_data, dict):
-                                # Clear existing pairs and import new ones
-                                st.session_state.kv_pairs = []
-                                for key, value in imported_data.items():
-                                    value_type = "string"
-                                    if isinstance(value, bool):
-                                        value_type = "boolean"
-                                    elif isinstance(value, (int, float)):
-                                        value_type = "number"
-                                    elif isinstance(value, list):
-                                        value_type = "array"
-                                        value = json.dumps(value)
-                                    elif isinstance(value, dict):
-                                        value_type = "object"
-                                        value = json.dumps(value)
-                                    elif value is None:
-                                        value_type = "null"
-                                        value = ""
-                                    
-                                    st.session_state.kv_pairs.append({
-                                        "key": key,
-                                        "value": value,
-                                        "type": value_type,
-                                        "id": st.session_state.pair_counter
-                                    })
-                                    st.session_state.pair_counter += 1
+                                # Replace existing pairs with the imported ones
+                                store.load_object(imported_data)
+                                if not store:
+                                    store.append()
+                                st.session_state.builder_table_version += 1
                                 
                                 st.session_state.show_import = False
                                 st.success(f"✅ Imported {len(imported_data)} pairs!")
@@ -457,199 +989,205 @@ elif mode == "🗂️ JSON Object Builder":
                 
                 st.divider()
         
-        # Display all pairs
-        valid_pairs = []
+        # Large objects are only editable as a table; a widget per pair does not scale
+        if len(store) > FORM_MAX_PAIRS:
+            st.info(f"📊 {len(store):,} pairs — using the table editor")
+            builder_view = "📊 Table"
+        else:
+            builder_view = st.radio("Editor:", ["📝 Form", "📊 Table"], horizontal=True, key="builder_view")
         
-        for i, pair in enumerate(st.session_state.kv_pairs):
-            with st.container():
-                # Use custom styling for pair container
-                st.markdown('<div class="pair-container">', unsafe_allow_html=True)
-                
-                # Header with pair number and remove button
-                col_header, col_remove = st.columns([3, 1])
-                with col_header:
-                    st.markdown(f"**Pair {i+1}:**")
-                with col_remove:
-                    if st.button(f"🗑️", key=f"remove_{pair['id']}", help=f"Remove pair {i+1}"):
-                        remove_pair(pair['id'])
-                        st.rerun()
-                
-                # Key and type inputs
-                col_key, col_type = st.columns([2, 1])
-                with col_key:
-                    key = st.text_input(
-                        "Key:",
-                        value=pair["key"],
-                        key=f"key_{pair['id']}",
-                        placeholder="Enter key name"
-                    )
-                with col_type:
-                    value_type = st.selectbox(
-                        "Type:",
-                        ["string", "number", "boolean", "null", "array", "object"],
-                        index=["string", "number", "boolean", "null", "array", "object"].index(pair["type"]),
-                        key=f"type_{pair['id']}"
-                    )
-                
-                # Value input based on type
-                value = None
-                error_msg = None
-                
-                if value_type == "string":
-                    value = st.text_input(
-                        "Value:",
-                        value=str(pair["value"]) if pair["value"] is not None else "",
-                        key=f"value_{pair['id']}",
-                        placeholder="Enter string value"
-                    )
-                
-                elif value_type == "number":
-                    try:
-                        default_val = float(pair["value"]) if pair["value"] and pair["value"] != "" else 0.0
-                    except (ValueError, TypeError):
-                        default_val = 0.0
-                    value = st.number_input(
-                        "Value:",
-                        value=default_val,
-                        key=f"value_{pair['id']}",
-                        help="Enter a number (integer or decimal)"
-                    )
-                
-                elif value_type == "boolean":
-                    current_bool = pair["value"]
-                    if isinstance(current_bool, str):
-                        current_bool = current_bool.lower() == "true"
-                    elif not isinstance(current_bool, bool):
-                        current_bool = False
+        if builder_view == "📊 Table":
+            search = st.text_input("🔎 Search keys and values:", key="builder_search")
+            positions = store.search(search)
+            
+            page_start = 0
+            if len(positions) > TABLE_PAGE_SIZE:
+                page_start = st.number_input(
+                    "First row:",
+                    min_value=0,
+                    max_value=len(positions) - 1,
+                    step=TABLE_PAGE_SIZE,
+                    key="builder_table_start",
+                    help="Use − and + to move a page at a time"
+                )
+            page_positions = positions[page_start:page_start + TABLE_PAGE_SIZE]
+            
+            # Edits come back as a diff of this page and are applied in one batch
+            editor_key = f"builder_table_{st.session_state.builder_table_version}"
+            st.data_editor(
+                store.table_rows(page_positions),
+                column_config={
+                    "key": st.column_config.TextColumn("Key"),
+                    "type": st.column_config.SelectboxColumn("Type", options=VALUE_TYPES, required=True, default="string"),
+                    "value": st.column_config.TextColumn("Value", help="Arrays and objects as JSON; booleans as true/false"),
+                },
+                num_rows="dynamic",
+                hide_index=True,
+                use_container_width=True,
+                key=editor_key,
+                on_change=apply_pair_table_edits,
+                args=(editor_key, page_positions)
+            )
+            if page_positions:
+                st.caption(f"Rows {page_start + 1:,}–{page_start + len(page_positions):,} of {len(positions):,}"
+                           + (f" matching (of {len(store):,})" if search.strip() else ""))
+            elif search.strip():
+                st.caption("No pairs match the search")
+        
+        else:
+            # Display all pairs
+            for i in range(len(store)):
+                pair_id = store.ids[i]
+                pair_value = store.values[i]
+                # Arrays and objects are edited as text, serialized once per value
+                pair_text = store.text(i) if isinstance(pair_value, (list, dict)) else pair_value
+                with st.container():
+                    # Use custom styling for pair container
+                    st.markdown('<div class="pair-container">', unsafe_allow_html=True)
                     
-                    value = st.selectbox(
-                        "Value:",
-                        [True, False],
-                        index=0 if current_bool else 1,
-                        key=f"value_{pair['id']}"
-                    )
-                
-                elif value_type == "null":
+                    # Header with pair number and remove button
+                    col_header, col_remove = st.columns([3, 1])
+                    with col_header:
+                        st.markdown(f"**Pair {i+1}:**")
+                    with col_remove:
+                        st.button(f"🗑️", key=f"remove_{pair_id}", help=f"Remove pair {i+1}",
+                                  on_click=remove_pair, args=(pair_id,))
+                    
+                    # Key and type inputs
+                    col_key, col_type = st.columns([2, 1])
+                    with col_key:
+                        key = st.text_input(
+                            "Key:",
+                            value=store.keys[i],
+                            key=f"key_{pair_id}",
+                            placeholder="Enter key name"
+                        )
+                    with col_type:
+                        value_type = st.selectbox(
+                            "Type:",
+                            VALUE_TYPES,
+                            index=VALUE_TYPES.index(store.types[i]),
+                            key=f"type_{pair_id}"
+                        )
+                    
+                    # Value input based on type
                     value = None
-                    st.text("Value: null")
-                
-                elif value_type == "array":
-                    value_str = st.text_area(
-                        "Array (JSON format):",
-                        value=str(pair["value"]) if pair["value"] else "[]",
-                        key=f"value_{pair['id']}",
-                        height=80,
-                        placeholder='["item1", "item2", 123]',
-                        help="Enter a valid JSON array"
-                    )
                     
-                    try:
-                        if value_str.strip():
-                            parsed_value = json.loads(value_str)
-                            if isinstance(parsed_value, list):
-                                value = parsed_value
-                            else:
-                                error_msg = "Value must be a JSON array"
-                                value = value_str
-                        else:
-                            value = []
-                    except json.JSONDecodeError as e:
-                        error_msg = f"Invalid JSON array: {str(e)}"
-                        value = value_str
-                
-                elif value_type == "object":
-                    value_str = st.text_area(
-                        "Object (JSON format):",
-                        value=str(pair["value"]) if pair["value"] else "{}",
-                        key=f"value_{pair['id']}",
-                        height=80,
-                        placeholder='{"nested": "value"}',
-                        help="Enter a valid JSON object"
-                    )
+                    if value_type == "string":
+                        value = st.text_input(
+                            "Value:",
+                            value=str(pair_text) if pair_text is not None else "",
+                            key=f"value_{pair_id}",
+                            placeholder="Enter string value"
+                        )
                     
-                    try:
-                        if value_str.strip():
-                            parsed_value = json.loads(value_str)
-                            if isinstance(parsed_value, dict):
-                                value = parsed_value
-                            else:
-                                error_msg = "Value must be a JSON object"
-                                value = value_str
-                        else:
-                            value = {}
-                    except json.JSONDecodeError as e:
-                        error_msg = f"Invalid JSON object: {str(e)}"
-                        value = value_str
-                
-                # Show error if any
-                if error_msg:
-                    st.error(error_msg)
-                
-                # Update session state
-                st.session_state.kv_pairs[i]["key"] = key
-                st.session_state.kv_pairs[i]["value"] = value
-                st.session_state.kv_pairs[i]["type"] = value_type
-                
-                # Add to valid pairs if key is not empty and no errors
-                if key.strip() and not error_msg:
-                    valid_pairs.append((key.strip(), value))
-                
-                st.markdown('</div>', unsafe_allow_html=True)
-                st.divider()
+                    elif value_type == "number":
+                        try:
+                            default_val = float(pair_value) if pair_value and pair_value != "" else 0.0
+                        except (ValueError, TypeError):
+                            default_val = 0.0
+                        value = st.number_input(
+                            "Value:",
+                            value=default_val,
+                            key=f"value_{pair_id}",
+                            help="Enter a number (integer or decimal)"
+                        )
+                    
+                    elif value_type == "boolean":
+                        current_bool = pair_value
+                        if isinstance(current_bool, str):
+                            current_bool = current_bool.lower() == "true"
+                        elif not isinstance(current_bool, bool):
+                            current_bool = False
+                        
+                        value = st.selectbox(
+                            "Value:",
+                            [True, False],
+                            index=0 if current_bool else 1,
+                            key=f"value_{pair_id}"
+                        )
+                    
+                    elif value_type == "null":
+                        value = None
+                        st.text("Value: null")
+                    
+                    elif value_type == "array":
+                        value = st.text_area(
+                            "Array (JSON format):",
+                            value=str(pair_text) if pair_text else "[]",
+                            key=f"value_{pair_id}",
+                            height=80,
+                            placeholder='["item1", "item2", 123]',
+                            help="Enter a valid JSON array"
+                        )
+                    
+                    elif value_type == "object":
+                        value = st.text_area(
+                            "Object (JSON format):",
+                            value=str(pair_text) if pair_text else "{}",
+                            key=f"value_{pair_id}",
+                            height=80,
+                            placeholder='{"nested": "value"}',
+                            help="Enter a valid JSON object"
+                        )
+                    
+                    # Update the store (only changed values are parsed again) and show any error
+                    store.set(i, key, value_type, value)
+                    error_msg = store.validate(i)[1]
+                    if error_msg:
+                        st.error(error_msg)
+                    
+                    st.markdown('</div>', unsafe_allow_html=True)
+                    st.divider()
+    
+    # Pairs with a key and a valid value make up the output
+    with profiler.stage("build", len(store)):
+        json_obj, pair_errors = store.build()
+    
+    if builder_view == "📊 Table" and pair_errors:
+        with col1:
+            st.error(f"❌ {len(pair_errors):,} pair(s) have invalid values and are left out")
+            for position, message in pair_errors[:10]:
+                st.text(f"• {store.keys[position] or f'Row {position + 1}'}: {message}")
     
     with col2:
         st.markdown("#### JSON Object Output")
         
-        if valid_pairs:
+        if json_obj:
             try:
-                # Build JSON object
-                json_obj = {}
-                for key, value in valid_pairs:
-                    json_obj[key] = value
-                
-                # Convert to formatted JSON string
-                json_output = json.dumps(json_obj, indent=2, ensure_ascii=False)
+                # Convert to formatted JSON string, once per version of the pairs
+                cached_output = st.session_state.get('builder_output')
+                if cached_output and cached_output[0] == store.version:
+                    json_output = cached_output[1]
+                else:
+                    with profiler.stage("serialize"):
+                        json_output = json_backend.dumps(json_obj, indent=2, ensure_ascii=False)
+                    st.session_state.builder_output = (store.version, json_output)
                 st.session_state.last_json_output = json_output
                 
                 # Display JSON
-                st.code(json_output, language="json")
+                with profiler.stage("render", len(json_output)):
+                    show_json_viewer(json_output, "builder", value=json_obj, file_name="object.json")
                 
                 # Action buttons
-                if st.button("📋 Copy JSON Object", key="copy_object", use_container_width=True):
-                    copy_to_clipboard_js(json_output)
-                    st.success("✅ Copied to clipboard!")
-                
-                # Minified version
-                with st.expander("📦 Minified Version"):
-                    minified = json.dumps(json_obj, separators=(',', ':'), ensure_ascii=False)
-                    st.code(minified, language="json")
-                    
-                    if st.button("📋 Copy Minified", key="copy_minified", use_container_width=True):
-                        copy_to_clipboard_js(minified)
-                        st.success("✅ Minified version copied!")
+                copy_button("📋 Copy JSON Object", "copy_object", json_output, "✅ Copied to clipboard!",
+                            file_name="object.json")
+                
+                # Minified version (built only while the expander is open)
+                minified_panel = st.expander("📦 Minified Version", key="builder_minified_panel", on_change="rerun")
+                with minified_panel:
+                    if minified_panel.open:
+                        minified = reformat_text(json_output)
+                        show_json_viewer(minified, "builder_minified", file_name="object.min.json")
+                        
+                        copy_button("📋 Copy Minified", "copy_minified", minified, "✅ Minified version copied!",
+                                    file_name="object.min.json")
                 
                 # Schema info
-                with st.expander("📊 Object Schema"):
-                    def get_schema_info(obj, path=""):
-                        info = []
-                        if isinstance(obj, dict):
-                            for k, v in obj.items():
-                                current_path = f"{path}.{k}" if path else k
-                                type_name = type(v).__name__
-                                if isinstance(v, dict):
-                                    info.append(f"🔹 {current_path}: object ({len(v)} properties)")
-                                    info.extend(get_schema_info(v, current_path))
-                                elif isinstance(v, list):
-                                    info.append(f"🔹 {current_path}: array ({len(v)} items)")
-                                    if v and isinstance(v[0], (dict, list)):
-                                        info.extend(get_schema_info(v[0], f"{current_path}[0]"))
-                                else:
-                                    info.append(f"🔹 {current_path}: {type_name}")
-                        return info
-                    
-                    schema_info = get_schema_info(json_obj)
-                    for info in schema_info:
-                        st.text(info)
+                schema_panel = st.expander("📊 Object Schema", key="builder_schema_panel", on_change="rerun")
+                with schema_panel:
+                    if schema_panel.open:
+                        show_inferred_schema(infer_schema(json_obj), "builder")
                 
                 # Stats
                 st.info(f"📊 Properties: {len(json_obj)} | Characters: {len(json_output)}")
@@ -658,7 +1196,7 @@ elif mode == "🗂️ JSON Object Builder":
                 st.error(f"❌ Error building JSON: {str(e)}")
         else:
             st.info("👈 Add key-value pairs on the left to build JSON object")
-            if st.session_state.kv_pairs and not any(pair["key"].strip() for pair in st.session_state.kv_pairs):
+            if len(store) and not any(key.strip() for key in store.keys):
                 st.warning("⚠️ Please enter key names for your pairs")
 
 elif mode == "🔄 JSON Formatter":
@@ -677,6 +1215,7 @@ elif mode == "🔄 JSON Formatter":
         )
         
         input_json = ""
+        stream_file = None
         
         if json_input_method == "Paste JSON":
             input_json = st.text_area(
@@ -693,12 +1232,29 @@ elif mode == "🔄 JSON Formatter":
             )
             
             if json_file is not None:
-                try:
-                    content = json_file.read()
-                    input_json = content.decode('utf-8')
-                    st.success(f"✅ File '{json_file.name}' loaded successfully!")
-                except Exception as e:
-                    st.error(f"❌ Error reading file: {str(e)}")
+                streaming_mode = st.checkbox(
+                    "⚡ Streaming mode",
+                    value=json_file.size > STREAMING_THRESHOLD_BYTES,
+                    help="Process the file in chunks without loading the whole document into memory"
+                )
+                if streaming_mode:
+                    stream_file = json_file
+                    st.success(f"✅ File '{json_file.name}' ({format_file_size(json_file.size)}) will be streamed")
+                else:
+                    try:
+                        with profiler.stage("read upload", json_file.size):
+                            content = get_upload_buffer(json_file, 'formatter_upload_spool')
+                        # UTF-8 is parsed and hashed straight from the upload buffer; other encodings are decoded first
+                        encoding_info = detect_encoding(content[:ENCODING_SAMPLE_BYTES],
+                                                        complete=len(content) <= ENCODING_SAMPLE_BYTES)
+                        if encoding_info['encoding'] == 'utf-8':
+                            input_json = content
+                        else:
+                            with profiler.stage("decode", len(content)):
+                                input_json, _ = decode_bytes(content)
+                        st.success(f"✅ File '{json_file.name}' loaded successfully!")
+                    except Exception as e:
+                        st.error(f"❌ Error reading file: {str(e)}")
         
         elif json_input_method == "Use Last Object Builder Output":
             if st.session_state.last_json_output:
@@ -710,10 +1266,111 @@ elif mode == "🔄 JSON Formatter":
     with col2:
         st.markdown("#### Formatted Output")
         
-        if input_json:
+        if stream_file is not None:
+            # Streaming mode: every pass re-reads the upload in chunks, no parsed tree is kept
+            upload_buffer = get_upload_buffer(stream_file, 'formatter_upload_spool')
+            
+            def open_text():
+                return iter_decoded(iter_buffer_chunks(upload_buffer))
+            
+            def open_events():
+                return iter_events(open_text(), subtrees=True)
+            
+            st.markdown("**Formatting Options:**")
+            col_opt1, col_opt2 = st.columns(2)
+            
+            with col_opt1:
+                indent_size = st.selectbox("Indentation:", [2, 4, 8], index=0, key="stream_indent")
+            
+            with col_opt2:
+                ensure_ascii_fmt = st.checkbox("ASCII Only", value=False, key="stream_ascii")
+            
+            st.caption("Sort Keys is not available in streaming mode")
+            
+            # Validation and analysis need one full pass; remember the result per upload
+            if st.session_state.get('stream_analysis', (None,))[0] != stream_file.file_id:
+                try:
+                    with profiler.stage("stream analyze", stream_file.size):
+                        result = stream_analyze(open_events())
+                except (json.JSONDecodeError, UnicodeDecodeError) as e:
+                    result = e
+                st.session_state.stream_analysis = (stream_file.file_id, result)
+            stream_result = st.session_state.stream_analysis[1]
+            
+            if isinstance(stream_result, json.JSONDecodeError):
+                show_json_error(stream_result)
+            elif isinstance(stream_result, UnicodeDecodeError):
+                st.error(f"❌ Error reading file: {str(stream_result)}")
+            else:
+                # Preview only the beginning of the output
+                preview_parts = []
+                preview_size = 0
+                with profiler.stage("stream preview"):
+                    for piece in stream_reformat(open_text(), indent=indent_size, ensure_ascii=ensure_ascii_fmt):
+                        preview_parts.append(piece)
+                        preview_size += len(piece)
+                        if preview_size >= STREAMING_PREVIEW_CHARS:
+                            break
+                st.code(''.join(preview_parts)[:STREAMING_PREVIEW_CHARS], language="json")
+                if preview_size >= STREAMING_PREVIEW_CHARS:
+                    st.caption(f"Showing the first {STREAMING_PREVIEW_CHARS:,} characters. Download for the full output.")
+                
+                # Full outputs are only generated when a download is requested
+                base_name = stream_file.name.rsplit('.', 1)[0]
+                col_action1, col_action2 = st.columns(2)
+                
+                with col_action1:
+                    st.download_button(
+                        "⬇️ Download Formatted",
+                        data=lambda: ''.join(stream_reformat(
+                            open_text(), indent=indent_size, ensure_ascii=ensure_ascii_fmt
+                        )).encode('utf-8'),
+                        file_name=f"{base_name}.formatted.json",
+                        mime="application/json",
+                        use_container_width=True
+                    )
+                
+                with col_action2:
+                    st.download_button(
+                        "📦 Download Minified",
+                        data=lambda: ''.join(stream_reformat(
+                            open_text(), indent=None, ensure_ascii=ensure_ascii_fmt
+                        )).encode('utf-8'),
+                        file_name=f"{base_name}.min.json",
+                        mime="application/json",
+                        use_container_width=True
+                    )
+                
+                with st.expander("📊 JSON Analysis"):
+                    show_json_analysis(stream_result, {"File Size": format_file_size(stream_file.size)})
+                
+                # The schema takes another pass over the file, so it is only inferred on request
+                schema_panel = st.expander("🧬 Inferred Schema", key="stream_schema_panel", on_change="rerun")
+                with schema_panel:
+                    if schema_panel.open:
+                        schema_sample = st.number_input(
+                            "Elements sampled per array (0 = all)", min_value=0, value=0, step=1000,
+                            key="stream_schema_sample",
+                            help="Long arrays contribute a random sample of their elements; lengths stay exact"
+                        )
+                        schema_key = (stream_file.file_id, schema_sample)
+                        cached_schema = st.session_state.get('stream_schema')
+                        if cached_schema is None or cached_schema[0] != schema_key:
+                            with profiler.stage("infer schema", stream_file.size):
+                                accumulator = SchemaAccumulator(schema_sample or None)
+                                accumulator.add_events(open_events())
+                            cached_schema = (schema_key, accumulator.schema())
+                            st.session_state.stream_schema = cached_schema
+                        show_inferred_schema(cached_schema[1], "stream")
+                
+                st.success("✅ Valid JSON")
+        
+        elif input_json:
             try:
-                # Parse JSON
-                parsed_json = json.loads(input_json)
+                # Parse JSON (cached per distinct document)
+                with profiler.stage("parse", len(input_json)):
+                    parsed_doc = parse_json_cached(input_json)
+                parsed_json = parsed_doc.get_value()
                 
                 # Formatting options
                 st.markdown("**Formatting Options:**")
@@ -728,125 +1385,632 @@ elif mode == "🔄 JSON Formatter":
                     compact_fmt = st.checkbox("Compact Arrays", value=False)
                 
                 # Format JSON
-                if compact_fmt:
-                    # Custom compact formatting for arrays
-                    formatted_json = json.dumps(
-                        parsed_json,
-                        indent=indent_size,
-                        sort_keys=sort_keys_fmt,
-                        ensure_ascii=ensure_ascii_fmt,
-                        separators=(',', ': ')
-                    )
-                else:
-                    formatted_json = json.dumps(
-                        parsed_json,
-                        indent=indent_size,
-                        sort_keys=sort_keys_fmt,
-                        ensure_ascii=ensure_ascii_fmt
+                format_key = (indent_size, sort_keys_fmt, ensure_ascii_fmt, compact_fmt)
+                with profiler.stage("format", len(input_json)):
+                    formatted_json = parsed_doc.derive(
+                        ('formatted',) + format_key,
+                        lambda obj: format_json(
+                            obj,
+                            indent=indent_size,
+                            sort_keys=sort_keys_fmt,
+                            ensure_ascii=ensure_ascii_fmt,
+                            compact=compact_fmt
+                        )
                     )
                 
-                # Display formatted JSON
-                st.code(formatted_json, language="json")
+                # Display formatted JSON; large outputs are paged from a cached line index
+                with profiler.stage("render", len(formatted_json)):
+                    line_index = None
+                    if len(formatted_json) > VIEWER_INLINE_CHARS:
+                        line_index = parsed_doc.derive(('line_index',) + format_key,
+                                                       lambda obj: LineIndex(formatted_json))
+                    show_json_viewer(formatted_json, "formatter", value=parsed_json, sort_keys=sort_keys_fmt,
+                                     line_index=line_index, file_name="formatted.json")
                 
                 # Action buttons
                 col_action1, col_action2 = st.columns(2)
                 
                 with col_action1:
-                    if st.button("📋 Copy Formatted", key="copy_formatted", use_container_width=True):
-                        copy_to_clipboard_js(formatted_json)
-                        st.success("✅ Formatted JSON copied!")
+                    copy_button("📋 Copy Formatted", "copy_formatted", formatted_json, "✅ Formatted JSON copied!",
+                                file_name="formatted.json")
+                
+                # Minified output and analysis are only computed when asked for, then memoized on
+                # the parsed document. Minifying only strips whitespace, so values keep their spelling
+                def get_minified_json() -> str:
+                    if isinstance(input_json, str):
+                        chunks = [input_json]
+                    else:
+                        chunks = iter_decoded(iter_buffer_chunks(input_json))
+                    with profiler.stage("minify", len(input_json)):
+                        return parsed_doc.derive(
+                            ('minified', ensure_ascii_fmt),
+                            lambda obj: ''.join(stream_reformat(chunks, ensure_ascii=ensure_ascii_fmt))
+                        )
                 
                 with col_action2:
-                    # Minified version
-                    minified_json = json.dumps(parsed_json, separators=(',', ':'), ensure_ascii=ensure_ascii_fmt)
-                    if st.button("📦 Copy Minified", key="copy_minified_fmt", use_container_width=True):
-                        copy_to_clipboard_js(minified_json)
-                        st.success("✅ Minified JSON copied!")
+                    # The minified text is never longer than the formatted one
+                    copy_button("📦 Copy Minified", "copy_minified_fmt", get_minified_json, "✅ Minified JSON copied!",
+                                file_name="minified.json", size_hint=len(formatted_json))
                 
-                # Analysis section
-                with st.expander("📊 JSON Analysis"):
-                    def analyze_json(obj, depth=0):
-                        analysis = {
-                            'total_keys': 0,
-                            'max_depth': depth,
-                            'types': {},
-                            'arrays': 0,
-                            'objects': 0
-                        }
-                        
-                        if isinstance(obj, dict):
-                            analysis['objects'] += 1
-                            analysis['total_keys'] += len(obj)
-                            for key, value in obj.items():
-                                value_type = type(value).__name__
-                                analysis['types'][value_type] = analysis['types'].get(value_type, 0) + 1
-                                
-                                if isinstance(value, (dict, list)):
-                                    sub_analysis = analyze_json(value, depth + 1)
-                                    analysis['total_keys'] += sub_analysis['total_keys']
-                                    analysis['max_depth'] = max(analysis['max_depth'], sub_analysis['max_depth'])
-                                    analysis['arrays'] += sub_analysis['arrays']
-                                    analysis['objects'] += sub_analysis['objects']
-                                    
-                                    for t, count in sub_analysis['types'].items():
-                                        analysis['types'][t] = analysis['types'].get(t, 0) + count
-                        
-                        elif isinstance(obj, list):
-                            analysis['arrays'] += 1
-                            for item in obj:
-                                if isinstance(item, (dict, list)):
-                                    sub_analysis = analyze_json(item, depth + 1)
-                                    analysis['total_keys'] += sub_analysis['total_keys']
-                                    analysis['max_depth'] = max(analysis['max_depth'], sub_analysis['max_depth'])
-                                    analysis['arrays'] += sub_analysis['arrays']
-                                    analysis['objects'] += sub_analysis['objects']
-                                    
-                                    for t, count in sub_analysis['types'].items():
-                                        analysis['types'][t] = analysis['types'].get(t, 0) + count
-                                else:
-                                    value_type = type(item).__name__
-                                    analysis['types'][value_type] = analysis['types'].get(value_type, 0) + 1
-                        
-                        return analysis
-                    
-                    analysis = analyze_json(parsed_json)
-                    
-                    col_stats1, col_stats2 = st.columns(2)
-                    
-                    with col_stats1:
-                        st.metric("Total Keys", analysis['total_keys'])
-                        st.metric("Max Depth", analysis['max_depth'])
-                        st.metric("Objects", analysis['objects'])
-                    
-                    with col_stats2:
-                        st.metric("Arrays", analysis['arrays'])
-                        st.metric("Total Size", f"{len(formatted_json)} chars")
-                        st.metric("Minified Size", f"{len(minified_json)} chars")
-                    
-                    if analysis['types']:
-                        st.markdown("**Data Types:**")
-                        for data_type, count in sorted(analysis['types'].items()):
-                            st.text(f"• {data_type}: {count}")
+                # Analysis section (runs only while the expander is open)
+                analysis_panel = st.expander("📊 JSON Analysis", key="formatter_analysis_panel", on_change="rerun")
+                with analysis_panel:
+                    if analysis_panel.open:
+                        with profiler.stage("analyze", len(input_json)):
+                            analysis = parsed_doc.derive('analysis', analyze_json)
+                        show_json_analysis(analysis, {
+                            "Total Size": f"{len(formatted_json)} chars",
+                            "Minified Size": f"{len(get_minified_json())} chars"
+                        })
+                
+                query_panel = st.expander("🔎 Query", key="formatter_query_panel", on_change="rerun")
+                with query_panel:
+                    if query_panel.open:
+                        def get_query_index() -> QueryIndex:
+                            # Built once per document, on the first query that needs it
+                            with profiler.stage("query index", len(input_json)):
+                                return parsed_doc.derive('query_index', QueryIndex)
+                        show_query_panel(parsed_json, "formatter", get_query_index)
+                
+                search_panel = st.expander("🔍 Search", key="formatter_search_panel", on_change="rerun")
+                with search_panel:
+                    if search_panel.open:
+                        def get_search_index() -> SearchIndex:
+                            # One pass over the document, then memoized with it
+                            with profiler.stage("search index", len(input_json)):
+                                return parsed_doc.derive('search_index', SearchIndex)
+                        show_search_panel(parsed_json, "formatter", get_search_index, sort_keys=sort_keys_fmt)
+                
+                schema_panel = st.expander("🧬 Inferred Schema", key="formatter_schema_panel", on_change="rerun")
+                with schema_panel:
+                    if schema_panel.open:
+                        with profiler.stage("infer schema", len(input_json)):
+                            inferred = parsed_doc.derive('schema', infer_schema)
+                        show_inferred_schema(inferred, "formatter")
+                
+                tree_panel = st.expander("🌳 Tree View", key="formatter_tree_panel", on_change="rerun")
+                with tree_panel:
+                    if tree_panel.open:
+                        show_json_tree(parsed_json, "formatter")
                 
                 # Validation info
                 st.success("✅ Valid JSON")
                 
             except json.JSONDecodeError as e:
-                st.error(f"❌ Invalid JSON: {str(e)}")
-                
-                # Try to show where the error is
-                try:
-                    error_line = str(e).split('line ')[1].split(' ')[0] if 'line ' in str(e) else None
-                    if error_line:
-                        st.error(f"Error appears to be around line {error_line}")
-                except:
-                    pass
+                show_json_error(e)
                     
             except Exception as e:
                 st.error(f"❌ Error processing JSON: {str(e)}")
         else:
             st.info("👈 Enter JSON on the left to format it")
 
+elif mode == "🌳 Tree Editor":
+    # Tree Editor Mode: edits are JSON Patches applied to a persistent document
+    st.subheader("🌳 Nested Tree Editor")
+    
+    col1, col2 = st.columns([1, 1])
+    
+    with col1:
+        st.markdown("#### Document")
+        
+        tree_input_method = st.selectbox(
+            "Choose input method:",
+            ["Paste JSON", "Upload JSON File", "Use Last Object Builder Output"],
+            key="tree_editor_input_method"
+        )
+        
+        tree_input = ""
+        if tree_input_method == "Paste JSON":
+            tree_input = st.text_area(
+                "Paste your JSON here:",
+                placeholder='{"service": {"name": "api", "replicas": 3}}',
+                height=150,
+                key="tree_editor_input"
+            )
+        elif tree_input_method == "Upload JSON File":
+            tree_file = st.file_uploader("Upload JSON file", type=['json'], key="tree_editor_upload")
+            if tree_file is not None:
+                try:
+                    with profiler.stage("decode", tree_file.size):
+                        tree_input, _ = decode_bytes(tree_file.getvalue())
+                except UnicodeDecodeError as e:
+                    st.error(f"❌ Error reading file: {str(e)}")
+        elif st.session_state.last_json_output:
+            tree_input = st.session_state.last_json_output
+            st.info("✅ Using output from JSON Object Builder")
+        else:
+            st.warning("⚠️ No output available from Object Builder. Please build an object first.")
+        
+        if tree_input and st.button("📥 Load Document", use_container_width=True):
+            try:
+                with profiler.stage("parse", len(tree_input)):
+                    document = parse_json_cached(tree_input).get_value()
+                load_tree_document(document)
+            except json.JSONDecodeError as e:
+                show_json_error(e)
+        
+        tree_editor = st.session_state.get('tree_editor')
+        if tree_editor is not None:
+            st.markdown("#### Navigate")
+            show_json_tree(tree_editor.document, "tree_editor")
+    
+    with col2:
+        st.markdown("#### Edit Node")
+        
+        if tree_editor is None:
+            st.info("👈 Load a document on the left to start editing")
+        else:
+            message = st.session_state.get('tree_editor_message')
+            if message:
+                (st.error if message.startswith("❌") else st.success)(message)
+            
+            try:
+                node_parts = parse_path(st.session_state.tree_editor_tree_path)
+                node = resolve_path(tree_editor.document, node_parts)
+            except ValueError:
+                node_parts = None
+                st.warning("⚠️ Pick an existing node in the tree to edit it")
+            
+            if node_parts is not None:
+                node_pointer = format_pointer(node_parts)
+                st.caption(f"📍 {format_path(node_parts)} — JSON Pointer: `{node_pointer or '(whole document)'}`")
+                
+                # The node is only serialized while this panel is open
+                edit_panel = st.expander("✏️ Replace Value", key="tree_editor_edit_panel", on_change="rerun")
+                with edit_panel:
+                    if edit_panel.open:
+                        node_text = format_json(node, indent=2)
+                        if len(node_text) > TREE_EDIT_MAX_CHARS:
+                            st.warning(f"⚠️ This node is {format_file_size(len(node_text))}; "
+                                       f"open a smaller child or apply a JSON Patch")
+                        else:
+                            value_key = f"tree_editor_value_{st.session_state.tree_editor_version}_{node_pointer}"
+                            st.text_area("Value (JSON):", value=node_text, height=200, key=value_key)
+                            st.button("💾 Replace", on_click=edit_tree_document,
+                                      args=("replace", node_parts, value_key), use_container_width=True)
+                
+                if isinstance(node, (dict, list)):
+                    with st.expander("➕ Add Child"):
+                        st.text_input("Key:" if isinstance(node, dict) else "Index (blank to append):",
+                                      key="tree_editor_child_key")
+                        st.text_area("Value (JSON, blank for null):", height=100, key="tree_editor_child_value")
+                        st.button("➕ Add", on_click=edit_tree_document, args=("add", node_parts),
+                                  use_container_width=True)
+                
+                if node_parts:
+                    parent = resolve_path(tree_editor.document, node_parts[:-1])
+                    if isinstance(parent, dict):
+                        col_rename1, col_rename2 = st.columns([2, 1])
+                        with col_rename1:
+                            st.text_input("New key:", key="tree_editor_new_key", label_visibility="collapsed",
+                                          placeholder="New key")
+                        with col_rename2:
+                            st.button("✏️ Rename", on_click=edit_tree_document, args=("rename", node_parts),
+                                      use_container_width=True)
+                    st.button("🗑️ Remove Node", on_click=edit_tree_document, args=("remove", node_parts),
+                              use_container_width=True)
+                
+                with st.expander("🧩 Apply JSON Patch"):
+                    st.text_area(
+                        "Operations (RFC 6902):",
+                        placeholder='[{"op": "replace", "path": "/service/replicas", "value": 5}]',
+                        height=120,
+                        key="tree_editor_patch"
+                    )
+                    st.button("🧩 Apply Patch", on_click=edit_tree_document, args=("patch", node_parts),
+                              use_container_width=True)
+            
+            col_undo, col_redo = st.columns(2)
+            with col_undo:
+                st.button(f"↩️ Undo ({tree_editor.undo_steps})", on_click=undo_tree_edit,
+                          disabled=not tree_editor.can_undo, use_container_width=True)
+            with col_redo:
+                st.button(f"↪️ Redo ({tree_editor.redo_steps})", on_click=redo_tree_edit,
+                          disabled=not tree_editor.can_redo, use_container_width=True)
+    
+    if tree_editor is not None:
+        st.markdown("#### Edited Document")
+        tree_indent = st.selectbox("Indentation:", [2, 4, 8], index=0, key="tree_editor_indent")
+        
+        col_download1, col_download2 = st.columns(2)
+        with col_download1:
+            # Unchanged subtrees reuse their text from the previous serialization
+            st.download_button(
+                "⬇️ Download Document",
+                data=lambda: tree_editor.serialize(indent=tree_indent).encode('utf-8'),
+                file_name="document.json",
+                mime="application/json",
+                use_container_width=True
+            )
+        with col_download2:
+            st.download_button(
+                f"⬇️ Download JSON Patch ({len(tree_editor.patch()):,} ops)",
+                data=lambda: json_backend.dumps(tree_editor.patch(), indent=2, ensure_ascii=False).encode('utf-8'),
+                file_name="changes.json-patch",
+                mime="application/json-patch+json",
+                use_container_width=True
+            )
+        
+        preview_panel = st.expander("📄 Document Preview", key="tree_editor_preview_panel", on_change="rerun")
+        with preview_panel:
+            if preview_panel.open:
+                with profiler.stage("serialize"):
+                    tree_output = tree_editor.serialize(indent=tree_indent)
+                with profiler.stage("render", len(tree_output)):
+                    # The line index is rebuilt only when the document or indentation changes
+                    stored_index = st.session_state.get('tree_editor_line_index')
+                    if stored_index is None or stored_index[0] is not tree_output:
+                        stored_index = (tree_output, LineIndex(tree_output))
+                        st.session_state.tree_editor_line_index = stored_index
+                    show_json_viewer(tree_output, "tree_editor_output", value=tree_editor.document,
+                                     line_index=stored_index[1], download=False)
+
+elif mode == "📜 NDJSON":
+    # NDJSON / JSON Lines Mode
+    st.subheader("📜 NDJSON / JSON Lines Processor")
+    
+    col1, col2 = st.columns([1, 1])
+    
+    with col1:
+        st.markdown("#### Input Records")
+        
+        ndjson_input_method = st.selectbox(
+            "Choose input method:",
+            ["Paste NDJSON", "Upload NDJSON File"],
+            key="ndjson_input_method"
+        )
+        
+        ndjson_lines = None
+        ndjson_signature = None
+        
+        if ndjson_input_method == "Paste NDJSON":
+            ndjson_text = st.text_area(
+                "Paste one JSON value per line:",
+                placeholder='{"id": 1, "name": "first"}\n{"id": 2, "name": "second"}',
+                height=300
+            )
+            if ndjson_text:
+                # Split on line breaks only, as the upload path does; U+2028 and the like may sit inside strings
+                ndjson_lines = io.StringIO(ndjson_text, newline=None)
+                ndjson_signature = document_hash(ndjson_text)
+        
+        else:
+            ndjson_file = st.file_uploader(
+                "Upload NDJSON file",
+                type=['jsonl', 'ndjson', 'json', 'txt'],
+                help="One JSON value per line"
+            )
+            if ndjson_file is not None:
+                # Lines are decoded lazily from the upload buffer, in the encoding detected from its start
+                ndjson_bytes = ndjson_file.getvalue()
+                ndjson_encoding = detect_encoding(ndjson_bytes[:ENCODING_SAMPLE_BYTES],
+                                                  complete=len(ndjson_bytes) <= ENCODING_SAMPLE_BYTES)
+                ndjson_lines = io.TextIOWrapper(io.BytesIO(ndjson_bytes), encoding=ndjson_encoding['encoding'])
+                ndjson_signature = ndjson_file.file_id
+                st.info(f"📊 Size: {format_file_size(ndjson_file.size)} | "
+                        f"Encoding: {ndjson_encoding['encoding'].upper()}")
+        
+        st.markdown("**Processing Options:**")
+        col_opt1, col_opt2 = st.columns(2)
+        
+        with col_opt1:
+            ndjson_action = st.selectbox("Action:", ["Validate", "Minify", "Format"])
+            ndjson_indent = st.selectbox("Indentation:", [2, 4, 8], index=0, key="ndjson_indent")
+        
+        with col_opt2:
+            ndjson_sort_keys = st.checkbox("Sort Keys", value=False, key="ndjson_sort_keys")
+            ndjson_ascii = st.checkbox("ASCII Only", value=False, key="ndjson_ascii")
+            ndjson_schema = st.checkbox("🧬 Infer Schema", value=True, key="ndjson_schema",
+                                        help="Merge the structure of every record into one JSON Schema")
+        
+        ndjson_json_schema = st.text_area(
+            "📐 Validate records against a JSON Schema (optional):",
+            placeholder='{"type": "object", "required": ["id"]}',
+            height=100,
+            key="ndjson_json_schema"
+        )
+        
+        ndjson_options = {"indent": ndjson_indent, "sort_keys": ndjson_sort_keys, "ensure_ascii": ndjson_ascii}
+        run_key = (ndjson_signature, ndjson_action, tuple(sorted(ndjson_options.items())), ndjson_schema,
+                   document_hash(ndjson_json_schema) if ndjson_json_schema else None)
+        
+        if ndjson_lines is not None and st.button("▶️ Process Records", use_container_width=True):
+            try:
+                with st.spinner("Processing records..."), profiler.stage("ndjson"):
+                    result = process_ndjson(ndjson_lines, ndjson_action.lower(), ndjson_options,
+                                            schema=ndjson_schema, json_schema=ndjson_json_schema or None)
+                st.session_state.ndjson_result = (run_key, result)
+            except SchemaError as e:
+                st.error(f"❌ Invalid schema: {e}")
+            except UnicodeDecodeError as e:
+                st.error(f"❌ Error reading file: {str(e)}")
+    
+    with col2:
+        st.markdown("#### Results")
+        
+        stored = st.session_state.get('ndjson_result')
+        if stored and stored[0] == run_key:
+            result = stored[1]
+            
+            col_m1, col_m2, col_m3 = st.columns(3)
+            col_m1.metric("Records", f"{result['records']:,}")
+            col_m2.metric("Errors", f"{result['error_count']:,}")
+            col_m3.metric("Lines/s", f"{result['lines'] / max(result['elapsed'], 1e-9):,.0f}")
+            
+            if result['error_count']:
+                st.error(f"❌ {result['error_count']:,} invalid line(s)")
+                st.dataframe(
+                    [{"Line": line_no, "Error": message} for line_no, message in result['errors']],
+                    use_container_width=True,
+                    hide_index=True
+                )
+                if result['error_count'] > len(result['errors']):
+                    st.caption(f"Showing the first {len(result['errors']):,} errors")
+            else:
+                st.success(f"✅ All {result['records']:,} records are valid JSON")
+            
+            if run_key[-1] is not None:
+                if result['invalid_records']:
+                    st.error(f"❌ {result['invalid_records']:,} record(s) violate the schema")
+                    listed_records = len({line_no for line_no, _, _ in result['violations']})
+                    show_schema_violations(
+                        [{"Line": line_no, "Path": path, "Message": message}
+                         for line_no, path, message in result['violations']],
+                        truncated=listed_records < result['invalid_records']
+                    )
+                else:
+                    st.success(f"✅ All {result['records']:,} records match the schema")
+            
+            if result['output'] is not None:
+                show_json_viewer(result['output'], "ndjson", download=False)
+                st.download_button(
+                    "⬇️ Download Output",
+                    data=result['output'].encode('utf-8'),
+                    file_name="output.jsonl",
+                    mime="application/x-ndjson",
+                    use_container_width=True
+                )
+            
+            with st.expander("📊 Aggregate Analysis"):
+                record_types = ", ".join(f"{t}: {n:,}" for t, n in sorted(result['record_types'].items()))
+                st.markdown(f"**Record Types:** {record_types or 'none'}")
+                show_json_analysis(result['analysis'], {"Lines": f"{result['lines']:,}"})
+            
+            if result['schema'] is not None:
+                with st.expander("🧬 Inferred Schema"):
+                    show_inferred_schema(result['schema'], "ndjson")
+        else:
+            st.info("👈 Provide records on the left and press Process")
+
+elif mode == "🌐 Multi-URL Fetch":
+    # Multi-URL Fetch Mode: many endpoints fetched concurrently and merged in order
+    st.subheader("🌐 Multi-URL Fetch & Merge")
+    
+    col1, col2 = st.columns([1, 1])
+    
+    with col1:
+        st.markdown("#### URLs")
+        
+        url_source = st.radio("URL source:", ["URL List", "URL Template"], horizontal=True, key="multi_fetch_source")
+        
+        fetch_urls: List[str] = []
+        try:
+            if url_source == "URL List":
+                fetch_urls = parse_url_list(st.text_area(
+                    "One URL per line:",
+                    placeholder="https://api.example.com/items?page=1\nhttps://api.example.com/items?page=2",
+                    height=200,
+                    key="multi_fetch_urls"
+                ))
+            else:
+                url_template = st.text_input(
+                    "URL template:",
+                    placeholder="https://api.example.com/items?page={page}",
+                    key="multi_fetch_template"
+                )
+                col_page1, col_page2, col_page3 = st.columns(3)
+                with col_page1:
+                    first_page = st.number_input("First page:", value=1, step=1, key="multi_fetch_first")
+                with col_page2:
+                    last_page = st.number_input("Last page:", value=10, step=1, key="multi_fetch_last")
+                with col_page3:
+                    page_step = st.number_input("Step:", min_value=1, value=1, step=1, key="multi_fetch_step")
+                if url_template:
+                    fetch_urls = expand_url_template(url_template, int(first_page), int(last_page), int(page_step))
+        except ValueError as e:
+            st.error(f"❌ {str(e)}")
+        
+        if len(fetch_urls) > MULTI_FETCH_MAX_URLS:
+            st.warning(f"⚠️ Only the first {MULTI_FETCH_MAX_URLS:,} of {len(fetch_urls):,} URLs will be fetched")
+            fetch_urls = fetch_urls[:MULTI_FETCH_MAX_URLS]
+        if fetch_urls:
+            st.caption(f"🔗 {len(fetch_urls):,} URL(s)")
+        
+        st.markdown("**Options:**")
+        col_opt1, col_opt2 = st.columns(2)
+        
+        with col_opt1:
+            fetch_concurrency = st.slider("Concurrent requests:", 1, 32, DEFAULT_CONCURRENCY, key="multi_fetch_concurrency")
+            merge_format = st.selectbox("Merged output:", ["JSON Array", "NDJSON"], key="multi_fetch_format")
+        
+        with col_opt2:
+            items_path = st.text_input("Items path (optional):", placeholder="$.data", key="multi_fetch_items_path",
+                                       help="Keep only this part of each response, e.g. the array of a paginated API")
+            flatten_arrays = st.checkbox("Flatten arrays", value=True, key="multi_fetch_flatten",
+                                         help="Merge the items of array responses instead of the arrays themselves")
+        
+        if fetch_urls and st.button("🌐 Fetch All", use_container_width=True):
+            progress = st.progress(0.0, text="Fetching...")
+            completed = []
+            
+            def report_progress(entry: Dict[str, Any]):
+                completed.append(entry)
+                progress.progress(len(completed) / len(fetch_urls),
+                                  text=f"Fetched {len(completed):,} of {len(fetch_urls):,}")
+            
+            try:
+                with profiler.stage("fetch"):
+                    merge_result = fetch_and_merge(fetch_urls, concurrency=fetch_concurrency,
+                                                   items_path=items_path, flatten=flatten_arrays,
+                                                   on_result=report_progress)
+                st.session_state.multi_fetch_result = merge_result
+            except ValueError as e:
+                st.error(f"❌ {str(e)}")
+            progress.empty()
+    
+    with col2:
+        st.markdown("#### Results")
+        
+        merge_result = st.session_state.get('multi_fetch_result')
+        if merge_result is not None:
+            col_m1, col_m2, col_m3, col_m4 = st.columns(4)
+            col_m1.metric("Succeeded", f"{merge_result['succeeded']:,}")
+            col_m2.metric("Failed", f"{merge_result['failed']:,}")
+            col_m3.metric("Items", f"{len(merge_result['merged']):,}")
+            col_m4.metric("Time", f"{merge_result['elapsed']:.2f} s")
+            st.caption(f"📥 {format_file_size(merge_result['bytes'])} received")
+            
+            if merge_result['failed']:
+                st.error(f"❌ {merge_result['failed']:,} URL(s) failed and were left out of the merge")
+            
+            with st.expander("📋 Per-URL Report", expanded=bool(merge_result['failed'])):
+                st.dataframe(
+                    [{
+                        "#": entry['index'] + 1,
+                        "URL": entry['url'],
+                        "Status": "✅" if entry['ok'] else "❌",
+                        "ms": round(entry['ms'], 1),
+                        "Size": format_file_size(entry['bytes']),
+                        "Items": entry['items'],
+                        "Cached": "✓" if entry['from_cache'] else "",
+                        "Error": entry['error'] or "",
+                    } for entry in merge_result['results']],
+                    use_container_width=True,
+                    hide_index=True
+                )
+            
+            # Serialized once per output format, not on every rerun
+            merged_outputs = merge_result.setdefault('outputs', {})
+            if merge_format not in merged_outputs:
+                with profiler.stage("serialize"):
+                    if merge_format == "NDJSON":
+                        merged_outputs[merge_format] = "\n".join(minify_json(item) for item in merge_result['merged'])
+                    else:
+                        merged_outputs[merge_format] = format_json(merge_result['merged'], indent=2)
+            merged_output = merged_outputs[merge_format]
+            merged_name, merged_mime = (("merged.jsonl", "application/x-ndjson") if merge_format == "NDJSON"
+                                        else ("merged.json", "application/json"))
+            with profiler.stage("render", len(merged_output)):
+                show_json_viewer(merged_output, "multi_fetch", download=False)
+            st.download_button(
+                "⬇️ Download Merged Output",
+                data=lambda: merged_output.encode('utf-8'),
+                file_name=merged_name,
+                mime=merged_mime,
+                use_container_width=True
+            )
+        else:
+            st.info("👈 List URLs on the left and press Fetch All")
+
+elif mode == "🆚 JSON Diff":
+    # JSON Diff Mode: the differences between two documents as a JSON Patch
+    st.subheader("🆚 Structural JSON Diff")
+    
+    col1, col2 = st.columns([1, 1])
+    
+    with col1:
+        st.markdown("#### Original")
+        diff_old = diff_input("old", "original")
+    
+    with col2:
+        st.markdown("#### Changed")
+        diff_new = diff_input("new", "changed")
+    
+    diff_array_key = st.text_input(
+        "Align arrays of objects by key (optional):",
+        placeholder="id",
+        key="diff_array_key",
+        help="Array elements with the same value for this key are matched even when they move; "
+             "other arrays are aligned by content"
+    ).strip()
+    
+    if diff_old is None or diff_new is None:
+        st.info("👆 Provide both documents to compare them")
+    else:
+        diff_docs = []
+        for side, text in (("Original", diff_old), ("Changed", diff_new)):
+            try:
+                with profiler.stage("parse", len(text)):
+                    parsed_doc = parse_json_cached(text)
+                parsed_doc.get_value()
+                diff_docs.append(parsed_doc)
+            except json.JSONDecodeError as e:
+                st.markdown(f"**{side} document:**")
+                show_json_error(e)
+            except UnicodeDecodeError as e:
+                # Uploads are parsed as UTF-8 when their first bytes look like it; a bad byte may come later
+                st.error(f"❌ Error reading the {side.lower()} file: {str(e)}")
+        
+        if len(diff_docs) == 2:
+            old_doc, new_doc = diff_docs
+            # Compared once per pair of documents and key, not on every rerun
+            run_key = (old_doc.digest, new_doc.digest, diff_array_key)
+            stored = st.session_state.get('diff_result')
+            if stored is None or stored[0] != run_key:
+                with st.spinner("Comparing documents..."), profiler.stage("diff", old_doc.size + new_doc.size):
+                    stored = (run_key, diff_json(old_doc.value, new_doc.value, diff_array_key or None))
+                st.session_state.diff_result = stored
+            diff_result = stored[1]
+            diff_patch = diff_result['patch']
+            
+            st.markdown("#### Differences")
+            if not diff_patch:
+                st.success(f"✅ The documents are identical (compared in {diff_result['elapsed'] * 1000:,.0f} ms)")
+            else:
+                counts = diff_result['counts']
+                col_m1, col_m2, col_m3, col_m4, col_m5 = st.columns(5)
+                with col_m1:
+                    st.metric("Added", f"{counts['add']:,}")
+                with col_m2:
+                    st.metric("Removed", f"{counts['remove']:,}")
+                with col_m3:
+                    st.metric("Replaced", f"{counts['replace']:,}")
+                with col_m4:
+                    st.metric("Moved", f"{counts['move']:,}")
+                with col_m5:
+                    st.metric("Unchanged Subtrees", f"{diff_result['unchanged']:,}",
+                              help="Children found equal on both sides without being walked")
+                st.caption(f"{len(diff_patch):,} operations, compared in {diff_result['elapsed'] * 1000:,.0f} ms")
+                
+                st.dataframe(
+                    [{
+                        "Op": operation['op'],
+                        "Path": operation['path'],
+                        "From": operation.get('from', ""),
+                        "Value": preview_value(operation['value']) if 'value' in operation else "",
+                    } for operation in diff_patch[:DIFF_TABLE_ROWS]],
+                    use_container_width=True,
+                    hide_index=True
+                )
+                if len(diff_patch) > DIFF_TABLE_ROWS:
+                    st.caption(f"First {DIFF_TABLE_ROWS:,} operations shown; the patch below has all of them")
+                
+                # Serialized once per diff, not on every rerun
+                if 'patch_text' not in diff_result:
+                    with profiler.stage("serialize"):
+                        diff_result['patch_text'] = json_backend.dumps(diff_patch, indent=2, ensure_ascii=False)
+                patch_text = diff_result['patch_text']
+                with st.expander("🧩 JSON Patch", expanded=len(patch_text) <= VIEWER_INLINE_CHARS):
+                    with profiler.stage("render", len(patch_text)):
+                        show_json_viewer(patch_text, "diff_patch", file_name="changes.json-patch", download=False)
+                st.download_button(
+                    f"⬇️ Download JSON Patch ({len(diff_patch):,} ops)",
+                    data=lambda: patch_text.encode('utf-8'),
+                    file_name="changes.json-patch",
+                    mime="application/json-patch+json",
+                    use_container_width=True
+                )
+
 # Footer with examples and tips
 st.markdown("---")
 
@@ -878,7 +2042,7 @@ with st.expander("📚 Examples & Tips"):
                     )
                 
                 with col_ex2:
-                    json_example = json.dumps(example, ensure_ascii=False)
+                    json_example = json_backend.dumps(example, ensure_ascii=False)
                     st.code(json_example, language="json")
                     
                     if st.button(f"📋 Copy", key=f"copy_ex_{name}"):
@@ -916,7 +2080,7 @@ with st.expander("📚 Examples & Tips"):
         for name, example in object_examples.items():
             with st.container():
                 st.markdown(f"**{name}:**")
-                formatted_example = json.dumps(example, indent=2, ensure_ascii=False)
+                formatted_example = json_backend.dumps(example, indent=2, ensure_ascii=False)
                 st.code(formatted_example, language="json")
                 
                 if st.button(f"📋 Copy {name}", key=f"copy_obj_ex_{name}"):
@@ -930,6 +2094,10 @@ with st.expander("📚 Examples & Tips"):
             "**String Converter**: Perfect for escaping text that contains quotes, backslashes, or newlines for use in JSON",
             "**Object Builder**: Build complex JSON objects step by step with validation",
             "**JSON Formatter**: Clean up and beautify messy JSON, with analysis tools",
+            "**Tree Editor**: Edit single values deep inside large documents, with undo/redo and a downloadable JSON Patch of your changes",
+            "**NDJSON**: Validate, minify or format JSON Lines files record by record, with per-line errors",
+            "**Multi-URL Fetch**: Pull paginated endpoints concurrently with a URL template and merge them into one array or NDJSON file",
+            "**JSON Diff**: Compare two documents, even large config snapshots, and download the differences as a JSON Patch",
             "**Import Feature**: Quickly load existing JSON into the Object Builder for editing",
             "**Copy Variations**: Use 'Copy for Code' to get properly escaped strings for programming",
             "**Validation**: All modes include real-time JSON validation with helpful error messages",
@@ -955,7 +2123,7 @@ with col_status1:
 
 with col_status2:
     if mode == "🗂️ JSON Object Builder":
-        valid_pairs_count = sum(1 for pair in st.session_state.kv_pairs if pair["key"].strip())
+        valid_pairs_count = sum(1 for key in st.session_state.pair_store.keys if key.strip())
         st.markdown(f"**Active Pairs:** {valid_pairs_count}")
 
 with col_status3:
@@ -966,4 +2134,20 @@ st.markdown(
     '💡 <strong>JSON Tool v2.0</strong> - Build, convert, and format JSON with ease!'
     '</div>',
     unsafe_allow_html=True
-)
\ No newline at end of file
+)
+
+# Profiling record of this rerun
+profile_record = profiler.finish()
+st.session_state.setdefault('profile_history', []).append(profile_record)
+del st.session_state.profile_history[:-PROFILE_HISTORY_SIZE]
+try:
+    append_profile_log(profile_record)
+    profile_log_error = None
+except OSError as e:
+    # An unwritable log path must not take the rest of the page down
+    profile_log_error = e
+with profile_panel.container():
+    if profile_log_error is not None:
+        st.warning(f"⚠️ Could not append to the profile log: {str(profile_log_error)}")
+    with st.expander("⏱️ Profiling"):
+        show_profile_panel(profile_record)
@@ -0,0 +1,52 @@
+import json
+
+from jsonify.analysis import analyze_json, get_schema_info, merge_analysis
+from jsonify.streaming import iter_events, stream_analyze
+
+DOCUMENT = {
+    "name": "shop",
+    "open": True,
+    "rating": 4.5,
+    "items": [
+        {"id": 1, "tags": ["a", "bb"], "price": None},
+        {"id": 2, "tags": [], "extra": {"note": "xxxxx"}},
+    ],
+}
+
+def test_counts_keys_containers_and_types():
+    result = analyze_json(DOCUMENT)
+    assert result["total_keys"] == 11
+    assert result["objects"] == 4
+    assert result["arrays"] == 3
+    assert result["max_depth"] == 3
+    assert result["types"] == {"str": 4, "bool": 1, "float": 1, "list": 3, "int": 2, "NoneType": 1, "dict": 1}
+    assert result["string_lengths"]["count"] == 4
+    assert result["string_lengths"]["max"] == 5
+    assert result["array_lengths"]["histogram"] == {"0": 1, "2-3": 2}
+
+def test_deep_documents_do_not_recurse():
+    value = []
+    for _ in range(10000):
+        value = [value]
+    result = analyze_json(value)
+    assert result["max_depth"] == 10000
+    assert result["arrays"] == 10001
+
+def test_merged_results_match_a_single_pass():
+    parts = [analyze_json(item, 2) for item in DOCUMENT["items"]]
+    merged = merge_analysis(parts[0], parts[1])
+    whole = analyze_json(DOCUMENT["items"], 1)
+    assert merged["total_keys"] == whole["total_keys"]
+    assert merged["string_lengths"] == whole["string_lengths"]
+    assert merged["max_depth"] == whole["max_depth"]
+
+def test_stream_analyze_matches_analyze_json():
+    text = json.dumps(DOCUMENT)
+    for subtrees in (False, True):
+        assert stream_analyze(iter_events([text], subtrees=subtrees)) == analyze_json(DOCUMENT)
+
+def test_schema_info_lists_property_paths():
+    info = get_schema_info(DOCUMENT)
+    assert "🔹 items: array (2 items)" in info
+    assert "🔹 items[0].tags: array (2 items)" in info
+    assert get_schema_info([1, 2]) == []
@@ -0,0 +1,46 @@
+import pytest
+
+pytest.importorskip("streamlit")
+
+from streamlit.testing.v1 import AppTest
+
+from jsonify.cache import get_parse_cache
+
+def run_formatter(text):
+    app = AppTest.from_file("../streamlit_app.py", default_timeout=30).run()
+    app.radio[0].set_value("🔄 JSON Formatter").run()
+    app.text_area[0].input(text).run()
+    assert not app.exception
+    return app
+
+def derived_keys(text):
+    return set(get_parse_cache().parse(text).derived)
+
+def test_formatter_computes_minified_output_and_analysis_on_demand():
+    text = '{"lazy": [1, 2, {"b": "c"}]}'
+    app = run_formatter(text)
+    keys = derived_keys(text)
+    assert ("formatted", 2, False, False, False) in keys
+    assert "analysis" not in keys and ("minified", False) not in keys
+
+    app.button(key="copy_minified_fmt").click().run()
+    assert not app.exception
+    assert ("minified", False) in derived_keys(text)
+    assert "analysis" not in derived_keys(text)
+
+def test_pasted_ndjson_is_split_on_line_breaks_only():
+    app = AppTest.from_file("../streamlit_app.py", default_timeout=30).run()
+    app.radio[0].set_value("📜 NDJSON").run()
+    # Both are allowed raw inside JSON strings, and str.splitlines() would break the record there
+    text = '{"a": "x\u2028y\u0085"}\r\n[1]\n'
+    next(area for area in app.text_area if area.label == "Paste one JSON value per line:").input(text).run()
+    next(button for button in app.button if button.label == "▶️ Process Records").click().run()
+    assert not app.exception
+    assert [metric.value for metric in app.metric][:2] == ["2", "0"]
+
+def test_an_unwritable_profile_log_is_reported(tmp_path, monkeypatch):
+    monkeypatch.setenv("JSONIFY_PROFILE_LOG", str(tmp_path / "missing" / "profile.jsonl"))
+    app = AppTest.from_file("../streamlit_app.py", default_timeout=30).run()
+    assert not app.exception
+    assert any("Could not append to the profile log" in warning.value for warning in app.sidebar.warning)
+    assert any(expander.label == "⏱️ Profiling" for expander in app.sidebar.expander)
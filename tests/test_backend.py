@@ -0,0 +1,49 @@
+import json
+import math
+
+import pytest
+
+from jsonify import backend
+
+VALUES = [
+    [math.nan, 1e16, math.inf, -math.inf, 1e-7, 2.5e-5, 0.1, -0.0, 2 ** 70],
+    [7.781482292952842e-05, 1e-5, 0.0001, 10.00001, 1.2345678901234568e+17],
+    {"nan": math.nan, "inf": [math.inf], "none": None},
+    {"b": "x1e-5 é </script>", "a": [True, None, {"c": 1.5e300}]},
+    "\ud800",
+]
+OPTIONS = [
+    {},
+    {"indent": 2},
+    {"indent": 2, "sort_keys": True},
+    {"ensure_ascii": False, "separators": (",", ":")},
+    {"ensure_ascii": False, "indent": 2, "sort_keys": True},
+]
+
+@pytest.fixture(params=backend.available_backends() + [None])
+def pinned(request):
+    backend.set_backend(request.param)
+    yield request.param
+    backend.set_backend(None)
+
+@pytest.mark.parametrize("value", VALUES)
+@pytest.mark.parametrize("options", OPTIONS)
+def test_dumps_matches_json(pinned, value, options):
+    assert backend.dumps(value, **options) == json.dumps(value, **options)
+
+def test_default_chain_keeps_non_finite_floats():
+    backend.set_backend(None)
+    assert backend.dumps([math.nan, math.inf], ensure_ascii=False, separators=(",", ":")) == "[NaN,Infinity]"
+
+@pytest.mark.parametrize("text", ['{"a": [1, 2.5, 1e400, 123456789012345678901234567890]}', '"\\ud800"', '[NaN]'])
+def test_loads_matches_json(pinned, text):
+    assert repr(backend.loads(text)) == repr(json.loads(text))
+
+def test_loads_reports_json_errors(pinned):
+    with pytest.raises(json.JSONDecodeError) as error:
+        backend.loads('{"a": }')
+    assert error.value.pos == 6
+
+def test_reformatted_non_finite_values_survive(pinned):
+    value = backend.loads("[NaN, 1, -Infinity, 1e-05]")
+    assert backend.dumps(value, ensure_ascii=False, separators=(",", ":")) == "[NaN,1,-Infinity,1e-05]"
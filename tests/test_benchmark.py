@@ -0,0 +1,34 @@
+import json
+
+import pytest
+
+from jsonify.benchmark import CORPORA, OPERATIONS, generate_corpus, parse_size, percentile, run_benchmarks
+
+def test_parse_size():
+    assert parse_size("512KB") == 512 * 1024
+    assert parse_size("1.5MB") == int(1.5 * 1024 ** 2)
+    assert parse_size("100") == 100
+
+def test_percentile():
+    assert percentile([3.0, 1.0, 2.0, 4.0], 50) == 2.0
+    assert percentile([3.0, 1.0, 2.0, 4.0], 99) == 4.0
+
+@pytest.mark.parametrize("name", list(CORPORA))
+def test_corpora_are_reproducible(name):
+    first = generate_corpus(name, 20_000)
+    assert first == generate_corpus(name, 20_000)
+    assert 10_000 < len(json.dumps(first, ensure_ascii=False)) < 40_000
+
+@pytest.mark.parametrize("name", list(CORPORA))
+def test_schema_operations_describe_every_corpus(name):
+    document = generate_corpus(name, 20_000)
+    text = json.dumps(document, ensure_ascii=False)
+    schema = OPERATIONS["schema"](text, document)()
+    assert schema == OPERATIONS["stream_schema"](text, document)()
+    container = "properties" if isinstance(document, dict) else "items"
+    assert schema[container]
+
+def test_run_benchmarks_reports_every_operation():
+    report = run_benchmarks([10_000], corpora=["records"], repeat=1, memory=False)
+    assert [entry["operation"] for entry in report["results"]] == list(OPERATIONS)
+    assert all(entry["p50_ms"] >= 0 for entry in report["results"])
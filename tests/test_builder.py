@@ -0,0 +1,74 @@
+from jsonify.builder import PairStore, parse_value, text_to_value, value_to_text
+
+def make_store(*rows):
+    store = PairStore()
+    for key, value_type, value in rows:
+        store.append(key, value_type, value)
+    return store
+
+def test_build_skips_invalid_rows_and_keeps_the_last_duplicate():
+    store = make_store(("a", "number", 1), ("b", "array", "[1,"), ("a", "string", "x"), ("", "number", 2))
+    obj, errors = store.build()
+    assert obj == {"a": "x"}
+    assert [position for position, _ in errors] == [1]
+
+def test_value_edits_do_not_change_earlier_outputs():
+    store = make_store(("a", "number", 1), ("b", "object", '{"c": 1}'))
+    first, _ = store.build()
+    store.set(0, "a", "number", 2)
+    second, _ = store.build()
+    assert first == {"a": 1, "b": {"c": 1}}
+    assert second == {"a": 2, "b": {"c": 1}}
+    assert second is not first
+
+def test_rows_becoming_invalid_or_renamed_are_rebuilt():
+    store = make_store(("a", "number", 1), ("b", "number", 2))
+    store.build()
+    store.set(1, "b", "number", "oops")
+    obj, errors = store.build()
+    assert obj == {"a": 1} and errors == [(1, "Value must be a number")]
+    store.set(1, "c", "number", 3)
+    assert list(store.build()[0].items()) == [("a", 1), ("c", 3)]
+
+def test_load_object_keeps_parsed_values():
+    store = PairStore()
+    store.load_object({"n": 1.5, "list": [1, {"x": None}], "flag": False})
+    assert store.types == ["number", "array", "boolean"]
+    assert store.build()[0] == {"n": 1.5, "list": [1, {"x": None}], "flag": False}
+    assert store.text(1) == '[1, {"x": null}]'
+
+def test_table_edits():
+    store = make_store(("a", "string", "x"), ("b", "number", 1), ("c", "boolean", True))
+    store.apply_table_edits([1, 2], {
+        "edited_rows": {"0": {"value": "2.5"}},
+        "added_rows": [{"key": "d", "type": "null"}],
+        "deleted_rows": [1],
+    })
+    assert store.build()[0] == {"a": "x", "b": 2.5, "d": None}
+    assert store.search("2.5") == [1]
+
+def test_value_conversions():
+    assert text_to_value("number", "12") == 12
+    assert text_to_value("number", "true") == "true"
+    assert text_to_value("boolean", " TRUE ") is True
+    assert value_to_text("boolean", False) == "false"
+    assert parse_value("object", "") == ({}, None)
+    assert parse_value("array", '{"a": 1}')[1] == "Value must be a JSON array"
+
+def test_bulk_removal_and_search_over_many_rows():
+    store = PairStore()
+    store.load_object({f"key{i}": i for i in range(5000)})
+    store.remove(range(0, 5000, 2))
+    assert len(store) == 2500
+    assert store.search("KEY4999") == [2499]
+    assert store.search("") == list(range(2500))
+    obj, errors = store.build()
+    assert list(obj)[:2] == ["key1", "key3"] and not errors
+
+def test_table_pages_use_the_rows_they_show():
+    store = PairStore()
+    store.load_object({f"k{i}": i for i in range(10)})
+    page = store.search("k1")
+    assert store.table_rows(page) == {"key": ["k1"], "type": ["number"], "value": ["1"]}
+    store.apply_table_edits(page, {"edited_rows": {"0": {"key": "renamed"}}})
+    assert list(store.build()[0])[1] == "renamed"
@@ -0,0 +1,58 @@
+import json
+
+import pytest
+
+from jsonify.cache import NestingError, ParseCache, document_hash, parse_json_cached
+from jsonify.core import safe_json_parse, validate_json_string
+
+DEEP = "[" * 5000 + "]" * 5000
+
+def test_documents_are_parsed_once_per_content():
+    cache = ParseCache()
+    first = cache.parse('{"a": [1, 2]}')
+    assert cache.parse('{"a": [1, 2]}') is first
+    assert cache.parse(b'{"a": [1, 2]}') is first
+    assert first.get_value() == {"a": [1, 2]}
+    assert document_hash("é") == document_hash("é".encode("utf-8"))
+
+def test_parse_errors_are_cached_and_re_raised():
+    cache = ParseCache()
+    doc = cache.parse('{"a": }')
+    assert not doc.is_valid
+    assert cache.parse('{"a": }') is doc
+    with pytest.raises(json.JSONDecodeError):
+        doc.get_value()
+
+def test_deep_documents_are_invalid_rather_than_crashing():
+    doc = ParseCache().parse(DEEP)
+    assert isinstance(doc.error, NestingError)
+    with pytest.raises(json.JSONDecodeError, match="nested too deeply"):
+        doc.get_value()
+    assert validate_json_string(DEEP) == (False, "Invalid JSON: Document is nested too deeply to parse")
+    assert safe_json_parse(DEEP) == DEEP
+
+def test_limits_evict_least_recently_used():
+    cache = ParseCache(max_entries=2)
+    first = cache.parse("1")
+    cache.parse("2")
+    cache.parse("1")
+    cache.parse("3")
+    assert len(cache) == 2
+    assert cache.parse("1") is first
+    assert ParseCache(max_bytes=10).parse("[1, 2, 3, 4, 5]").get_value() == [1, 2, 3, 4, 5]
+
+def test_derived_values_are_memoized():
+    doc = ParseCache().parse("[1, 2, 3]")
+    calls = []
+    assert doc.derive("total", lambda value: calls.append(1) or sum(value)) == 6
+    assert doc.derive("total", lambda value: calls.append(1) or sum(value)) == 6
+    assert calls == [1]
+
+def test_safe_json_parse_returns_a_private_copy():
+    text = '{"items": [1, 2], "unique_to_this_test": true}'
+    value = safe_json_parse(text)
+    value["items"].append(3)
+    assert parse_json_cached(text).get_value() == {"items": [1, 2], "unique_to_this_test": True}
+    assert safe_json_parse(text) == {"items": [1, 2], "unique_to_this_test": True}
+    assert safe_json_parse("   ", default_value=0) == 0
+    assert safe_json_parse("not json") == "not json"
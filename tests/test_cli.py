@@ -0,0 +1,63 @@
+import json
+import os
+
+import pytest
+
+from jsonify.cli import glob_base, iter_input_files, main, run_batch
+
+OPTIONS = {"indent": 2, "sort_keys": True, "ensure_ascii": False}
+
+def write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+    return path
+
+def test_format_writes_outputs_under_output_dir(tmp_path):
+    write(tmp_path / "in" / "a.json", '{"b": 1, "a": [1, 2]}')
+    write(tmp_path / "in" / "sub" / "c.json", '[]')
+    summary = run_batch("format", [str(tmp_path / "in")], OPTIONS, output_dir=str(tmp_path / "out"), jobs=1)
+    assert (summary["processed"], summary["failed"]) == (2, 0)
+    assert (tmp_path / "out" / "a.json").read_text() == '{\n  "a": [\n    1,\n    2\n  ],\n  "b": 1\n}\n'
+    assert (tmp_path / "out" / "sub" / "c.json").read_text() == "[]\n"
+
+def test_glob_outputs_keep_paths_below_the_pattern_prefix(tmp_path):
+    write(tmp_path / "ex" / "a" / "x.json", '{"a": 1}')
+    write(tmp_path / "ex" / "b" / "x.json", '{"b": 2}')
+    pattern = str(tmp_path / "ex" / "**" / "*.json")
+    assert glob_base(pattern) == str(tmp_path / "ex")
+    assert sorted(rel for _, rel in iter_input_files([pattern])) == [os.path.join("a", "x.json"),
+                                                                     os.path.join("b", "x.json")]
+    summary = run_batch("minify", [pattern], OPTIONS, output_dir=str(tmp_path / "out"), jobs=1)
+    assert summary["processed"] == 2
+    assert (tmp_path / "out" / "a" / "x.json").read_text() == '{"a":1}\n'
+    assert (tmp_path / "out" / "b" / "x.json").read_text() == '{"b":2}\n'
+
+def test_colliding_outputs_are_refused_before_writing(tmp_path):
+    first = write(tmp_path / "a" / "x.json", "1")
+    second = write(tmp_path / "b" / "x.json", "2")
+    with pytest.raises(ValueError, match="would both be written"):
+        run_batch("minify", [str(first), str(second)], OPTIONS, output_dir=str(tmp_path / "out"), jobs=1)
+    assert not (tmp_path / "out").exists()
+
+def test_deeply_nested_file_fails_alone(tmp_path, capsys):
+    write(tmp_path / "in" / "deep.json", "[" * 5000 + "]" * 5000)
+    write(tmp_path / "in" / "ok.json", "{}")
+    state = tmp_path / "state.json"
+    code = main(["validate", str(tmp_path / "in"), "--state", str(state), "--jobs", "2"])
+    output = capsys.readouterr().out
+    assert code == 1
+    assert "nested too deeply" in output
+    assert "1 processed, 0 skipped, 1 failed" in output
+    assert list(json.loads(state.read_text())) == [os.path.abspath(tmp_path / "in" / "ok.json")]
+
+def test_state_skips_unchanged_files(tmp_path):
+    write(tmp_path / "a.json", "[1]")
+    state = str(tmp_path / "state.json")
+    assert run_batch("validate", [str(tmp_path / "a.json")], OPTIONS, state_path=state)["processed"] == 1
+    assert run_batch("validate", [str(tmp_path / "a.json")], OPTIONS, state_path=state)["skipped"] == 1
+
+def test_schema_violations_fail_the_file(tmp_path, capsys):
+    write(tmp_path / "schema.json", '{"type": "object", "required": ["id"]}')
+    write(tmp_path / "doc.json", '{"name": "x"}')
+    assert main(["validate", str(tmp_path / "doc.json"), "--schema", str(tmp_path / "schema.json")]) == 1
+    assert "1 schema violation(s)" in capsys.readouterr().out
@@ -0,0 +1,45 @@
+import subprocess
+import sys
+
+import jsonify
+from jsonify.core import (format_file_size, format_json, minify_json, safe_json_parse, to_builder_entry,
+                          validate_json_string)
+
+def test_package_does_not_import_streamlit():
+    code = "import sys, jsonify, jsonify.cli; print('streamlit' in sys.modules)"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "False"
+
+def test_public_names_are_exported():
+    assert sorted(jsonify.__all__) == jsonify.__all__
+    for name in jsonify.__all__:
+        assert hasattr(jsonify, name)
+
+def test_validate_json_string():
+    assert validate_json_string('{"a": [1, 2]}') == (True, "Valid JSON")
+    valid, message = validate_json_string('{"a": }')
+    assert not valid and message.startswith("Invalid JSON: Expecting value")
+
+def test_safe_json_parse_falls_back_to_the_text():
+    assert safe_json_parse("  ", default_value=[]) == []
+    assert safe_json_parse("[1, 2]") == [1, 2]
+    assert safe_json_parse("not json") == "not json"
+
+def test_formatting_options():
+    value = {"b": 1, "a": ["é"]}
+    assert format_json(value, indent=None, sort_keys=True) == '{"a": ["é"], "b": 1}'
+    assert format_json(value, indent=2, ensure_ascii=True).splitlines()[3] == '    "\\u00e9"'
+    assert minify_json(value) == '{"b":1,"a":["é"]}'
+
+def test_format_file_size():
+    assert format_file_size(512) == "512 B"
+    assert format_file_size(1536) == "1.5 KB"
+    assert format_file_size(3 * 1024 * 1024) == "3.0 MB"
+
+def test_to_builder_entry():
+    assert to_builder_entry(True) == ("boolean", True)
+    assert to_builder_entry(2.5) == ("number", 2.5)
+    assert to_builder_entry([1]) == ("array", "[1]")
+    assert to_builder_entry({"a": None}) == ("object", '{"a": null}')
+    assert to_builder_entry(None) == ("null", "")
+    assert to_builder_entry("x") == ("string", "x")
@@ -0,0 +1,38 @@
+import gzip
+
+from jsonify.delivery import OutputCache, encode_output, encode_text
+
+def test_encoding_is_deterministic():
+    text = '{"name": "Zoë"}' * 100
+    assert encode_text(text) == text.encode("utf-8")
+    compressed = encode_text(text, compress=True)
+    assert gzip.decompress(compressed) == text.encode("utf-8")
+    assert encode_text(text, compress=True) == compressed
+
+def test_the_same_text_object_reuses_its_buffer():
+    cache = OutputCache()
+    text = "x" * 1000
+    first = cache.encode(text)
+    assert cache.encode(text) is first
+    # An equal but distinct string is encoded again
+    other = "".join(["x" * 500, "x" * 500])
+    assert cache.encode(other) is not first and cache.encode(other) == first
+    assert cache.encode(text, compress=True) is not first
+    assert len(cache) == 3
+
+def test_entries_are_evicted_by_count_and_size():
+    cache = OutputCache(max_entries=2, max_bytes=1000)
+    texts = ["a" * 100, "b" * 100, "c" * 100]
+    for text in texts:
+        cache.encode(text)
+    assert len(cache) == 2
+    cache.encode("d" * 450)
+    assert len(cache) == 1
+    cache.encode("e" * 600)
+    assert len(cache) == 1
+    cache.clear()
+    assert len(cache) == 0
+
+def test_process_wide_cache():
+    text = "shared output"
+    assert encode_output(text) is encode_output(text)
@@ -0,0 +1,105 @@
+import copy
+import random
+
+import pytest
+
+from jsonify.diff import diff_json
+from jsonify.patch import DocumentEditor, _json_equal, apply_patch
+
+def random_value(rng, depth=0):
+    roll = rng.random()
+    if depth > 3 or roll < 0.35:
+        return rng.choice([0, 1, 2, 1.0, True, False, None, "a", "b", ""])
+    if roll < 0.65:
+        return [random_value(rng, depth + 1) for _ in range(rng.randint(0, 6))]
+    return {rng.choice("abcdef"): random_value(rng, depth + 1) for _ in range(rng.randint(0, 5))}
+
+def mutate(rng, value, depth=0):
+    value = copy.deepcopy(value)
+    if isinstance(value, list):
+        for _ in range(rng.randint(0, 3)):
+            action = rng.random()
+            if action < 0.3 and value:
+                value.pop(rng.randrange(len(value)))
+            elif action < 0.6:
+                value.insert(rng.randint(0, len(value)), random_value(rng, depth + 1))
+            elif value:
+                i = rng.randrange(len(value))
+                value[i] = mutate(rng, value[i], depth + 1)
+        if len(value) > 1 and rng.random() < 0.3:
+            rng.shuffle(value)
+        return value
+    if isinstance(value, dict):
+        for key in list(value):
+            action = rng.random()
+            if action < 0.2:
+                del value[key]
+            elif action < 0.5:
+                value[key] = mutate(rng, value[key], depth + 1)
+        if rng.random() < 0.4:
+            value[rng.choice("abcdefg")] = random_value(rng, depth + 1)
+        return value
+    return random_value(rng, depth) if rng.random() < 0.5 else value
+
+def assert_round_trip(old, new, **options):
+    result = diff_json(old, new, **options)
+    # == cannot tell true from 1; JSON equality also ignores key order and 1 versus 1.0
+    assert _json_equal(apply_patch(old, result["patch"]), new)
+    return result
+
+def test_random_documents_round_trip():
+    rng = random.Random(21)
+    for _ in range(300):
+        old = random_value(rng)
+        new = mutate(rng, old)
+        assert_round_trip(old, new)
+
+def test_keyed_arrays_round_trip_with_moves():
+    rng = random.Random(8)
+    for _ in range(100):
+        old = [{"id": i, "v": rng.randint(0, 3)} for i in range(rng.randint(0, 12))]
+        new = [dict(item, v=rng.randint(0, 3)) for item in old if rng.random() < 0.8]
+        rng.shuffle(new)
+        new.insert(rng.randint(0, len(new)), {"id": 100, "v": 0})
+        result = assert_round_trip(old, new, array_key="id")
+        assert "add" not in {op["op"] for op in result["patch"] if op["path"].count("/") > 1}
+
+def test_moves_keep_unmoved_elements():
+    old = [{"id": i} for i in range(6)]
+    new = [old[5]] + old[:5]
+    result = assert_round_trip(old, new, array_key="id")
+    assert result["patch"] == [{"op": "move", "from": "/5", "path": "/0"}]
+
+@pytest.mark.parametrize("old, new", [
+    ({"a": 1}, {"a": True}),
+    ([1, 0], [True, False]),
+    ({"a": {"b": 1}}, {"a": {"b": True}}),
+])
+def test_booleans_are_not_numbers(old, new):
+    assert {op["op"] for op in assert_round_trip(old, new)["patch"]} == {"replace"}
+
+def test_integral_floats_equal_integers():
+    assert diff_json({"a": [1.0]}, {"a": [1]})["patch"] == []
+
+def test_shared_subtrees_are_not_walked():
+    shared = {"big": list(range(1000))}
+    editor = DocumentEditor({"shared": shared, "n": 1})
+    editor.apply([{"op": "replace", "path": "/n", "value": 2}])
+    old, new = {"shared": shared, "n": 1}, editor.document
+    result = assert_round_trip(old, new)
+    assert result["patch"] == [{"op": "replace", "path": "/n", "value": 2}]
+    assert result["unchanged"] >= 1
+
+def test_long_arrays_with_equal_ends():
+    old = list(range(5000))
+    new = old[:2000] + ["inserted"] + old[2001:4000] + old[4001:]
+    result = assert_round_trip(old, new)
+    assert result["counts"] == {"add": 0, "remove": 1, "replace": 1, "move": 0}
+
+def test_large_shuffles_stay_linear():
+    rng = random.Random(2)
+    old = [{"id": i} for i in range(5000)]
+    new = old[:]
+    rng.shuffle(new)
+    result = assert_round_trip(old, new, array_key="id")
+    assert result["counts"]["move"] < 5000
@@ -0,0 +1,52 @@
+import pytest
+
+from jsonify.encoding import decode_bytes, detect_encoding, iter_decoded
+
+TEXT = '{"name": "Zoë", "city": "Kraków", "quote": "“hi”"}'
+
+@pytest.mark.parametrize("encoding, expected", [
+    ("utf-8", "utf-8"),
+    ("utf-8-sig", "utf-8-sig"),
+    ("utf-16", "utf-16"),
+    ("utf-16-le", "utf-16-le"),
+    ("utf-16-be", "utf-16-be"),
+    ("utf-32", "utf-32"),
+    ("utf-32-le", "utf-32-le"),
+    ("utf-32-be", "utf-32-be"),
+])
+def test_unicode_encodings_are_detected(encoding, expected):
+    data = TEXT.encode(encoding)
+    text, info = decode_bytes(data)
+    assert info["encoding"] == expected
+    assert text == TEXT
+
+def test_single_byte_encodings():
+    assert detect_encoding('"“Zoë”"'.encode("cp1252"), complete=True)["encoding"] == "cp1252"
+    assert detect_encoding('"Zoë"'.encode("latin-1"), complete=True)["encoding"] == "latin-1"
+    assert detect_encoding(b'"\x81\x93"', complete=True)["reason"] == "bytes undefined in cp1252"
+
+def test_samples_may_end_inside_a_character():
+    data = TEXT.encode("utf-8")
+    cut = data.index("ë".encode("utf-8")) + 1
+    assert detect_encoding(data[:cut])["encoding"] == "utf-8"
+    assert detect_encoding(data[:cut], complete=True)["encoding"] != "utf-8"
+
+def test_errors_beyond_the_sample_fall_back():
+    data = b'["' + b"a" * 100 + b'", "\xe9"]'
+    text, info = decode_bytes(data, sample_bytes=50)
+    assert text.endswith('"é"]')
+    assert info["encoding"] == "latin-1" and info["reason"] == "invalid beyond the first 50 bytes"
+
+@pytest.mark.parametrize("encoding", ["utf-8", "utf-16", "utf-32-le"])
+def test_streamed_chunks_decode_like_the_whole(encoding):
+    data = (TEXT * 50).encode(encoding)
+    detected = []
+    chunks = [data[i:i + 7] for i in range(0, len(data), 7)]
+    assert "".join(iter_decoded(chunks, sample_bytes=64, on_detect=detected.append)) == TEXT * 50
+    assert detected[0]["encoding"].startswith(encoding[:6])
+
+def test_specified_encodings_are_used_as_given():
+    assert decode_bytes(b"\xe9", "latin-1") == ("é", {"encoding": "latin-1", "confidence": 1.0,
+                                                      "reason": "specified", "bom": False})
+    with pytest.raises(UnicodeDecodeError):
+        "".join(iter_decoded([b'"\xe9"'], "utf-8"))
@@ -0,0 +1,85 @@
+import gzip
+import time
+import zlib
+
+import pytest
+
+from jsonify.fetch import FetchError, UrlFetcher
+
+BODY = b'{"items": [1, 2, 3]}'
+
+def test_plain_fetch_reuses_the_connection(http_server):
+    http_server.routes["/doc"] = (200, {"Content-Type": "application/json; charset=UTF-8"}, BODY)
+    fetcher = UrlFetcher()
+    first = fetcher.fetch(http_server.url + "/doc")
+    second = fetcher.fetch(http_server.url + "/doc")
+    assert first["content"] == BODY and first["charset"] == "utf-8"
+    assert not second["from_cache"]
+    assert len(fetcher._idle[("http", "127.0.0.1", int(http_server.url.rsplit(":", 1)[1]))]) == 1
+    fetcher.close()
+
+@pytest.mark.parametrize("encoding, encode", [
+    ("gzip", gzip.compress),
+    ("deflate", zlib.compress),
+    ("deflate", lambda data: zlib.compress(data)[2:-4]),
+])
+def test_compressed_bodies_are_decoded(http_server, encoding, encode):
+    encoded = encode(BODY)
+    http_server.routes["/z"] = (200, {"Content-Encoding": encoding}, encoded)
+    result = UrlFetcher().fetch(http_server.url + "/z")
+    assert result["content"] == BODY
+    assert result["bytes_received"] == len(encoded)
+
+def test_size_cap_applies_after_decompression(http_server):
+    bomb = gzip.compress(b" " * 10 ** 6)
+    http_server.routes["/bomb"] = (200, {"Content-Encoding": "gzip"}, bomb)
+    http_server.routes["/big"] = (200, {}, b"x" * 2000)
+    fetcher = UrlFetcher(max_bytes=1000)
+    with pytest.raises(FetchError, match="limit"):
+        fetcher.fetch(http_server.url + "/bomb")
+    with pytest.raises(FetchError, match="over the 1000 B limit"):
+        fetcher.fetch(http_server.url + "/big")
+
+def test_redirects_errors_and_schemes(http_server):
+    http_server.routes["/old"] = (301, {"Location": "/doc"}, b"")
+    http_server.routes["/doc"] = (200, {}, BODY)
+    http_server.routes["/loop"] = (302, {"Location": "/loop"}, b"")
+    fetcher = UrlFetcher()
+    result = fetcher.fetch(http_server.url + "/old")
+    assert result["final_url"] == http_server.url + "/doc" and result["content"] == BODY
+    with pytest.raises(FetchError, match="redirects"):
+        fetcher.fetch(http_server.url + "/loop")
+    with pytest.raises(FetchError, match="HTTP 404"):
+        fetcher.fetch(http_server.url + "/missing")
+    with pytest.raises(FetchError, match="Unsupported URL scheme"):
+        fetcher.fetch("file:///etc/passwd")
+
+def test_stalled_responses_time_out(http_server):
+    def stall(handler):
+        time.sleep(1)
+        return 200, {}, BODY
+    http_server.routes["/slow"] = stall
+    with pytest.raises(FetchError, match="Could not fetch"):
+        UrlFetcher(timeout=0.2).fetch(http_server.url + "/slow")
+
+def test_unchanged_documents_are_revalidated_from_the_cache(http_server, tmp_path):
+    def conditional(handler):
+        if handler.headers.get("If-None-Match") == '"v1"':
+            return 304, {}, b""
+        return 200, {"ETag": '"v1"'}, BODY
+    http_server.routes["/doc"] = conditional
+    fetcher = UrlFetcher(cache_dir=str(tmp_path))
+    first = fetcher.fetch(http_server.url + "/doc")
+    second = fetcher.fetch(http_server.url + "/doc")
+    assert not first["from_cache"] and first["etag"] == '"v1"'
+    assert second["from_cache"] and second["content"] == BODY and second["bytes_received"] == 0
+    assert http_server.requests[1][1].get("If-None-Match") == '"v1"'
+
+def test_cache_is_pruned_to_its_size(http_server, tmp_path):
+    headers = {"Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"}
+    for name in ("a", "b", "c"):
+        http_server.routes[f"/{name}"] = (200, headers, b"[" + b"0," * 300 + b"0]")
+    fetcher = UrlFetcher(cache_dir=str(tmp_path), max_cache_bytes=1300)
+    for name in ("a", "b", "c"):
+        fetcher.fetch(f"{http_server.url}/{name}")
+    assert len(list(tmp_path.glob("*.body"))) == 2
@@ -0,0 +1,67 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+from jsonify.fetch import UrlFetcher
+from jsonify.multifetch import expand_url_template, fetch_all, fetch_and_merge, parse_url_list
+
+def test_url_lists_and_templates():
+    assert parse_url_list("# pages\nhttp://a/1\n\n  http://a/2  \n") == ["http://a/1", "http://a/2"]
+    assert expand_url_template("http://a/?page={page}", 1, 5, 2) == ["http://a/?page=1", "http://a/?page=3",
+                                                                    "http://a/?page=5"]
+    with pytest.raises(ValueError):
+        expand_url_template("http://a/", 1, 2)
+
+def test_responses_are_merged_in_url_order(http_server):
+    for page in range(1, 9):
+        body = json.dumps({"data": [page * 10 + i for i in range(3)]}).encode()
+        http_server.routes[f"/items?page={page}"] = (200, {"Content-Type": "application/json"}, body)
+    http_server.routes["/items?page=4"] = (200, {}, b"{broken")
+    urls = expand_url_template(http_server.url + "/items?page={page}", 1, 9)
+    seen = []
+    result = fetch_and_merge(urls, UrlFetcher(), concurrency=4, items_path="$.data", on_result=seen.append)
+    assert result["succeeded"] == 7 and result["failed"] == 2
+    assert result["merged"] == [page * 10 + i for page in (1, 2, 3, 5, 6, 7, 8) for i in range(3)]
+    assert [entry["index"] for entry in result["results"]] == list(range(9))
+    assert result["results"][3]["error"].startswith("Invalid JSON")
+    assert result["results"][8]["error"].startswith("HTTP 404")
+    assert sorted(entry["index"] for entry in seen) == list(range(9))
+
+def test_values_are_kept_whole_without_flatten(http_server):
+    http_server.routes["/a"] = (200, {}, b"[1, 2]")
+    http_server.routes["/b"] = (200, {}, b'{"x": 1}')
+    result = fetch_and_merge([http_server.url + "/a", http_server.url + "/b"], UrlFetcher(), flatten=False)
+    assert result["merged"] == [[1, 2], {"x": 1}]
+    assert result["bytes"] == 14
+
+def test_requests_to_a_host_are_limited(http_server):
+    lock = threading.Lock()
+    active = [0, 0]
+
+    def slow(handler):
+        with lock:
+            active[0] += 1
+            active[1] = max(active[1], active[0])
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+        return 200, {}, b"1"
+    for i in range(8):
+        http_server.routes[f"/{i}"] = slow
+    urls = [f"{http_server.url}/{i}" for i in range(8)]
+    results = asyncio.run(fetch_all(urls, UrlFetcher(), concurrency=8, per_host=2))
+    assert all(entry["ok"] for entry in results)
+    assert active[1] == 2
+
+def test_failing_documents_are_reported_per_url(http_server):
+    http_server.routes["/ok"] = (200, {}, b"[1]")
+    http_server.routes["/deep"] = (200, {}, b"[" * 200000)
+    http_server.routes["/bom"] = (200, {}, '["é"]'.encode("utf-8-sig"))
+    http_server.routes["/wide"] = (200, {}, '{"a": 2}'.encode("utf-16"))
+    urls = [http_server.url + path for path in ("/ok", "/deep", "/bom", "/wide")]
+    result = fetch_and_merge(urls, UrlFetcher())
+    assert result["merged"] == [1, "é", {"a": 2}]
+    assert result["results"][1]["error"].startswith("Invalid JSON: Document is nested too deeply")
@@ -0,0 +1,50 @@
+import io
+import json
+
+import pytest
+
+from jsonify.ndjson import iter_batches, process_ndjson
+
+LINES = [json.dumps({"id": i, "name": f"n{i}", "tags": ["x"] * (i % 3)}) for i in range(40)]
+LINES[5] = '{"id": 5,'
+LINES[17] = ""
+LINES[30] = "[" * 100000 + "]" * 100000
+
+def test_batches_are_numbered_by_first_line():
+    assert list(iter_batches(["a", "b", "c"], batch_size=2)) == [(1, ["a", "b"]), (3, ["c"])]
+
+def test_errors_report_their_line_and_blank_lines_are_skipped():
+    result = process_ndjson(LINES, jobs=1)
+    assert result["lines"] == 40
+    assert result["records"] == 37
+    assert result["error_count"] == 2
+    assert [line for line, _ in result["errors"]] == [6, 31]
+    assert result["errors"][1][1].startswith("Document is nested too deeply")
+    assert result["record_types"] == {"dict": 37}
+
+def test_parallel_batches_combine_in_input_order():
+    single = process_ndjson(LINES, mode="minify", jobs=1, schema=True)
+    parallel = process_ndjson(LINES, mode="minify", jobs=2, batch_size=7, schema=True)
+    for key in ("lines", "records", "errors", "error_count", "output", "analysis", "record_types", "schema"):
+        assert parallel[key] == single[key]
+    assert single["output"].splitlines()[0] == '{"id":0,"name":"n0","tags":[]}'
+
+def test_output_is_written_to_a_stream():
+    out = io.StringIO()
+    result = process_ndjson(['{"b": 1}', '[2]'], mode="format", options={"indent": None}, output=out)
+    assert result["output"] is None
+    assert out.getvalue() == '{"b": 1}\n[2]\n'
+
+def test_errors_are_capped_but_counted():
+    result = process_ndjson(["x"] * 10, jobs=1, batch_size=3, max_errors=4)
+    assert len(result["errors"]) == 4 and result["error_count"] == 10
+
+def test_records_are_validated_against_a_schema():
+    schema = {"type": "object", "properties": {"id": {"type": "integer", "maximum": 30}}}
+    result = process_ndjson(LINES, jobs=1, json_schema=schema, max_errors=3)
+    assert result["invalid_records"] == 9
+    assert [line for line, _, _ in result["violations"]] == [32, 33, 34]
+
+def test_unknown_modes_are_rejected():
+    with pytest.raises(ValueError):
+        process_ndjson([], mode="pretty")
@@ -0,0 +1,102 @@
+import copy
+import random
+
+import pytest
+
+from jsonify.core import format_json
+from jsonify.patch import (DocumentEditor, IncrementalSerializer, JsonPatchError, apply_patch, format_pointer,
+                           parse_patch, parse_pointer, resolve_pointer)
+
+@pytest.mark.parametrize("doc, patch, expected", [
+    ({"foo": "bar"}, [{"op": "add", "path": "/baz", "value": "qux"}], {"foo": "bar", "baz": "qux"}),
+    ({"foo": ["bar", "baz"]}, [{"op": "add", "path": "/foo/1", "value": "qux"}], {"foo": ["bar", "qux", "baz"]}),
+    ({"foo": ["bar"]}, [{"op": "add", "path": "/foo/-", "value": ["abc"]}], {"foo": ["bar", ["abc"]]}),
+    ({"foo": ["bar", "qux", "baz"]}, [{"op": "remove", "path": "/foo/1"}], {"foo": ["bar", "baz"]}),
+    ({"baz": "qux", "foo": "bar"}, [{"op": "replace", "path": "/baz", "value": "boo"}], {"baz": "boo", "foo": "bar"}),
+    ({"foo": {"bar": "baz", "waldo": "fred"}, "qux": {"corge": "grault"}},
+     [{"op": "move", "from": "/foo/waldo", "path": "/qux/thud"}],
+     {"foo": {"bar": "baz"}, "qux": {"corge": "grault", "thud": "fred"}}),
+    ({"foo": ["all", "grass", "cows", "eat"]}, [{"op": "move", "from": "/foo/1", "path": "/foo/3"}],
+     {"foo": ["all", "cows", "eat", "grass"]}),
+    ({"a/b": 1, "m~n": 2}, [{"op": "copy", "from": "/a~1b", "path": "/m~0n"}], {"a/b": 1, "m~n": 1}),
+    ({"baz": "qux", "foo": ["a", 2, "c"]}, [{"op": "test", "path": "/foo", "value": ["a", 2.0, "c"]}],
+     {"baz": "qux", "foo": ["a", 2, "c"]}),
+    ({"a": 1}, [{"op": "replace", "path": "", "value": [1]}], [1]),
+])
+def test_rfc_examples(doc, patch, expected):
+    original = copy.deepcopy(doc)
+    assert apply_patch(doc, patch) == expected
+    assert doc == original
+
+@pytest.mark.parametrize("patch", [
+    [{"op": "add", "path": "/missing/x", "value": 1}],
+    [{"op": "remove", "path": "/list/3"}],
+    [{"op": "add", "path": "/list/01", "value": 1}],
+    [{"op": "test", "path": "/flag", "value": 1}],
+    [{"op": "move", "from": "/list", "path": "/list/0"}],
+    [{"op": "replace", "path": "/flag"}],
+    [{"op": "frobnicate", "path": "/flag"}],
+    [{"op": "add", "path": "flag", "value": 1}],
+    {"op": "add", "path": "/x", "value": 1},
+])
+def test_invalid_patches_raise(patch):
+    with pytest.raises(JsonPatchError):
+        apply_patch({"list": [1, 2, 3], "flag": True}, patch)
+
+def test_unchanged_subtrees_are_shared():
+    doc = {"a": {"b": [1, 2]}, "c": {"d": 1}}
+    new = apply_patch(doc, [{"op": "add", "path": "/a/b/-", "value": 3}])
+    assert new["c"] is doc["c"]
+    assert new["a"] is not doc["a"] and doc["a"]["b"] == [1, 2]
+
+def test_pointers_round_trip():
+    tokens = ["a/b", "~x", "0", ""]
+    assert parse_pointer(format_pointer(tokens)) == tokens
+    assert resolve_pointer({"a/b": [{"": 5}]}, "/a~1b/0/") == 5
+    assert parse_patch('{"op": "remove", "path": "/a"}') == [{"op": "remove", "path": "/a"}]
+
+def test_editor_undo_redo_and_history():
+    editor = DocumentEditor({"n": 0}, history_limit=2)
+    for i in range(1, 4):
+        editor.apply([{"op": "replace", "path": "/n", "value": i}])
+    assert editor.undo_steps == 2
+    assert editor.undo() == {"n": 2}
+    assert editor.can_redo and editor.redo() == {"n": 3}
+    editor.undo()
+    editor.apply([{"op": "add", "path": "/m", "value": True}])
+    assert not editor.can_redo
+    assert apply_patch({"n": 0}, editor.patch()) == editor.document
+
+def test_failed_patches_leave_the_editor_unchanged():
+    editor = DocumentEditor({"n": [1]})
+    with pytest.raises(JsonPatchError):
+        editor.apply([{"op": "add", "path": "/n/-", "value": 2}, {"op": "remove", "path": "/x"}])
+    assert editor.document == {"n": [1]} and not editor.can_undo
+
+@pytest.mark.parametrize("indent, sort_keys", [(2, False), (4, True)])
+def test_incremental_serialization_matches_format_json(indent, sort_keys):
+    rng = random.Random(11)
+    doc = {"rows": [{"id": i, "tags": ["t"] * (i % 4), "text": "x" * (i % 50)} for i in range(3000)],
+           "meta": {"big": "y" * 70000, "z": 1}, "a": []}
+    editor = DocumentEditor(doc)
+    for step in range(40):
+        index = rng.randrange(len(editor.document["rows"]))
+        choice = step % 4
+        if choice == 0:
+            patch = [{"op": "replace", "path": f"/rows/{index}/id", "value": -step}]
+        elif choice == 1:
+            patch = [{"op": "add", "path": f"/rows/{index}", "value": {"new": step}}]
+        elif choice == 2:
+            patch = [{"op": "remove", "path": f"/rows/{index}"}, {"op": "add", "path": "/a/-", "value": step}]
+        else:
+            patch = [{"op": "move", "from": f"/rows/{index}", "path": "/meta/moved"}]
+        editor.apply(patch)
+        if step % 5 == 4:
+            editor.undo()
+        text = editor.serialize(indent, sort_keys)
+        assert text == format_json(editor.document, indent=indent, sort_keys=sort_keys)
+
+def test_serializer_handles_scalars_and_empty_containers():
+    serializer = IncrementalSerializer()
+    for doc in (None, [], {}, "é", [[]], {"a": {}}):
+        assert serializer.serialize(doc) == format_json(doc)
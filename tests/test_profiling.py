@@ -0,0 +1,49 @@
+import json
+import time
+import tracemalloc
+
+from jsonify.profiling import PROFILE_LOG_ENV, Profiler, append_profile_log
+
+def test_stages_are_timed_and_summarized():
+    profiler = Profiler("formatter")
+    with profiler.stage("parse", size=100):
+        time.sleep(0.01)
+    with profiler.stage("format", size=250):
+        pass
+    record = profiler.finish()
+    assert record["label"] == "formatter"
+    assert [stage["stage"] for stage in record["stages"]] == ["parse", "format"]
+    assert record["stages"][0]["ms"] >= 10
+    assert record["stage_ms"] <= record["total_ms"]
+    assert record["input_bytes"] == 250
+    assert record["peak_memory_bytes"] is None
+
+def test_a_failing_stage_is_still_recorded():
+    profiler = Profiler()
+    try:
+        with profiler.stage("boom"):
+            raise ValueError
+    except ValueError:
+        pass
+    assert profiler.finish()["stages"][0]["stage"] == "boom"
+
+def test_memory_tracing_is_released_by_the_last_profiler():
+    assert not tracemalloc.is_tracing()
+    first, second = Profiler(trace_memory=True), Profiler(trace_memory=True)
+    with first.stage("allocate"):
+        data = [bytes(1000) for _ in range(1000)]
+    record = first.finish()
+    assert record["peak_memory_bytes"] >= 1000 * 1000
+    assert tracemalloc.is_tracing()
+    second.finish()
+    assert not tracemalloc.is_tracing()
+    del data
+
+def test_records_are_appended_as_json_lines(tmp_path, monkeypatch):
+    path = tmp_path / "profile.jsonl"
+    monkeypatch.delenv(PROFILE_LOG_ENV, raising=False)
+    assert append_profile_log({"label": "x"}) is False
+    monkeypatch.setenv(PROFILE_LOG_ENV, str(path))
+    assert append_profile_log({"label": "é"}) is True
+    assert append_profile_log({"label": "y"}, str(path)) is True
+    assert [json.loads(line)["label"] for line in path.read_text(encoding="utf-8").splitlines()] == ["é", "y"]
@@ -0,0 +1,77 @@
+import random
+
+import pytest
+
+from jsonify.query import QueryError, QueryIndex, compile_query, query_json, query_page
+
+STORE = {
+    "store": {
+        "book": [
+            {"category": "reference", "author": "Rees", "title": "Sayings", "price": 8.95},
+            {"category": "fiction", "author": "Waugh", "title": "Honour", "price": 12.99},
+            {"category": "fiction", "author": "Tolkien", "title": "Rings", "isbn": "0-395", "price": 22.99},
+        ],
+        "bicycle": {"color": "red", "price": 399},
+    },
+    "expensive": 10,
+}
+
+def paths(expression, value=STORE, index=None):
+    return [path for path, _ in query_json(value, expression, index)]
+
+@pytest.mark.parametrize("expression, expected", [
+    ("$.store.book[0].title", [("store", "book", 0, "title")]),
+    ("store.book[-1].author", [("store", "book", 2, "author")]),
+    ("$.store.book[0:2].price", [("store", "book", 0, "price"), ("store", "book", 1, "price")]),
+    ("$.store.book[*].isbn", [("store", "book", 2, "isbn")]),
+    ("$.store.book[?(@.price < $.expensive)].title", [("store", "book", 0, "title")]),
+    ('store.book[?category == `"fiction"` && price > `20`].title', [("store", "book", 2, "title")]),
+    ("$['expensive','store'].color", []),
+    ("$.store.bicycle['color','price']", [("store", "bicycle", "color"), ("store", "bicycle", "price")]),
+])
+def test_queries(expression, expected):
+    assert paths(expression) == expected
+
+def test_recursive_descent_lists_own_members_before_descendants():
+    doc = {"x": {"a": 1, "b": {"a": 3}}, "a": 2, "b": [{"b": 5, "a": 6}]}
+    expected = [("a",), ("x", "a"), ("x", "b", "a"), ("b", 0, "a")]
+    assert paths("$..a", doc) == expected
+    assert paths("$..a", doc, QueryIndex(doc)) == expected
+
+def random_document(rng, depth=0):
+    if depth > 4 or rng.random() < 0.3:
+        return rng.choice([1, "a", None, True, 2.5])
+    if rng.random() < 0.6:
+        return {rng.choice("abcde"): random_document(rng, depth + 1) for _ in range(rng.randint(0, 4))}
+    return [random_document(rng, depth + 1) for _ in range(rng.randint(0, 4))]
+
+@pytest.mark.parametrize("expression", ["$..a", "$..['b','a']", "$.a..b", "$..b..a", "$..c[0]", "$..*..d"])
+def test_index_gives_the_walk_order(expression):
+    rng = random.Random(7)
+    query = compile_query(expression)
+    for _ in range(300):
+        doc = random_document(rng)
+        assert list(query.iter_matches(doc, QueryIndex(doc))) == list(query.iter_matches(doc))
+
+def test_index_is_built_only_when_needed():
+    calls = []
+
+    def build():
+        calls.append(1)
+        return QueryIndex(STORE)
+    assert not compile_query("$.store.book[*]").uses_index
+    list(query_json(STORE, "$.store.book[*]", build))
+    assert calls == []
+    assert paths("$..price", index=build) == paths("$..price")
+    assert calls == [1]
+
+def test_query_page():
+    page = query_page(STORE, "$..price", start=1, count=2)
+    assert [row["path"] for row in page["rows"]] == ["$.store.book[1].price", "$.store.book[2].price"]
+    assert page["has_more"]
+    assert page["rows"][0]["value"] == 12.99
+
+@pytest.mark.parametrize("expression", ["$.", "$[", "$.store[?(@.price <)]", "$['a'"])
+def test_invalid_queries(expression):
+    with pytest.raises(QueryError):
+        compile_query(expression)
@@ -0,0 +1,67 @@
+import json
+import random
+
+from jsonify.schema import SchemaAccumulator, infer_schema, schema_paths
+from jsonify.streaming import iter_events
+
+def event_schema(text, subtrees=False, sample_size=None):
+    accumulator = SchemaAccumulator(sample_size)
+    accumulator.add_events(iter_events([text], subtrees=subtrees))
+    return accumulator.schema()
+
+def random_record(rng, depth=0):
+    record = {}
+    for key in rng.sample("abcdefgh", rng.randint(0, 5)):
+        kind = rng.random()
+        if depth < 2 and kind < 0.2:
+            record[key] = random_record(rng, depth + 1)
+        elif depth < 2 and kind < 0.35:
+            record[key] = [random_record(rng, depth + 1) for _ in range(rng.randint(0, 3))]
+        elif kind < 0.6:
+            record[key] = rng.randint(-5, 5)
+        elif kind < 0.8:
+            record[key] = "x" * rng.randint(0, 4)
+        else:
+            record[key] = rng.choice([None, True, 1.5])
+    return record
+
+def test_property_order_follows_the_first_record():
+    records = [{"id": 1, "name": "a"}, {"name": "b", "id": 2, "extra": True}]
+    schema = infer_schema(records)
+    assert list(schema["items"]["properties"]) == ["id", "name", "extra"]
+    assert schema["items"]["required"] == ["id", "name"]
+    assert schema["items"]["properties"]["extra"]["x-presence"] == 0.5
+
+def test_parsed_and_event_inputs_give_identical_schemas():
+    rng = random.Random(7)
+    for _ in range(50):
+        value = [random_record(rng) for _ in range(rng.randint(1, 6))]
+        text = json.dumps(value)
+        expected = json.dumps(infer_schema(value))
+        assert json.dumps(event_schema(text)) == expected
+        assert json.dumps(event_schema(text, subtrees=True)) == expected
+
+def test_merged_chunks_match_a_single_pass():
+    records = [{"a": 1, "b": [1, 2]}, {"b": [], "c": "x"}, {"a": 2.5, "c": None}]
+    first, second = SchemaAccumulator(), SchemaAccumulator()
+    first.add(records[0])
+    for record in records[1:]:
+        second.add(record)
+    whole = SchemaAccumulator()
+    for record in records:
+        whole.add(record)
+    assert json.dumps(first.merge(second).schema()) == json.dumps(whole.schema())
+
+def test_deep_documents_do_not_recurse():
+    value = 0
+    for _ in range(5000):
+        value = {"a": [value]}
+    schema = infer_schema(value)
+    assert schema["type"] == "object"
+    assert len(schema_paths(schema)) == 10001
+
+def test_sampling_keeps_exact_array_lengths():
+    schema = infer_schema(list(range(100)), sample_size=10)
+    assert schema["minItems"] == schema["maxItems"] == 100
+    assert schema["x-sampled"] is True
+    assert schema["items"]["x-count"] == 10
@@ -0,0 +1,97 @@
+import random
+
+import pytest
+
+from jsonify.search import SearchIndex, _scalar_term, search_page
+
+DOCUMENT = {
+    "users": [
+        {"name": "Ann Lee", "email": "ann@example.com", "active": True, "score": 1.5},
+        {"name": "Bob", "email": None, "tags": ["admin", "Name"], "score": 10},
+    ],
+    "name": "Directory",
+}
+
+def walk(value, path=()):
+    """(path, key, scalar or None) of every node below the root in document order"""
+    if isinstance(value, dict):
+        items = value.items()
+    elif isinstance(value, list):
+        items = enumerate(value)
+    else:
+        return
+    for key, child in items:
+        scalar = None if isinstance(child, (dict, list)) else child
+        yield path + (key,), key, scalar, not isinstance(child, (dict, list))
+        yield from walk(child, path + (key,))
+
+def reference(doc, query, mode, scope, case_sensitive):
+    def hit(term):
+        if not case_sensitive:
+            term, wanted = term.casefold(), query.casefold()
+        else:
+            wanted = query
+        if mode == "exact":
+            return term == wanted
+        if mode == "prefix":
+            return term.startswith(wanted)
+        return wanted in term
+
+    matches = []
+    if not isinstance(doc, (dict, list)) and hit(_scalar_term(doc)) and scope != "keys":
+        matches.append(([], "value"))
+    for path, key, scalar, is_scalar in walk(doc):
+        if scope != "values" and isinstance(key, str) and hit(key):
+            matches.append((list(path), "key"))
+        elif scope != "keys" and is_scalar and hit(_scalar_term(scalar)):
+            matches.append((list(path), "value"))
+    return matches
+
+def found(index, *args):
+    return [(index.path(node), kind) for node, kind in index.search(*args)]
+
+def test_matches_are_listed_once_in_document_order():
+    index = SearchIndex(DOCUMENT)
+    assert found(index, "name") == [(["users", 0, "name"], "key"), (["users", 1, "name"], "key"),
+                                    (["users", 1, "tags", 1], "value"), (["name"], "key")]
+    assert found(index, "Name", "exact", "values", True) == [(["users", 1, "tags", 1], "value")]
+    assert found(index, "1", "prefix", "values") == [(["users", 0, "score"], "value"), (["users", 1, "score"], "value")]
+    assert found(index, "null", "exact") == [(["users", 1, "email"], "value")]
+
+def test_search_agrees_with_a_full_scan():
+    rng = random.Random(5)
+    words = ["alpha", "Alpha", "beta", "ALPHABET", "straße", "STRASSE", "x", "", "1", "10", "true", "null"]
+
+    def make(depth):
+        if depth > 2 or rng.random() < 0.3:
+            return rng.choice(words + [1, 10, 1.5, True, False, None])
+        if rng.random() < 0.5:
+            return [make(depth + 1) for _ in range(rng.randint(0, 4))]
+        return {rng.choice(words): make(depth + 1) for _ in range(rng.randint(0, 4))}
+
+    for _ in range(30):
+        doc = make(0)
+        index = SearchIndex(doc)
+        for query in ["alpha", "a", "ss", "1", "", "STRASSE", "lph"]:
+            for mode in ("substring", "prefix", "exact"):
+                for scope in ("all", "keys", "values"):
+                    for case_sensitive in (False, True):
+                        args = (query, mode, scope, case_sensitive)
+                        assert found(index, *args) == reference(doc, *args), args
+
+def test_scalar_roots_and_empty_containers():
+    assert SearchIndex("needle").search("need") == [(0, "value")]
+    assert SearchIndex({}).search("") == []
+
+def test_search_page():
+    page = search_page(SearchIndex(DOCUMENT), "ann", start=0, count=1)
+    assert page["total"] == 2
+    assert page["rows"] == [{"path": "$.users[0].name", "match": "value", "key": "name", "type": "string",
+                             "preview": '"Ann Lee"'}]
+
+def test_unknown_modes_and_scopes_raise():
+    index = SearchIndex(DOCUMENT)
+    with pytest.raises(ValueError):
+        index.search("a", mode="regex")
+    with pytest.raises(ValueError):
+        index.search("a", scope="paths")
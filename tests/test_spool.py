@@ -0,0 +1,38 @@
+import io
+import json
+
+import pytest
+
+from jsonify.backend import loads
+from jsonify.cache import document_hash, parse_json_cached
+from jsonify.encoding import decode_bytes
+from jsonify.spool import SpooledUpload, iter_buffer_chunks
+
+DATA = json.dumps({"rows": [{"id": i, "name": f"é{i}"} for i in range(500)]}, ensure_ascii=False).encode()
+
+def test_the_mapped_buffer_parses_like_the_bytes():
+    with SpooledUpload(io.BytesIO(DATA), chunk_size=1000) as upload:
+        assert len(upload) == len(DATA)
+        assert upload.buffer[:10] == DATA[:10]
+        assert document_hash(upload.buffer) == document_hash(DATA)
+        assert loads(upload.buffer) == json.loads(DATA)
+        assert parse_json_cached(upload.buffer).get_value() == json.loads(DATA)
+        assert decode_bytes(upload.buffer)[0] == DATA.decode()
+        assert b"".join(upload.iter_chunks(333)) == DATA
+
+def test_empty_uploads():
+    with SpooledUpload(io.BytesIO(b"")) as upload:
+        assert len(upload) == 0 and upload.buffer == b""
+        assert list(upload.iter_chunks()) == []
+
+def test_closed_uploads_refuse_access():
+    upload = SpooledUpload(io.BytesIO(DATA))
+    view = memoryview(upload.buffer)
+    # A view still alive must not make close fail
+    upload.close()
+    view.release()
+    with pytest.raises(ValueError):
+        upload.buffer
+
+def test_buffer_chunks():
+    assert list(iter_buffer_chunks(b"abcdefg", 3)) == [b"abc", b"def", b"g"]
@@ -0,0 +1,109 @@
+import json
+
+import pytest
+
+from jsonify.streaming import (END_ARRAY, END_MAP, KEY, START_ARRAY, START_MAP, StreamDecodeError,
+                               iter_events, reformat_text, stream_format, stream_reformat, stream_validate)
+
+DOCUMENTS = [
+    '{"name": "a", "tags": ["x", "y"], "n": -1.5e3, "ok": true, "none": null}',
+    '[1, 2.0, -0, 3e-7, "\\u00e9\\n", {}, [], [[{"a": [false]}]]]',
+    '"just a string"',
+    '  42  ',
+]
+
+INVALID = [
+    '[1 true]',
+    '{"a" null}',
+    '{"a" "b"}',
+    '{"a":1 "b":2}',
+    '{true: 1}',
+    '[1, 2',
+    '[1 2]',
+    '{"a": }',
+    '[nul]',
+    '[1] false',
+    '"abc',
+    '["a\\x"]',
+    '[01]',
+    '',
+]
+
+def chunked(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+def build(events):
+    """Rebuild the value an event stream describes"""
+    stack, keys, result = [], [], None
+    for event, value in events:
+        if event == START_MAP or event == START_ARRAY:
+            container = {} if event == START_MAP else []
+            stack.append(container)
+            continue
+        if event == KEY:
+            keys.append(value)
+            continue
+        if event == END_MAP or event == END_ARRAY:
+            value = stack.pop()
+        if not stack:
+            result = value
+        elif isinstance(stack[-1], dict):
+            stack[-1][keys.pop()] = value
+        else:
+            stack[-1].append(value)
+    return result
+
+@pytest.mark.parametrize("text", DOCUMENTS)
+@pytest.mark.parametrize("size", [1, 3, 1000])
+@pytest.mark.parametrize("subtrees", [False, True])
+def test_events_describe_the_parsed_value(text, size, subtrees):
+    assert build(iter_events(chunked(text, size), subtrees=subtrees)) == json.loads(text)
+
+@pytest.mark.parametrize("text", INVALID)
+@pytest.mark.parametrize("size", [1, 3, 1000])
+def test_errors_are_located_like_json_loads(text, size):
+    # Trailing spaces keep the last token away from the end of the buffer, where the fast path is taken
+    padded = text + " " * 8
+    with pytest.raises(json.JSONDecodeError) as expected:
+        json.loads(padded)
+    with pytest.raises(StreamDecodeError) as raised:
+        list(iter_events(chunked(padded, size)))
+    assert (raised.value.msg, raised.value.pos) == (expected.value.msg, expected.value.pos)
+    assert (raised.value.lineno, raised.value.colno) == (expected.value.lineno, expected.value.colno)
+
+def test_error_lines_are_counted_across_chunks():
+    text = '[\n  1,\n  2\n  3\n]' + " " * 8
+    with pytest.raises(StreamDecodeError) as raised:
+        list(iter_events(chunked(text, 2)))
+    assert (raised.value.lineno, raised.value.colno) == (4, 3)
+
+def test_stream_validate_reports_status():
+    assert stream_validate(['{"a": [1', ', 2]}']) == (True, "Valid JSON")
+    valid, message = stream_validate(['{"a": [1', ' 2]}'])
+    assert not valid and message.startswith("Invalid JSON: Expecting ',' delimiter")
+
+@pytest.mark.parametrize("text", DOCUMENTS)
+@pytest.mark.parametrize("indent", [None, 2])
+@pytest.mark.parametrize("ensure_ascii", [False, True])
+def test_formatting_matches_json_dumps(text, indent, ensure_ascii):
+    value = json.loads(text)
+    separators = (",", ":") if indent is None else None
+    expected = json.dumps(value, indent=indent, ensure_ascii=ensure_ascii, separators=separators)
+    for subtrees in (False, True):
+        events = iter_events(chunked(text, 5), subtrees=subtrees)
+        assert "".join(stream_format(events, indent=indent, ensure_ascii=ensure_ascii, batch_size=3)) == expected
+    # Reformatting keeps each token as spelled, so it matches for text json.dumps wrote
+    canonical = json.dumps(value, ensure_ascii=ensure_ascii)
+    assert reformat_text(canonical, indent=indent, ensure_ascii=ensure_ascii) == expected
+
+def test_reformatting_keeps_tokens_as_spelled():
+    text = '{ "n" : 1.0E+2, "s": "caf\\u00e9 é", "n": -0.000, "list": [ 1e5 , {"deep": [true]} ] }'
+    assert reformat_text(text) == '{"n":1.0E+2,"s":"caf\\u00e9 é","n":-0.000,"list":[1e5,{"deep":[true]}]}'
+    assert reformat_text(text, ensure_ascii=True).count("\\u00e9") == 2
+    indented = reformat_text(text, indent=4)
+    assert indented.splitlines()[1] == '    "n": 1.0E+2,'
+    assert "".join(stream_reformat(chunked(text, 4), indent=4)) == indented
+
+def test_reformatting_validates_the_text():
+    with pytest.raises(StreamDecodeError):
+        reformat_text('{"a": [1, 2}')
@@ -0,0 +1,86 @@
+import pytest
+
+from jsonify.validation import SchemaError, ValidatorCache, compile_schema, validate_with_schema
+
+PERSON = {
+    "$defs": {"tag": {"type": "string", "pattern": "^[a-z]+$", "maxLength": 5}},
+    "type": "object",
+    "required": ["name", "age"],
+    "properties": {
+        "name": {"type": "string", "minLength": 1},
+        "age": {"type": "integer", "minimum": 0, "exclusiveMaximum": 150},
+        "tags": {"type": "array", "items": {"$ref": "#/$defs/tag"}, "uniqueItems": True, "maxItems": 3},
+        "role": {"enum": ["admin", "user", 1]},
+        "ratio": {"type": "number", "multipleOf": 0.25},
+    },
+    "additionalProperties": False,
+}
+
+CASES = [
+    (PERSON, {"name": "Ann", "age": 30, "tags": ["a", "b"], "role": "user", "ratio": 0.75}),
+    (PERSON, {"name": "", "age": -1, "tags": ["a", "a", "B", "toolong"], "extra": 1}),
+    (PERSON, {"name": "Bo", "age": 30.0, "role": True, "ratio": 0.3}),
+    (PERSON, {"name": "Bo", "age": 150}),
+    (PERSON, ["not", "an", "object"]),
+    ({"type": ["string", "null"]}, None),
+    ({"type": "integer"}, True),
+    ({"const": {"a": [1, 2.0]}}, {"a": [1.0, 2]}),
+    ({"const": 1}, True),
+    ({"minProperties": 2, "propertyNames": {"pattern": "^x"}}, {"xa": 1, "b": 2}),
+    ({"patternProperties": {"^n_": {"type": "number"}}, "additionalProperties": {"type": "string"}},
+     {"n_a": 1, "n_b": "x", "c": 1, "d": "ok"}),
+    ({"prefixItems": [{"type": "integer"}, {"type": "string"}], "items": False}, [1, "a", None]),
+    ({"contains": {"type": "string"}, "minContains": 2}, ["a", 1, "b"]),
+    ({"contains": {"type": "string"}, "maxContains": 1}, ["a", 1, "b"]),
+    ({"dependentRequired": {"card": ["billing"]}}, {"card": 1}),
+    ({"dependentSchemas": {"card": {"required": ["cvv"]}}}, {"card": 1, "cvv": 2}),
+    ({"anyOf": [{"type": "string"}, {"minimum": 5}]}, 3),
+    ({"oneOf": [{"type": "number"}, {"type": "integer"}]}, 3),
+    ({"not": {"type": "null"}}, None),
+    ({"if": {"properties": {"kind": {"const": "a"}}}, "then": {"required": ["a"]}, "else": {"required": ["b"]}},
+     {"kind": "a", "b": 1}),
+    ({"allOf": [{"maximum": 10}, {"minimum": 5}]}, 11),
+    (True, {"anything": 1}),
+    (False, 1),
+]
+
+@pytest.mark.parametrize("schema, instance", CASES)
+def test_verdicts_match_jsonschema(schema, instance):
+    jsonschema = pytest.importorskip("jsonschema")
+    assert (not validate_with_schema(instance, schema)) == jsonschema.Draft202012Validator(schema).is_valid(instance)
+
+def test_violations_carry_paths_and_can_be_capped():
+    violations = validate_with_schema({"name": "", "age": -1, "tags": ["B"], "odd key": 1}, PERSON)
+    assert {(v["path"], v["keyword"]) for v in violations} == {
+        ("$.name", "minLength"), ("$.age", "minimum"), ("$.tags[0]", "pattern"),
+        ('$["odd key"]', "additionalProperties"),
+    }
+    assert len(validate_with_schema({"name": "", "age": -1}, PERSON, max_errors=1)) == 1
+    assert compile_schema(PERSON).is_valid({"name": "x", "age": 1})
+
+@pytest.mark.parametrize("schema", [
+    '{"type": ',
+    {"type": "integer", "minimum": "0"},
+    {"$ref": "#/$defs/missing"},
+    {"$ref": "https://example.com/schema"},
+    {"unevaluatedProperties": False},
+    {"minLength": -1},
+])
+def test_bad_schemas_raise(schema):
+    with pytest.raises(SchemaError):
+        compile_schema(schema)
+
+def test_recursive_references():
+    tree = {"type": "object", "properties": {"children": {"type": "array", "items": {"$ref": "#"}}},
+            "required": ["children"]}
+    value = {"children": [{"children": []}, {"children": [{"kids": []}]}]}
+    assert [v["pointer"] for v in validate_with_schema(value, tree)] == ["/children/1/children/0"]
+
+def test_validators_are_cached_by_schema():
+    cache = ValidatorCache(max_entries=2)
+    first = cache.get({"type": "string", "minLength": 1})
+    assert cache.get({"minLength": 1, "type": "string"}) is first
+    assert cache.get('{"type": "string"}') is cache.get('{"type": "string"}')
+    cache.get({"type": "null"})
+    assert len(cache) == 2
+    assert cache.get({"type": "string", "minLength": 1}) is not first
@@ -0,0 +1,68 @@
+import copy
+import json
+import random
+
+import pytest
+
+from jsonify.core import format_json
+from jsonify.viewer import LineIndex, child_entries, format_path, parse_path, path_line, resolve_path
+
+DOCUMENT = {"users": [{"name": "a", "tags": ["x", "y"]}, {"name": "b", "odd key": {}, "0": []}], "empty": []}
+
+def all_paths(value, path=()):
+    yield list(path)
+    if isinstance(value, dict):
+        for key, child in value.items():
+            yield from all_paths(child, path + (key,))
+    elif isinstance(value, list):
+        for index, child in enumerate(value):
+            yield from all_paths(child, path + (index,))
+
+def test_line_pages():
+    index = LineIndex("a\nbb\nccc\n" + "d" * 50)
+    assert index.line_count == 4
+    assert index.lines(2, 2) == "bb\nccc"
+    assert index.lines(0, 1) == "a"
+    assert index.lines(4, 10, max_line_chars=10) == "dddddddddd… (+40 chars)"
+
+@pytest.mark.parametrize("path, parts", [
+    ("$.users[0].name", ["users", 0, "name"]),
+    ('$.users[1]["odd key"]', ["users", 1, "odd key"]),
+    ("users[1]['0']", ["users", 1, "0"]),
+    ("$", []),
+])
+def test_paths_round_trip(path, parts):
+    assert parse_path(path) == parts
+    assert parse_path(format_path(parts)) == parts
+
+def test_invalid_and_missing_paths_raise():
+    with pytest.raises(ValueError):
+        parse_path("$.users[")
+    with pytest.raises(ValueError, match="Path not found"):
+        resolve_path(DOCUMENT, ["users", 5])
+    assert resolve_path(DOCUMENT, parse_path("$.users.1.name")) == "b"
+
+@pytest.mark.parametrize("sort_keys", [False, True])
+def test_path_line_matches_the_formatted_output(sort_keys):
+    rng = random.Random(3)
+    documents = [DOCUMENT]
+    for _ in range(20):
+        documents.append({k: [rng.choice([1, {"z": [2]}, [], {}]) for _ in range(rng.randint(0, 3))]
+                          for k in rng.sample("qwerty", 3)})
+    for document in documents:
+        for parts in all_paths(document):
+            if not parts:
+                continue
+            # The value at a path starts on the same line whatever it is replaced with
+            marked = copy.deepcopy(document)
+            parent = resolve_path(marked, parts[:-1])
+            parent[parts[-1]] = "@marker@"
+            lines = format_json(marked, sort_keys=sort_keys).splitlines()
+            assert '"@marker@"' in lines[path_line(document, parts, sort_keys) - 1]
+
+def test_child_entries_page_through_a_container():
+    entries = child_entries(list(range(10)) + [{"a": 1}, "s" * 100], start=9, count=5)
+    assert [entry["key"] for entry in entries] == [9, 10, 11]
+    assert entries[1] == {"key": 10, "type": "object", "preview": "{…} 1 keys"}
+    assert entries[2]["preview"] == json.dumps("s" * 80)[:-1] + "…"
+    assert child_entries(3) == []